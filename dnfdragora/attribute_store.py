@@ -0,0 +1,236 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import dnfdragora.misc
+
+logger = logging.getLogger('dnfdragora.attribute_store')
+
+
+class AttributeStore:
+    '''
+    Persistent cache of package attributes that never change for a given
+    full nevra (description, changelogs, file list...), so that they are not
+    asked to dnf5daemon again after a cache reset or a restart.
+
+    Values are kept in a SQLite database, keyed by full nevra (without a 0
+    epoch, see misc.full_nevra_key) and attribute name. When the stored
+    values exceed max_size bytes the least recently used ones are evicted.
+    Lookups do not write: the last use of the values found is recorded in
+    memory and written in one batch by the next put, every TOUCH_BATCH
+    values or TOUCH_INTERVAL seconds, or on close.
+    Any database error disables the store, every lookup is then a miss.
+    '''
+    # attributes that are the same for every package with the same full nevra
+    IMMUTABLE_ATTRIBUTES = frozenset([
+        'summary', 'description', 'url', 'license', 'group', 'sourcerpm',
+        'changelogs', 'files', 'provides', 'requires', 'requires_pre',
+        'conflicts', 'obsoletes', 'recommends', 'suggests', 'enhances',
+        'supplements',
+    ])
+    MAX_SIZE = 64 * 1024 * 1024
+    # evict down to this fraction of max_size, not to evict at every put
+    EVICT_TO = 0.9
+    # pending last_used updates written at once
+    TOUCH_BATCH = 256
+    TOUCH_INTERVAL = 30.0
+
+    def __init__(self, path, max_size=MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._size = 0
+        self._last_used = 0.0
+        # (full nevra key, attr) -> last_used of the values found since the last write
+        self._touched = {}
+        self._touch_flushed = time.monotonic()
+        try:
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            # used by the UI and the details prefetcher threads, under _lock
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            # a cache, losing the last writes on a crash is fine, an fsync per write is not
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS attributes ("
+                " full_nevra TEXT NOT NULL, attr TEXT NOT NULL, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (full_nevra, attr)) WITHOUT ROWID")
+            self._db.execute("CREATE INDEX IF NOT EXISTS attributes_lru ON attributes (last_used)")
+            self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM attributes").fetchone()[0]
+            self._db.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Attribute cache %s disabled: %s", path, e)
+            self._close()
+
+    def _close(self):
+        if self._db is not None:
+            try:
+                if self._touched:
+                    self._flush_touched()
+                    self._db.commit()
+                self._db.close()
+            except sqlite3.Error:
+                pass
+        self._db = None
+
+    def _disable(self, e):
+        logger.warning("Attribute cache %s disabled: %s", self.path, e)
+        self._close()
+
+    def _now(self):
+        ''' last_used time, strictly increasing to keep the LRU order '''
+        self._last_used = max(time.time(), self._last_used + 1e-6)
+        return self._last_used
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def is_cached(self, attr):
+        ''' True if values of attr are kept by the store '''
+        return attr in self.IMMUTABLE_ATTRIBUTES
+
+    def get_many(self, full_nevra, attrs):
+        '''
+        return the dictionary attr -> value of the stored attrs of the given
+        package, attributes not kept by the store are ignored
+        '''
+        attrs = [attr for attr in attrs if self.is_cached(attr)]
+        if not attrs:
+            return {}
+        values = {}
+        key = dnfdragora.misc.full_nevra_key(full_nevra)
+        with self._lock:
+            if self._db is not None:
+                try:
+                    rows = self._db.execute(
+                        "SELECT attr, value FROM attributes WHERE full_nevra = ? AND attr IN (%s)" %
+                        ",".join("?" * len(attrs)), [key] + attrs).fetchall()
+                    if rows:
+                        now = self._now()
+                        for attr, _ in rows:
+                            self._touched[(key, attr)] = now
+                        if len(self._touched) >= self.TOUCH_BATCH or \
+                           time.monotonic() - self._touch_flushed >= self.TOUCH_INTERVAL:
+                            self._flush_touched()
+                            self._db.commit()
+                    values = {attr: json.loads(value) for attr, value in rows}
+                except (sqlite3.Error, ValueError) as e:
+                    self._disable(e)
+                    values = {}
+            self.hits += len(values)
+            self.misses += len(attrs) - len(values)
+        return values
+
+    def get(self, full_nevra, attr):
+        ''' stored value of attr for the given package, None if not stored '''
+        return self.get_many(full_nevra, [attr]).get(attr)
+
+    def values(self, attr):
+        '''
+        dictionary full nevra key (see misc.full_nevra_key) -> value of
+        every stored value of attr, the LRU order is not changed
+        '''
+        with self._lock:
+            if self._db is None:
+                return {}
+            try:
+                rows = self._db.execute(
+                    "SELECT full_nevra, value FROM attributes WHERE attr = ?", (attr,)).fetchall()
+                return {key: json.loads(value) for key, value in rows}
+            except (sqlite3.Error, ValueError) as e:
+                self._disable(e)
+                return {}
+
+    def put_many(self, full_nevra, values):
+        '''
+        store the attributes (attr -> value) of the given package, empty
+        values and attributes not kept by the store are ignored
+        '''
+        key = dnfdragora.misc.full_nevra_key(full_nevra)
+        rows = []
+        for attr, value in values.items():
+            if value and self.is_cached(attr):
+                data = json.dumps(value, ensure_ascii=False)
+                rows.append([key, attr, data, len(data), 0.0])
+        if not rows:
+            return
+        with self._lock:
+            if self._db is None:
+                return
+            now = self._now()
+            for row in rows:
+                row[4] = now
+            try:
+                self._flush_touched()
+                old = self._db.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM attributes WHERE full_nevra = ? AND attr IN (%s)" %
+                    ",".join("?" * len(rows)), [key] + [row[1] for row in rows]).fetchone()[0]
+                self._db.executemany("INSERT OR REPLACE INTO attributes VALUES (?, ?, ?, ?, ?)", rows)
+                self._size += sum(row[3] for row in rows) - old
+                if self._size > self.max_size:
+                    self._evict()
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def put(self, full_nevra, attr, value):
+        self.put_many(full_nevra, {attr: value})
+
+    def _flush_touched(self):
+        ''' write the pending last_used updates, the caller commits, lock must be held '''
+        touched, self._touched = self._touched, {}
+        self._touch_flushed = time.monotonic()
+        if touched:
+            self._db.executemany("UPDATE attributes SET last_used = ? WHERE full_nevra = ? AND attr = ?",
+                                 [(last_used, key, attr) for (key, attr), last_used in touched.items()])
+
+    def _evict(self):
+        ''' remove least recently used values down to EVICT_TO * max_size '''
+        target = self.max_size * self.EVICT_TO
+        removed = 0
+        while self._size > target:
+            rows = self._db.execute(
+                "SELECT full_nevra, attr, size FROM attributes ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                self._size = 0
+                break
+            evicted = []
+            for full_nevra, attr, size in rows:
+                if self._size <= target:
+                    break
+                evicted.append((full_nevra, attr))
+                self._size -= size
+            self._db.executemany("DELETE FROM attributes WHERE full_nevra = ? AND attr = ?", evicted)
+            removed += len(evicted)
+        logger.debug("Attribute cache: evicted %d values, %d bytes left", removed, self._size)
+
+    def stats(self):
+        ''' lookups found and not found in the store, hit ratio and stored bytes '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+                    'size': self._size}
+
+    def close(self):
+        with self._lock:
+            self._close()
@@ -10,13 +10,19 @@ Author:  Angelo Naselli <anaselli@linux.it>
 
 # NOTE part of this code is imported from yumex-dnf
 
+from operator import attrgetter
+
 import dnfdragora.const as const
+import dnfdragora.misc
+from dnfdragora.package_query import PackageQuery
 
 
 class Package:
     '''
     Base class for a package, must be implemented in a sub class
     '''
+    # subclasses choose between __dict__ and slots
+    __slots__ = ()
 
     def __init__(self, backend):
         self.backend = backend
@@ -46,6 +52,13 @@ class Package:
         '''
         return "%s-%s.%s" % (self.name, self.version, self.arch)
 
+    @property
+    def nevra_key(self):
+        '''
+        key of the package in the PackageCache NEVRA index
+        '''
+        return full_name_key(self.fullname)
+
     def get_attribute(self, attr):
         '''
         get attribute for the package
@@ -70,6 +83,13 @@ class Package:
         """
         self.backend.frontend.exception_handler(e)
 
+    def free(self):
+        '''
+        the package object is dropped, a duplicate of a cached one, free
+        what it holds
+        '''
+        pass
+
 
 class Backend:
     '''
@@ -102,20 +122,36 @@ class Backend:
 
     def get_packages(self, pkg_filter):
         ''' Get a list of Package objects based on a filter
-        ('installed', 'available'...)
+        ('installed', 'available'...), the list can be shared by the
+        cache (see PackageCacheWithFilters) and must not be changed
         '''
         pkgs = self.cache._get_packages(pkg_filter)
         return pkgs
 
+    def get_group_packages(self, pkg_filter, group):
+        ''' Get a list of Package objects of the given RPM group based
+        on a filter ('installed', 'available'...)
+        '''
+        return self.cache.group_packages(pkg_filter, group)
+
+    def get_name_packages(self, pkg_filter, name):
+        ''' Get a list of Package objects named name based on a filter
+        ('installed', 'available'...)
+        '''
+        return self.cache.name_packages(pkg_filter, name)
+
 
 class BaseFilter:
     '''Used as base for filters, there can filter a list of packages
-    based on a different conditions
+    based on a different conditions.
+    version changes with the filter settings, filtered lists computed
+    with an older version are outdated.
     '''
 
     def __init__(self, name, active=False):
         self.name = name
         self.active = active
+        self.version = 0
 
     def run(self, pkgs):
         if not self.active:
@@ -126,6 +162,7 @@ class BaseFilter:
 
     def set_active(self, state):
         self.active = state
+        self.version += 1
 
 
 class ArchFilter(BaseFilter):
@@ -144,6 +181,7 @@ class ArchFilter(BaseFilter):
 
     def change(self, archs):
         self.archs = archs
+        self.version += 1
 
 
 class Filters:
@@ -153,14 +191,24 @@ class Filters:
 
     def __init__(self):
         self._filters = {}
+        self._version = 0
+
+    @property
+    def version(self):
+        '''
+        changes when a filter is added or deleted or its settings change
+        '''
+        return (self._version,) + tuple(flt.version for flt in self._filters.values())
 
     def add(self, filter_cls):
         if filter_cls.name not in self._filters:
             self._filters[filter_cls.name] = filter_cls
+            self._version += 1
 
     def delete(self, name):
         if name in self._filters:
             del self._filters[name]
+            self._version += 1
 
     def run(self, pkgs):
         flt_pkgs = pkgs
@@ -175,20 +223,53 @@ class Filters:
             return None
 
 
+def package_group(po):
+    '''
+    RPM group of the package as cached, packages cached without a group are
+    'Uncategorized' (no attribute request is made to get it)
+    '''
+    return getattr(po, 'grp', None) or 'Uncategorized'
+
+
+def nevra_key(name, epoch, version, release, arch):
+    '''
+    key of a package in the PackageCache NEVRA index, no epoch is epoch 0
+    as in the full name (see misc.pkg_id_to_full_name)
+    '''
+    return (name, str(epoch or 0), version, release, arch)
+
+
+def full_name_key(full_name):
+    ''' NEVRA index key of a full name (str(po)) '''
+    return nevra_key(*dnfdragora.misc.parse_nevra(full_name))
+
+
 class PackageCache:
     '''
     Package cache to contain packages from backend,
     so we dont have get them more than once.
+    Packages are indexed by NEVRA (see Package.nevra_key) and, for each
+    scope, by RPM group (see package_group, for the group tree when comps
+    are not used), name, arch and repository, so that lookups do not scan
+    the cached packages.
+    The version of a scope changes whenever its packages change (see
+    version()).
     '''
+    # secondary indexes: field -> indexed value of a package
+    _FIELDS = {
+        'group': package_group,
+        'name': attrgetter('name'),
+        'arch': attrgetter('arch'),
+        'repo': attrgetter('repository'),
+    }
 
     def __init__(self):
         '''
         setup the cache
         '''
-        for flt in const.ACTIONS_FILTER.values():
-            setattr(self, flt, set())
-        self._populated = []
-        self._index = {}
+        # versions are never reset, an old version must not match again
+        self._versions = dict.fromkeys(const.ACTIONS_FILTER.values(), 0)
+        self.reset()
 
     def reset(self):
         '''
@@ -196,8 +277,29 @@ class PackageCache:
         '''
         for flt in const.ACTIONS_FILTER.values():
             setattr(self, flt, set())
+            self._versions[flt] += 1
         self._populated = []
+        self._loading = set()
         self._index = {}
+        # field -> scope -> value -> packages
+        self._fields = {field: {flt: {} for flt in const.ACTIONS_FILTER.values()}
+                        for field in self._FIELDS}
+
+    def reset_scope(self, pkg_filter):
+        '''
+        remove the packages of pkg_filter only, e.g. to cache them again
+        '''
+        for po in getattr(self, str(pkg_filter)):
+            key = po.nevra_key
+            if self._index.get(key) is po:
+                del self._index[key]
+        setattr(self, str(pkg_filter), set())
+        self._versions[str(pkg_filter)] += 1
+        for scopes in self._fields.values():
+            scopes[str(pkg_filter)] = {}
+        if str(pkg_filter) in self._populated:
+            self._populated.remove(str(pkg_filter))
+        self._loading.discard(str(pkg_filter))
 
     def _get_packages(self, pkg_filter):
         '''
@@ -207,25 +309,258 @@ class PackageCache:
         pkgs = list(getattr(self, str(pkg_filter)))
         return pkgs
 
+    def view(self, pkg_filters):
+        '''
+        packages of every scope of pkg_filters, as _get_packages
+        '''
+        pkgs = []
+        for pkg_filter in pkg_filters:
+            pkgs += self._get_packages(pkg_filter)
+        return pkgs
+
+    def version(self, pkg_filter):
+        '''
+        version of the pkg_filter packages, changed by any addition or removal
+        '''
+        return self._versions[str(pkg_filter)]
+
+    def get_package(self, name):
+        '''
+        cached package with the given full name (str(po)), None if missing
+        '''
+        return self._index.get(full_name_key(name))
+
+    def get_nevra(self, name, epoch, version, release, arch):
+        '''
+        cached package with the given NEVRA, None if missing
+        '''
+        return self._index.get(nevra_key(name, epoch, version, release, arch))
+
+    def _discard(self, po):
+        '''
+        remove po from the cache
+        '''
+        scope = const.ACTIONS_FILTER[po.action]
+        getattr(self, scope).discard(po)
+        self._versions[scope] += 1
+        self._unindex(scope, po)
+        key = po.nevra_key
+        if self._index.get(key) is po:
+            del self._index[key]
+
+    def _unindex(self, scope, po):
+        '''
+        remove po from the secondary indexes of scope
+        '''
+        for field, value_of in self._FIELDS.items():
+            values = self._fields[field][scope]
+            value = value_of(po)
+            members = values.get(value)
+            if members is None or po not in members:
+                # the value has changed since po was indexed (e.g. group filled later)
+                value = next((v for v, m in values.items() if po in m), None)
+                members = values.get(value)
+                if members is None:
+                    continue
+            members.discard(po)
+            if not members:
+                del values[value]
+
+    def query(self, *pkg_filters):
+        '''
+        PackageQuery of the pkg_filters packages, of the package list
+        scopes if none is given
+        '''
+        return PackageQuery(self, pkg_filters)
+
+    def scope_members(self, pkg_filter):
+        '''
+        set of the pkg_filter packages, not to be changed
+        '''
+        return getattr(self, str(pkg_filter))
+
+    def index_value(self, field, po):
+        '''
+        value of po in the field index (group, name, arch or repo)
+        '''
+        return self._FIELDS[field](po)
+
+    def index_members(self, field, pkg_filter, value):
+        '''
+        set of the pkg_filter packages whose field is value, not to be changed
+        '''
+        return self._fields[field][str(pkg_filter)].get(value, frozenset())
+
+    def index_values(self, field, pkg_filter):
+        '''
+        indexed values of field in pkg_filter, in every scope if pkg_filter is None
+        '''
+        scopes = self._fields[field]
+        if pkg_filter is not None:
+            return scopes[str(pkg_filter)].keys()
+        return set().union(*scopes.values())
+
+    def _lookup(self, field, pkg_filter, value):
+        '''
+        cached packages of pkg_filter (every scope if None) whose field is value
+        '''
+        scopes = self._fields[field]
+        if pkg_filter is not None:
+            return list(scopes[str(pkg_filter)].get(value, ()))
+        return [po for values in scopes.values() for po in values.get(value, ())]
+
+    def groups(self, pkg_filter=None):
+        '''
+        sorted RPM groups of the cached pkg_filter packages, of every
+        package if pkg_filter is None
+        '''
+        return sorted(self.index_values('group', pkg_filter))
+
+    def group_counts(self, pkg_filter):
+        '''
+        dictionary RPM group -> number of cached pkg_filter packages
+        '''
+        return {group: len(members) for group, members in self._fields['group'][str(pkg_filter)].items()}
+
+    def group_packages(self, pkg_filter, group):
+        '''
+        cached pkg_filter packages of the given RPM group
+        '''
+        return self._lookup('group', pkg_filter, group)
+
+    def names(self, pkg_filter=None):
+        '''
+        names of the cached pkg_filter packages, of every package if
+        pkg_filter is None
+        '''
+        return self.index_values('name', pkg_filter)
+
+    def name_packages(self, pkg_filter, name):
+        '''
+        cached pkg_filter packages (of every scope if None) named name
+        '''
+        return self._lookup('name', pkg_filter, name)
+
+    def arches(self, pkg_filter=None):
+        '''
+        sorted arches of the cached pkg_filter packages, of every package
+        if pkg_filter is None
+        '''
+        return sorted(arch for arch in self.index_values('arch', pkg_filter) if arch)
+
+    def arch_packages(self, pkg_filter, arch):
+        '''
+        cached pkg_filter packages (of every scope if None) of the given arch
+        '''
+        return self._lookup('arch', pkg_filter, arch)
+
+    def repos(self, pkg_filter=None):
+        '''
+        sorted repository ids of the cached pkg_filter packages, of every
+        package if pkg_filter is None
+        '''
+        return sorted(repo for repo in self.index_values('repo', pkg_filter) if repo)
+
+    def repo_packages(self, pkg_filter, repo):
+        '''
+        cached pkg_filter packages (of every scope if None) of the given repository
+        '''
+        return self._lookup('repo', pkg_filter, repo)
+
+    def match_packages(self, pkg_filter, field, predicate):
+        '''
+        cached pkg_filter packages (of every scope if None) whose indexed
+        field (see _FIELDS) value satisfies predicate, that is called once
+        per distinct value
+        '''
+        scopes = self._fields[field]
+        if pkg_filter is not None:
+            scopes = {str(pkg_filter): scopes[str(pkg_filter)]}
+        return [po for values in scopes.values()
+                for value, members in values.items() if value is not None and predicate(value)
+                for po in members]
+
+    def apply_transaction(self, installed, removed):
+        '''
+        update the cache after a transaction: installed packages replace the
+        same packages in updates or available, removed are the full names
+        (str(po)) of the packages no longer installed
+        '''
+        for key in removed:
+            po = self.get_package(key)
+            if po is not None and const.ACTIONS_FILTER[po.action] == 'installed':
+                self._discard(po)
+        for po in installed:
+            cached = self._index.get(po.nevra_key)
+            if cached is not None:
+                self._discard(cached)
+            self._add(po)
+
+    def replace_names(self, pkg_filter, names, pkgs):
+        '''
+        replace the packages of pkg_filter whose name is in names with pkgs,
+        e.g. packages listed again after a transaction
+        '''
+        for name in names:
+            for po in PackageCache.name_packages(self, pkg_filter, name):
+                self._discard(po)
+        return self.find_packages(pkgs)
+
+    def packages(self, pkg_filter):
+        '''
+        all the cached packages of pkg_filter, not filtered
+        '''
+        return PackageCache._get_packages(self, pkg_filter)
+
     def is_populated(self, pkg_filter):
         return str(pkg_filter) in self._populated
 
-    def populate(self, pkg_filter, pkgs):
+    def is_loading(self, pkg_filter):
+        '''
+        True if some batches of pkg_filter are cached but not the last one
+        '''
+        return str(pkg_filter) in self._loading
+
+    def populate(self, pkg_filter, pkgs, complete=True):
         '''
+        add pkgs to the cache, pkg_filter is marked as populated
+        once its last batch (complete=True) has been added
         '''
         self.find_packages(pkgs)
-        self._populated.append(str(pkg_filter))
+        if complete:
+            self._loading.discard(str(pkg_filter))
+            if str(pkg_filter) not in self._populated:
+                self._populated.append(str(pkg_filter))
+        else:
+            self._loading.add(str(pkg_filter))
 
     # NOTE fedora adds package in updates also as installable
-    #      so look for updates first as workaround or update list will be empty
+    #      so updates win over available or update list will be empty,
+    #      whatever the order scopes are populated in
+    _SCOPE_PRIORITY = {'installed': 0, 'updates': 1, 'available': 2}
+
     def _add(self, po):
-        if str(po) in self._index:  # package is in cache
-            return self._index[str(po)]
-        else:
-            target = getattr(self, const.ACTIONS_FILTER[po.action])
-            self._index[str(po)] = po
-            target.add(po)
-            return po
+        key = po.nevra_key
+        cached = self._index.get(key)
+        if cached is not None:  # package is in cache
+            # packages made from a pkg_id only have no action, they get the cached one
+            cached_scope = const.ACTIONS_FILTER.get(cached.action)
+            scope = const.ACTIONS_FILTER.get(po.action)
+            if cached_scope not in self._SCOPE_PRIORITY or scope not in self._SCOPE_PRIORITY or \
+               self._SCOPE_PRIORITY[scope] >= self._SCOPE_PRIORITY[cached_scope]:
+                if po is not cached:
+                    po.free()
+                return cached
+            getattr(self, cached_scope).discard(cached)
+            self._versions[cached_scope] += 1
+            self._unindex(cached_scope, cached)
+        scope = const.ACTIONS_FILTER[po.action]
+        getattr(self, scope).add(po)
+        self._versions[scope] += 1
+        for field, value_of in self._FIELDS.items():
+            self._fields[field][scope].setdefault(value_of(po), set()).add(po)
+        self._index[key] = po
+        return po
 
     # @TimeFunction
     def find_packages(self, packages):
@@ -244,23 +579,81 @@ class PackageCacheWithFilters(PackageCache):
     ''' Package cache to contain packages from backend,
     so we dont have get them more than once.
     This version has filtering, so we can filter packages by fx. arch
+    Filtered lists of a scope, and of several scopes (see view), are
+    computed once and shared until the scope version or the filters
+    version changes, they must not be changed by the callers.
     '''
 
     def __init__(self):
         '''
         setup the cache
         '''
-        PackageCache.__init__(self)
         self.filters = Filters()
         arch_flt = ArchFilter('arch')
         self.filters.add(arch_flt)
+        # scopes tuple -> (versions, filtered list)
+        self._views = {}
+        self.view_hits = 0
+        self.view_copies = 0
+        self.packages_not_copied = 0
+        PackageCache.__init__(self)
+
+    def reset(self):
+        PackageCache.reset(self)
+        self._views = {}
 
     def _get_packages(self, pkg_filter):
         '''
         get a list of packages from the cache
         @param pkg_filter: the type of packages to get
         '''
-        pkgs = PackageCache._get_packages(self, str(pkg_filter))
+        return self.view((str(pkg_filter),))
+
+    def view(self, pkg_filters):
+        scopes = tuple(str(pkg_filter) for pkg_filter in pkg_filters)
+        versions = tuple(self._versions[scope] for scope in scopes) + self.filters.version
+        memo = self._views.get(scopes)
+        if memo is not None and memo[0] == versions:
+            self.view_hits += 1
+            self.packages_not_copied += len(memo[1])
+            return memo[1]
+        pkgs = []
+        for scope in scopes:
+            pkgs += self.filters.run(PackageCache._get_packages(self, scope))
+        self.view_copies += 1
+        self._views[scopes] = (versions, pkgs)
+        return pkgs
+
+    def view_stats(self):
+        '''
+        shared views returned (hits), views computed (copies) and packages
+        not copied thanks to the shared views
+        '''
+        return {'hits': self.view_hits, 'copies': self.view_copies,
+                'packages_not_copied': self.packages_not_copied}
+
+    def group_packages(self, pkg_filter, group):
+        pkgs = PackageCache.group_packages(self, pkg_filter, group)
+        pkgs = self.filters.run(pkgs)
+        return pkgs
+
+    def name_packages(self, pkg_filter, name):
+        pkgs = PackageCache.name_packages(self, pkg_filter, name)
+        pkgs = self.filters.run(pkgs)
+        return pkgs
+
+    def arch_packages(self, pkg_filter, arch):
+        pkgs = PackageCache.arch_packages(self, pkg_filter, arch)
+        pkgs = self.filters.run(pkgs)
+        return pkgs
+
+    def repo_packages(self, pkg_filter, repo):
+        pkgs = PackageCache.repo_packages(self, pkg_filter, repo)
+        pkgs = self.filters.run(pkgs)
+        return pkgs
+
+    def match_packages(self, pkg_filter, field, predicate):
+        pkgs = PackageCache.match_packages(self, pkg_filter, field, predicate)
         pkgs = self.filters.run(pkgs)
         return pkgs
 
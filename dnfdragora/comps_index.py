@@ -0,0 +1,98 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import locale
+import logging
+import libdnf5
+
+logger = logging.getLogger('dnfdragora.comps_index')
+
+
+def comps_language():
+    ''' language used for translated group names, e.g. 'it' for it_IT '''
+    # locale.getlocale()[0] can return None when no locale is set.
+    loc_raw = locale.getlocale()[0]
+    return loc_raw.split('_')[0] if loc_raw else 'en'
+
+
+class CompsIndex:
+    '''
+    Group <-> package lookups computed once from the comps metadata, instead
+    of a libdnf5 GroupQuery for each of them.
+
+    groups is an iterable of (group id, translated name, package names),
+    group order is kept. categories, if known, is an iterable of (category
+    id, translated name, group ids).
+    '''
+
+    def __init__(self, groups, categories=()):
+        self._names = {}
+        self._packages = {}
+        self._groups_of = {}
+        for group_id, name, package_names in groups:
+            package_names = set(package_names)
+            if group_id in self._names:
+                # same group in several repositories, packages are merged
+                self._packages[group_id].update(package_names)
+            else:
+                self._names[group_id] = name
+                self._packages[group_id] = package_names
+            for package_name in package_names:
+                self._groups_of.setdefault(package_name, set()).add(group_id)
+        self._packages = {group_id: frozenset(names) for group_id, names in self._packages.items()}
+        self._groups_of = {name: frozenset(ids) for name, ids in self._groups_of.items()}
+        self._order = {group_id: i for i, group_id in enumerate(self._names)}
+        self._categories = {}
+        for category_id, name, group_ids in categories:
+            if category_id in self._categories:
+                self._categories[category_id][1].extend(group_ids)
+            else:
+                self._categories[category_id] = (name, list(group_ids))
+
+    @classmethod
+    def from_libdnf5(cls, base, lang=None):
+        ''' index of the comps groups of a libdnf5 Base (see Client._build_comps_base) '''
+        lang = lang or comps_language()
+        return cls((grp.get_groupid(), grp.get_translated_name(lang),
+                    [package.get_name() for package in grp.get_packages()])
+                   for grp in libdnf5.comps.GroupQuery(base))
+
+    def __len__(self):
+        return len(self._names)
+
+    def groups(self):
+        ''' [group id, translated name] of every group '''
+        return [[group_id, name] for group_id, name in self._names.items()]
+
+    def group_name(self, group_id):
+        return self._names.get(group_id)
+
+    def package_names(self, group_id):
+        ''' names of the packages of group_id, empty if unknown '''
+        return self._packages.get(group_id, frozenset())
+
+    def groups_of(self, package_name):
+        ''' ids of the groups package_name belongs to '''
+        return self._groups_of.get(package_name, frozenset())
+
+    def categories(self):
+        ''' [category id, translated name] of every category '''
+        return [[category_id, name] for category_id, (name, _) in self._categories.items()]
+
+    def category_groups(self, category_id):
+        ''' ids of the groups of category_id '''
+        return list(self._categories.get(category_id, (None, []))[1])
+
+    def groups_of_packages(self, package_names):
+        ''' ids of the groups any of package_names belongs to, in group order '''
+        found = set()
+        for package_name in package_names:
+            found.update(self._groups_of.get(package_name, ()))
+        return sorted(found, key=self._order.__getitem__)
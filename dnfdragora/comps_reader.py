@@ -0,0 +1,184 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import gzip
+import logging
+import lzma
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from dnfdragora.comps_index import CompsIndex, comps_language
+
+try:
+    from compression import zstd   # python >= 3.14
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+logger = logging.getLogger('dnfdragora.comps_reader')
+
+# metadata cache of dnf5daemon (libdnf5 system_cachedir)
+CACHE_DIRS = ('/var/cache/libdnf5',)
+# repomd.xml data types of comps files, in order of preference
+COMPS_TYPES = ('group', 'group_zst', 'group_gz', 'group_xz')
+
+_REPOMD_NS = '{http://linux.duke.edu/metadata/repo}'
+_XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+
+def repomd_data(repo_id, cache_dirs=None):
+    '''
+    dictionary data type -> (path, checksum) of the metadata files listed
+    by the repomd.xml of repo_id in the libdnf5 cache, None if the
+    repository metadata are not cached
+    '''
+    # libdnf5 cache directories are named <repo id>-<16 hex digits hash>
+    pattern = re.compile(re.escape(repo_id) + r'-[0-9a-f]{16}$')
+    repomd = None
+    for cache_dir in cache_dirs or CACHE_DIRS:
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            continue
+        for name in names:
+            if not pattern.match(name):
+                continue
+            path = os.path.join(cache_dir, name, 'repodata', 'repomd.xml')
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            # a repository can have an old cache directory (e.g. changed baseurl)
+            if repomd is None or mtime > repomd[0]:
+                repomd = (mtime, path)
+    if repomd is None:
+        return None
+
+    repo_dir = os.path.dirname(os.path.dirname(repomd[1]))
+    data = {}
+    for _, elem in ET.iterparse(repomd[1]):
+        if elem.tag == _REPOMD_NS + 'data' and elem.get('type'):
+            location = elem.find(_REPOMD_NS + 'location')
+            if location is not None and location.get('href'):
+                data[elem.get('type')] = (os.path.join(repo_dir, location.get('href')),
+                                          elem.findtext(_REPOMD_NS + 'checksum'))
+    return data
+
+
+def find_repo_file(repo_id, data_types, cache_dirs=None):
+    '''
+    (path, checksum) of the first readable metadata file of data_types of
+    repo_id in the libdnf5 cache, '' if the repository has none of those
+    types, None if its metadata are not cached
+    '''
+    data = repomd_data(repo_id, cache_dirs)
+    if data is None:
+        return None
+    if not any(data_type in data for data_type in data_types):
+        return ''
+    for data_type in data_types:
+        path, checksum = data.get(data_type, (None, None))
+        if path and os.path.exists(path) and (not path.endswith('.zst') or zstd is not None):
+            return path, checksum
+    return None
+
+
+def find_comps_file(repo_id, cache_dirs=None):
+    '''
+    path of the comps file of repo_id in the libdnf5 cache, '' if the
+    repository has no comps, None if its metadata are not cached
+    '''
+    found = find_repo_file(repo_id, COMPS_TYPES, cache_dirs)
+    return found[0] if found else found
+
+
+def open_metadata(path):
+    ''' binary file object of a metadata file (comps, filelists...), decompressed '''
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'rb')
+    if path.endswith('.zst'):
+        if zstd is None:
+            raise OSError("cannot read %s, no zstd module" % path)
+        if hasattr(zstd, 'ZstdFile'):
+            return zstd.ZstdFile(path, 'rb')
+        return zstd.open(path, 'rb')
+    return open(path, 'rb')
+
+
+open_comps = open_metadata
+
+
+def _translated(elem, tag, lang):
+    ''' text of the tag child of elem in lang, the untranslated one if missing '''
+    text = None
+    for child in elem.iterfind(tag):
+        child_lang = child.get(_XML_LANG)
+        if child_lang is None:
+            if text is None:
+                text = child.text
+        elif child_lang == lang or child_lang.split('_')[0] == lang:
+            return child.text
+    return text
+
+
+def iter_comps(fileobj, lang):
+    '''
+    stream parse a comps file, yield ('group', id, name, package names) and
+    ('category', id, name, group ids), elements are dropped once read
+    '''
+    root = None
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag == 'group':
+            yield ('group', elem.findtext('id'), _translated(elem, 'name', lang),
+                   [req.text for req in elem.iterfind('packagelist/packagereq') if req.text])
+        elif elem.tag == 'category':
+            yield ('category', elem.findtext('id'), _translated(elem, 'name', lang),
+                   [group.text for group in elem.iterfind('grouplist/groupid') if group.text])
+        elif elem.tag != 'environment':
+            continue
+        root.clear()
+
+
+def read_comps(paths, lang=None):
+    ''' CompsIndex of the given comps files, groups of several files are merged '''
+    lang = lang or comps_language()
+    groups = []
+    categories = []
+    for path in paths:
+        with open_metadata(path) as f:
+            for kind, comps_id, name, members in iter_comps(f, lang):
+                (groups if kind == 'group' else categories).append((comps_id, name, members))
+    return CompsIndex(groups, categories)
+
+
+def load_comps_index(repo_ids, cache_dirs=None, lang=None):
+    '''
+    CompsIndex of the enabled repositories repo_ids read from the metadata
+    cached by dnf5daemon, None if any of them is not cached (then libdnf5
+    has to load the repositories, see Client._build_comps_index)
+    '''
+    paths = []
+    for repo_id in repo_ids:
+        path = find_comps_file(repo_id, cache_dirs)
+        if path is None:
+            logger.info("Comps of repository %s not found in cache", repo_id)
+            return None
+        if path:
+            paths.append(path)
+    return read_comps(paths, lang)
@@ -42,6 +42,7 @@ else:
     MISC_DIR = DATA_DIR + "/../misc"
 
 HOME_DIR = os.environ['HOME']
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or HOME_DIR + '/.cache', 'dnfdragora')
 AUTOSTART_DIR = HOME_DIR + '/.config/autostart'
 USER_DESKTOP_FILE = AUTOSTART_DIR + '/dnfdragora-updater.desktop'
 SYS_DESKTOP_FILE = MISC_DIR + "/dnfdragora-updater.desktop"
@@ -2226,7 +2226,7 @@ class SearchDialog(basedialog.BaseDialog):
     .search_filenames  : bool — search in all file paths       (with_filenames)
     .search_binaries   : bool — search in binary paths only    (with_binaries)
     .search_src        : bool — include source RPMs            (with_src)
-    .search_summary    : bool — search in summary, regexp only
+    .search_summary    : bool — search in summary (package cache text index if not regexp)
     .search_text       : stripped search string
     .search_use_regexp : bool
     .search_repos      : list of repo IDs to restrict to ([] = all repos)
@@ -2314,7 +2314,8 @@ class SearchDialog(basedialog.BaseDialog):
 
     # ── Row 2: "Search in:" checkboxes ──────────────────────────────────────
     # Each checkbox maps directly to a dnf5daemon Search() boolean flag.
-    # "Summary" is regexp-only and is enabled/disabled by _updateRegexpState().
+    # "Summary" is searched by the package cache, it is disabled by
+    # _updateSummaryState() with the flags only dnf5daemon searches.
     hbox_fields = self.factory.createHBox(layout)
     self.factory.createLabel(hbox_fields, _("Search in:"))
     self._nevra_check = self.factory.createCheckBox(hbox_fields, _("N&ames"))
@@ -2323,6 +2324,8 @@ class SearchDialog(basedialog.BaseDialog):
     self._provides_check = self.factory.createCheckBox(hbox_fields, _("&Provides"))
     self._provides_check.setChecked(self.search_provides)
     self._provides_check.setHelpText(_("Also match packages whose Provides: tags include the search pattern."))
+    self._provides_check.setNotify(True)
+    self.eventManager.addWidgetEvent(self._provides_check, self._updateSummaryState)
     self._filenames_check = self.factory.createCheckBox(hbox_fields, _("&Files"))
     self._filenames_check.setChecked(self.search_filenames)
     self._filenames_check.setHelpText(_("Match packages that own files whose path matches the pattern."))
@@ -2334,10 +2337,14 @@ class SearchDialog(basedialog.BaseDialog):
     self._src_check = self.factory.createCheckBox(hbox_fields, _("S&ources"))
     self._src_check.setChecked(self.search_src)
     self._src_check.setHelpText(_("Include source RPMs (*.src.rpm) in the results."))
+    self._src_check.setNotify(True)
+    self.eventManager.addWidgetEvent(self._src_check, self._updateSummaryState)
     self.factory.createHSpacing(hbox_fields, 1)
     self._summary_check = self.factory.createCheckBox(hbox_fields, _("Su&mmary"))
     self._summary_check.setChecked(self.search_summary)
-    self._summary_check.setHelpText(_("Search in package summaries. Only available in regexp mode."))
+    self._summary_check.setHelpText(_(
+        "Search in package summaries. Summaries are searched in the package cache, "
+        "not together with Provides or Sources that only dnf5daemon can search."))
 
     # ── Row 3: Scope combobox + search-modifier checkboxes ───────────────────
     hbox_opts = self.factory.createHBox(layout)
@@ -2593,27 +2600,20 @@ class SearchDialog(basedialog.BaseDialog):
     """Enable/disable checkboxes based on regexp mode.
 
     Non-regexp (Search() API): with_nevra, with_provides, with_filenames,
-    with_binaries, with_src are valid; Summary must be disabled.
-    Regexp (search() API): only a single text field (summary or names) is used;
-    the Search()-only flags are disabled. icase, fuzzy, dependency-query,
-    repository and architecture filters are also disabled (they only apply to
-    the multi-field Search() path).
+    with_binaries, with_src are valid; Summary is searched in the text index
+    of the package cache, not with Provides or Sources (see _updateSummaryState).
+    Regexp (search() API): only a single text field (summary, file list or
+    names) is used; the other Search()-only flags are disabled. icase, fuzzy,
+    dependency-query, repository and architecture filters are also disabled
+    (they only apply to the multi-field Search() path).
     """
     is_regexp = self._use_regexp.isChecked()
     # Checkboxes valid only in non-regexp Search() mode.
-    for cb in (self._provides_check, self._filenames_check,
-               self._binaries_check, self._src_check):
+    for cb in (self._provides_check, self._binaries_check, self._src_check):
       try:
         cb.setEnabled(not is_regexp)
       except Exception:
         pass
-    # Summary is valid only in regexp mode (backend.search() field).
-    try:
-      self._summary_check.setEnabled(is_regexp)
-      if not is_regexp:
-        self._summary_check.setChecked(False)
-    except Exception:
-      pass
     # Fuzzy search is incompatible with regexp (would wrap the whole pattern in *…*).
     try:
       self._fuzzy_check.setEnabled(not is_regexp)
@@ -2638,6 +2638,22 @@ class SearchDialog(basedialog.BaseDialog):
           frame.showContent(False)
       except Exception:
         pass
+    self._updateSummaryState()
+
+  def _summaryAvailable(self):
+    """Summary can be searched: in regexp mode, or without Provides and Sources (dnf5daemon only)."""
+    return self._use_regexp.isChecked() or \
+      not (self._provides_check.isChecked() or self._src_check.isChecked())
+
+  def _updateSummaryState(self):
+    """Enable Summary only if it can be searched (see _summaryAvailable)."""
+    available = self._summaryAvailable()
+    try:
+      self._summary_check.setEnabled(available)
+      if not available:
+        self._summary_check.setChecked(False)
+    except Exception:
+      pass
 
   def _onRepoFrameToggled(self, obj):
     """Expand or collapse the repo list when the CheckBoxFrame is toggled."""
@@ -2660,10 +2676,10 @@ class SearchDialog(basedialog.BaseDialog):
     is_regexp = self._use_regexp.isChecked()
     self.search_nevra      = self._nevra_check.isChecked()
     self.search_provides   = (not is_regexp) and self._provides_check.isChecked()
-    self.search_filenames  = (not is_regexp) and self._filenames_check.isChecked()
+    self.search_filenames  = self._filenames_check.isChecked()
     self.search_binaries   = (not is_regexp) and self._binaries_check.isChecked()
     self.search_src        = (not is_regexp) and self._src_check.isChecked()
-    self.search_summary    = is_regexp and self._summary_check.isChecked()
+    self.search_summary    = self._summaryAvailable() and self._summary_check.isChecked()
     self.search_text       = self._find_entry.value().strip()
     self.search_use_regexp = is_regexp
     self.search_repos      = self._selectedRepos()
@@ -11,23 +11,209 @@ Author:  Angelo Naselli <anaselli@linux.it>
 # NOTE part of this code is imported from yumex-dnf
 
 import logging
+import os
 import re
 import threading
+import time
 import libdnf5
 
 from os import listdir
 
 import dnfdragora.backend
 import dnfdragora.dnfd_client
+import dnfdragora.attribute_store
+import dnfdragora.comps_reader
+import dnfdragora.file_index
 import dnfdragora.misc
+import dnfdragora.package_query
+import dnfdragora.package_store
+import dnfdragora.rpmdb_watcher
+import dnfdragora.search_worker
+import dnfdragora.text_index
 import dnfdragora.const as const
 from dnfdragora.misc import ExceptionHandler, TimeFunction
 
 logger = logging.getLogger('dnfdragora.dnf_backend')
 
 
-class DnfPackage(dnfdragora.backend.Package):
-    """Abstract package object for a package in the package system."""
+class DnfPackageBase(dnfdragora.backend.Package):
+    """Abstract package object for a package in the package system.
+
+    Fields are set by the subclasses: DnfPackage keeps them in its
+    __dict__, DnfPackageRow reads them from a PackageStore row.
+    """
+    __slots__ = ()
+
+    # dnf5daemon attribute -> lazy field filled by set_attributes
+    ATTRIBUTE_FIELDS = {
+        'summary'     : '_summary',
+        'description' : '_description',
+        'url'         : 'url',
+        'group'       : 'grp',
+        'changelogs'  : '_changelogs',
+        'files'       : '_files',
+        'requires'    : '_requires',
+    }
+
+    def __str__(self):
+        """String representation of the package object."""
+        return self.fullname
+
+    @property
+    def fullname(self):
+        return dnfdragora.misc.pkg_id_to_full_name(self.pkg_id)
+
+    @property
+    def nevra_key(self):
+        return dnfdragora.backend.nevra_key(self.name, self.epoch, self.ver, self.rel, self.arch)
+
+    @ExceptionHandler
+    def get_attribute(self, attr):
+        """Get a given attribute for a package."""
+        store = self.backend.attribute_store
+        value = store.get(self.full_nevra, attr)
+        if value is None:
+            value = self.backend.GetAttribute(self.full_nevra, attr, sync=True)
+            store.put(self.full_nevra, attr, value)
+        return value
+
+    def as_dbus_pkg(self):
+        """Package values in GetPackages format, DnfPackage(dbus_pkg=...) builds it again."""
+        return {
+            'name': self.name, 'epoch': self.epoch, 'version': self.ver, 'release': self.rel,
+            'arch': self.arch, 'repo_id': self.repository, 'install_size': self.install_size,
+            'download_size': self.download_size, 'summary': self._summary, 'group': self.grp,
+        }
+
+    def missing_attributes(self, attrs):
+        """Attributes in attrs whose lazy field is still empty."""
+        return [attr for attr in attrs if not getattr(self, self.ATTRIBUTE_FIELDS[attr])]
+
+    def set_attributes(self, values):
+        """Fill lazy fields from a GetAttributes reply (attr -> value)."""
+        for attr, value in values.items():
+            field = self.ATTRIBUTE_FIELDS.get(attr)
+            if field and value:
+                setattr(self, field, value)
+
+    @property
+    def version(self):
+        return self.ver
+
+    @property
+    def release(self):
+        return self.rel
+
+    @property
+    def filename(self):
+        """RPM filename of a package."""
+        # the full path for at localinstall is stored in repoid
+        if self.action == 'li':
+            return self.repoid
+        else:
+            return "%s-%s.%s.%s.rpm" % (self.name, self.version,
+                                        self.release, self.arch)
+    @property
+    def group(self):
+        """Package group."""
+        if not self.grp:
+            self.grp = self.get_attribute('group')
+        return self.grp
+
+    @property
+    def fullver(self):
+        """Package full version-release."""
+        return "%s-%s" % (self.version, self.release)
+
+    @property
+    def installed(self):
+        return self.repository[0] == '@'
+
+    @property
+    def URL(self):
+        if not self.url:
+            self.url = self.get_attribute('url')
+        return self.url
+
+    @property
+    @ExceptionHandler
+    def summary(self):
+        if not self._summary:
+            self._summary = self.get_attribute('summary')
+        return self._summary
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value
+
+    @property
+    def known_summary(self):
+        '''summary if already known, None otherwise, dnf5daemon is not asked'''
+        return self._summary or None
+
+    def set_select(self, state):
+        """Package is selected in package view."""
+        self.selected = state
+
+    def set_visible(self, state):
+        """Package is visible in package view"""
+        self.visible = state
+
+    @property
+    @ExceptionHandler
+    def description(self):
+        if not self._description:
+            self._description = self.get_attribute('description')
+        return self._description
+
+    @property
+    @ExceptionHandler
+    def changelog(self):
+        ''' get changelogs information '''
+        if not self._changelogs:
+            self._changelogs = self.get_attribute('changelogs')
+        return self._changelogs
+
+    @property
+    @ExceptionHandler
+    def filelist(self):
+        ''' returns package file list '''
+        if not self._files:
+            self._files = self.get_attribute('files')
+        return self._files
+
+
+    @property
+    @ExceptionHandler
+    def updateinfo(self):
+        '''
+            return advisory info for this package
+        '''
+        if not self._updateinfo:
+            options = {
+                'advisory_attrs' : [
+                "advisoryid", "name", "title", "type", "severity", "status", "vendor", "description", "buildtime", "message", "rights", "collections", "references"
+                ],
+                "contains_pkgs": [self.name]
+            }
+            self._updateinfo = self.backend.Advisories(options, sync=True)
+        return self._updateinfo
+
+    @property
+    @ExceptionHandler
+    def requirements(self):
+        if not self._requires:
+            self._requires = self.get_attribute('requires')
+        return self._requires
+
+    @property
+    def is_update(self):
+        """Package is an update/replacement to another package."""
+        return self.action == 'o' or self.action == 'u'
+
+
+class DnfPackage(DnfPackageBase):
+    """Package object keeping its values in its own __dict__."""
 
     def __init__(self, backend, dbus_pkg=None, action=None, pkg_id=None):
         dnfdragora.backend.Package.__init__(self, backend)
@@ -123,136 +309,227 @@ class DnfPackage(dnfdragora.backend.Package):
         self.downgrade_po = None
         # cache
 
-    def __str__(self):
-        """String representation of the package object."""
-        return self.fullname
 
-    @property
-    def fullname(self):
-        return dnfdragora.misc.pkg_id_to_full_name(self.pkg_id)
+def _row_field(name, default):
+    ''' property of a DnfPackageRow field kept by its store, see PackageStore.field '''
+    return property(lambda self: self._store.field(self._row, name, default),
+                    lambda self, value: self._store.set_field(self._row, name, value, default))
 
-    @ExceptionHandler
-    def get_attribute(self, attr):
-        """Get a given attribute for a package."""
-        return self.backend.GetAttribute(self.full_nevra, attr, sync=True)
+
+class DnfPackageRow(DnfPackageBase):
+    """DnfPackage whose values are read from a row of a PackageStore.
+
+    Only backend, store and row are kept in the object, no __dict__ (every
+    base class has empty __slots__). The fields below are kept by the store
+    only for the packages that set them (details, selection...).
+    """
+    __slots__ = ('backend', '_store', '_row')
+
+    _description = _row_field('_description', "")
+    _changelogs  = _row_field('_changelogs', "")
+    _files       = _row_field('_files', "")
+    _updateinfo  = _row_field('_updateinfo', None)
+    _requires    = _row_field('_requires', None)
+    url          = _row_field('url', None)
+    visible      = _row_field('visible', True)
+    selected     = _row_field('selected', False)
+    downgrade_po = _row_field('downgrade_po', None)
+    queued       = _row_field('queued', False)
+    recent       = _row_field('recent', False)
+
+    def __init__(self, backend, store, row):
+        self.backend = backend
+        self._store = store
+        self._row = row
+
+    def free(self):
+        ''' the row can be reused by the store, the object must not be used any more '''
+        self._store.free(self._row)
+        self._row = None
 
     @property
-    def version(self):
-        return self.ver
+    def name(self):
+        return self._store.get('name', self._row)
 
     @property
-    def release(self):
-        return self.rel
+    def epoch(self):
+        return self._store.get('epoch', self._row)
 
     @property
-    def filename(self):
-        """RPM filename of a package."""
-        # the full path for at localinstall is stored in repoid
-        if self.action == 'li':
-            return self.repoid
-        else:
-            return "%s-%s.%s.%s.rpm" % (self.name, self.version,
-                                        self.release, self.arch)
+    def ver(self):
+        return self._store.get('version', self._row)
+
     @property
-    def group(self):
-        """Package group."""
-        if not self.grp:
-            self.grp = self.get_attribute('group')
-        return self.grp
+    def rel(self):
+        return self._store.get('release', self._row)
 
     @property
-    def fullver(self):
-        """Package full version-release."""
-        return "%s-%s" % (self.version, self.release)
+    def arch(self):
+        return self._store.get('arch', self._row)
 
     @property
-    def installed(self):
-        return self.repository[0] == '@'
+    def repository(self):
+        return self._store.get('repo', self._row)
 
     @property
-    def URL(self):
-        if not self.url:
-            self.url = self.get_attribute('url')
-        return self.url
+    def action(self):
+        return self._store.get('action', self._row)
+
+    @action.setter
+    def action(self, value):
+        self._store.set('action', self._row, value)
 
     @property
-    @ExceptionHandler
-    def summary(self):
-        if not self._summary:
-            self._summary = self.get_attribute('summary')
-        return self._summary
+    def grp(self):
+        return self._store.get('group', self._row)
 
-    @summary.setter
-    def summary(self, value):
-        self._summary = value
+    @grp.setter
+    def grp(self, value):
+        self._store.set('group', self._row, value)
 
-    def set_select(self, state):
-        """Package is selected in package view."""
-        self.selected = state
+    @property
+    def _summary(self):
+        return self._store.summary(self._row)
 
-    def set_visible(self, state):
-        """Package is visible in package view"""
-        self.visible = state
+    @_summary.setter
+    def _summary(self, value):
+        self._store.set_summary(self._row, value)
 
     @property
-    @ExceptionHandler
-    def description(self):
-        if not self._description:
-            self._description = self.get_attribute('description')
-        return self._description
+    def install_size(self):
+        return self._store.install_size[self._row]
 
     @property
-    @ExceptionHandler
-    def changelog(self):
-        ''' get changelogs information '''
-        if not self._changelogs:
-            self._changelogs = self.get_attribute('changelogs')
-        return self._changelogs
+    def download_size(self):
+        return self._store.download_size[self._row]
 
     @property
-    @ExceptionHandler
-    def filelist(self):
-        ''' returns package file list '''
-        if not self._files:
-            self._files = self.get_attribute('files')
-        return self._files
+    def size(self):
+        return self._store.install_size[self._row]
 
+    @property
+    def sizeM(self):
+        return dnfdragora.misc.format_size(self.size)
 
     @property
-    @ExceptionHandler
-    def updateinfo(self):
-        '''
-            return advisory info for this package
-        '''
-        if not self._updateinfo:
-            options = {
-                'advisory_attrs' : [
-                "advisoryid", "name", "title", "type", "severity", "status", "vendor", "description", "buildtime", "message", "rights", "collections", "references"
-                ],
-                "contains_pkgs": [self.name]
-            }
-            self._updateinfo = self.backend.Advisories(options, sync=True)
-        return self._updateinfo
+    def pkg_id(self):
+        return dnfdragora.misc.to_pkg_id(self.name, self.epoch, self.ver, self.rel, self.arch, self.repository)
 
     @property
-    @ExceptionHandler
-    def requirements(self):
-        if not self._requires:
-            self._requires = self.get_attribute('requires')
-        return self._requires
+    def full_nevra(self):
+        return self.fullname
 
     @property
-    def is_update(self):
-        """Package is an update/replacement to another package."""
-        return self.action == 'o' or self.action == 'u'
+    def nevra_key(self):
+        return self._store.nevra_key(self._row)
+
+    @property
+    def fullname(self):
+        epoch = self.epoch
+        if epoch and epoch != '0':
+            return "%s-%s:%s-%s.%s" % (self.name, epoch, self.ver, self.rel, self.arch)
+        return "%s-%s-%s.%s" % (self.name, self.ver, self.rel, self.arch)
+
+
+class DetailsPrefetcher:
+    '''
+    Fetch in background the detail attributes of the packages shown around
+    the selected one, so that moving through the package list shows their
+    information at once.
+
+    Only the latest request is kept: it is served DELAY seconds after it has
+    been made, so that moving quickly through the list does not send a
+    request per row, and it waits while the backend is busy (it is a low
+    priority request). cancel() drops it, e.g. when the list is rebuilt.
+    '''
+    DELAY = 0.15
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._cond = threading.Condition()
+        self._request = None
+        self._running = True
+        self._thread = None
+
+    def prefetch(self, pkgs, attrs):
+        '''fetch attrs for pkgs, nearest to the selected package first'''
+        with self._cond:
+            if not self._running:
+                return
+            self._request = (list(pkgs), list(attrs), time.monotonic() + self.DELAY)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="DetailsPrefetcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        '''drop the pending request, a running fetch is completed'''
+        with self._cond:
+            self._request = None
+            self._cond.notify()
+
+    def stop(self):
+        '''cancel and terminate the worker thread'''
+        with self._cond:
+            self._running = False
+            self._request = None
+            self._cond.notify()
+
+    def _next_request(self):
+        '''wait for a request that is due, None if stopped'''
+        with self._cond:
+            while self._running:
+                if self._request is None:
+                    self._cond.wait()
+                    continue
+                pkgs, attrs, due = self._request
+                delay = due - time.monotonic()
+                if delay <= 0 and self.backend.is_busy():
+                    # let the running requests complete first
+                    delay = self.DELAY
+                    self._request = (pkgs, attrs, time.monotonic() + delay)
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                self._request = None
+                return pkgs, attrs
+            return None
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            if request is None:
+                break
+            pkgs, attrs = request
+            logger.debug("Prefetching %s for %d packages", attrs, len(pkgs))
+            self.backend.fetch_attributes(pkgs, attrs)
+        logger.debug("DetailsPrefetcher exit")
 
 
 class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
     """Backend to do all the dnf related actions """
 
+    # rpmdb locations, the first existing one is used by package_state
+    RPMDB_PATHS = (
+        '/usr/lib/sysimage/rpm/rpmdb.sqlite',
+        '/var/lib/rpm/rpmdb.sqlite',
+        '/var/lib/rpm/Packages',
+    )
+
     def __init__(self, frontend, use_comps=False):
         dnfdragora.backend.Backend.__init__(self, frontend, filters=True)
         dnfdragora.dnfd_client.Client.__init__(self)
+        self._init_state(
+            dnfdragora.attribute_store.AttributeStore(os.path.join(const.CACHE_DIR, 'attributes.sqlite')),
+            dnfdragora.file_index.FileIndex(os.path.join(const.CACHE_DIR, 'filelists')),
+            use_comps)
+        self.watch_rpmdb()
+        if use_comps:
+            # GetGroups is needed as soon as packages are cached
+            self.prewarm_comps_base()
+
+    def _init_state(self, attribute_store, file_index, use_comps=False):
+        '''state of the backend besides the dnf5daemon client'''
         self.dnl_progress = None
         self._files_to_download = 0
         self._files_downloaded = 0
@@ -260,11 +537,209 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
         self._group_cache = None
         self._protected = None
         self._pkg_id_to_groups_cache = None
+        self._search_thread = None
+        # id of the last search() and the event cancelling it
+        self.search_id = 0
+        self._search_cancel = None
+        # (fetch scope, attr, cache versions, {package: text}) of the last attribute column
+        self._attribute_column = None
+        self.parallel_search = dnfdragora.search_worker.ParallelSearch()
+        self.details_prefetcher = DetailsPrefetcher(self)
+        self.attribute_store = attribute_store
+        # cached packages are DnfPackageRow views of this store, None for DnfPackage objects
+        self.package_store = dnfdragora.package_store.PackageStore()
+        # (cache versions, TextIndex) of the last text index built
+        self._text_index = None
+        self._text_index_thread = None
+        # file path index, built at the first file search
+        self.file_index = file_index
+        self._file_index_thread = None
+        # enabled repository ids of the file index sources, None until listed again,
+        # and the generation of the repositories found without cached filelists
+        self._file_index_repos = None
+        self._file_index_generation = 0
+        self._file_index_unavailable = None
+        self.rpmdb_watcher = None
+
+    def fetch_attributes(self, pkgs, attrs):
+        '''
+        Fill the lazy fields (see DnfPackage.ATTRIBUTE_FIELDS) of pkgs with
+        one GetAttributes call, instead of one GetAttribute per attribute
+        and package. Values found in the attribute store are not asked for,
+        on error the fields are left empty and are got one by one on access.
+        '''
+        missing = {}
+        for po in pkgs:
+            missing_attrs = po.missing_attributes(attrs)
+            if missing_attrs:
+                po.set_attributes(self.attribute_store.get_many(po.full_nevra, missing_attrs))
+                if po.missing_attributes(attrs):
+                    missing[po.full_nevra] = po
+        if not missing:
+            return
+        try:
+            values = self.GetAttributes(list(missing.keys()), attrs, sync=True)
+        except Exception as e:
+            logger.warning("GetAttributes for %d packages failed: %s", len(missing), e)
+            return
+        for full_nevra, po in missing.items():
+            pkg_values = values.get(full_nevra, {})
+            po.set_attributes(pkg_values)
+            self.attribute_store.put_many(full_nevra, pkg_values)
+        if 'description' in attrs and self._text_index is not None:
+            index = self._text_index[1]
+            for po in missing.values():
+                index.add_description(po, po._description)
+
+    def apply_transaction(self, resolve):
+        '''
+        Update the package cache with the resolve list of a transaction that
+        has been run (see BuildTransaction) instead of caching all the
+        packages again. Returns the names of the packages involved, whose
+        lists must be refreshed (e.g. a removed package is available again),
+        None if the resolve list cannot be applied.
+        '''
+        installed = []
+        removed = []
+        names = set()
+        try:
+            for typ, action, _reason, _info, pkg in resolve:
+                if typ != 'Package':
+                    continue
+                names.add(pkg['name'])
+                pkg_id = dnfdragora.misc.to_pkg_id(pkg['name'], pkg['epoch'], pkg['version'],
+                                                   pkg['release'], pkg['arch'], pkg['repo_id'])
+                if action in ('Remove', 'Replaced'):
+                    removed.append(dnfdragora.misc.pkg_id_to_full_name(pkg_id))
+                elif action in ('Install', 'Upgrade', 'Downgrade', 'Reinstall'):
+                    values = dict(pkg, repo_id='@System')
+                    cached = self.cache.get_nevra(pkg['name'], pkg['epoch'], pkg['version'],
+                                                  pkg['release'], pkg['arch'])
+                    if cached is not None:
+                        values.setdefault('summary', cached.known_summary)
+                        values.setdefault('group', cached.grp)
+                    installed.append(self._new_package(values, const.FILTER_ACTIONS['installed']))
+                else:
+                    logger.warning("Transaction action %s of %s not managed", action, pkg['name'])
+                    return None
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Cannot apply transaction to package cache: %s", e)
+            return None
+        self.cache.apply_transaction(installed, removed)
+        logger.info("Package cache updated: %d installed, %d removed", len(installed), len(removed))
+        return names
+
+    def refresh_packages(self, pkg_filter, names, pkgs, verify=True):
+        '''
+        Replace the cached pkg_filter packages whose name is in names with
+        pkgs (GetPackages values), listed again after apply_transaction.
+        Returns False if verify is set and the installed packages listed do
+        not match the cache, i.e. the transaction has not been applied as
+        expected.
+        '''
+        action = const.FILTER_ACTIONS[pkg_filter]
+        po_list = [self._new_package(values, action) for values in pkgs]
+        agree = True
+        if verify and pkg_filter == 'installed':
+            cached = set(str(po) for po in self.cache.packages(pkg_filter) if po.name in names)
+            listed = set(str(po) for po in po_list)
+            agree = cached == listed
+            if not agree:
+                logger.warning("Installed packages differ from the cache: missing %s, unexpected %s",
+                               sorted(listed - cached), sorted(cached - listed))
+        self.cache.replace_names(pkg_filter, names, po_list)
+        return agree
+
+    def rpmdb_state(self):
+        '''
+        [path, mtime_ns, size] of the rpmdb file, None if not found
+        '''
+        for path in self.RPMDB_PATHS:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return [path, st.st_mtime_ns, st.st_size]
+        return None
+
+    def watch_rpmdb(self):
+        '''
+        Post a RpmdbChanged event, with the new rpmdb_state, whenever the
+        rpmdb is changed, by dnfdragora itself or by another tool.
+        '''
+        rpmdb = self.rpmdb_state()
+        if rpmdb is None:
+            logger.warning("rpmdb not found, changes are not watched")
+            return
+        self.rpmdb_watcher = dnfdragora.rpmdb_watcher.RpmdbWatcher(rpmdb[0], self._on_rpmdb_changed)
+        if not self.rpmdb_watcher.start():
+            self.rpmdb_watcher = None
+
+    def _on_rpmdb_changed(self):
+        self.eventQueue.put({'event': 'RpmdbChanged', 'value': {'rpmdb': self.rpmdb_state()}})
+
+    def installed_changes(self, pkgs):
+        '''
+        Compare the cached installed packages with pkgs, the installed
+        GetPackages values (name, epoch, version, release and arch).
+        Returns (names, removed): names of the packages installed, removed
+        or changed, and of those no longer installed at all.
+        '''
+        nevra_key = dnfdragora.backend.nevra_key
+        listed = {}
+        for pkg in pkgs:
+            key = nevra_key(pkg['name'], pkg['epoch'], pkg['version'], pkg['release'], pkg['arch'])
+            listed[key] = pkg['name']
+        cached = {po.nevra_key: po.name for po in self.cache.packages('installed')}
+        names = set(listed[key] for key in listed.keys() - cached.keys())
+        old_names = set(cached[key] for key in cached.keys() - listed.keys())
+        return names | old_names, old_names - set(listed.values())
+
+    def package_state(self):
+        '''
+        State the package lists depend on: rpmdb file stat and revision and
+        update time of the enabled repositories metadata. None if unknown.
+        '''
+        rpmdb = self.rpmdb_state()
+        if rpmdb is None:
+            logger.warning("rpmdb not found, package state unknown")
+            return None
+        try:
+            repos = self.GetRepositories(repo_attrs=['id', 'revision', 'updated'],
+                                         enable_disable='enabled', sync=True)
+        except Exception as e:
+            logger.warning("Cannot get repository state: %s", e)
+            return None
+        return {
+            'rpmdb': rpmdb,
+            'repos': {repo['id']: [repo.get('revision', ''), repo.get('updated', 0)] for repo in repos},
+        }
+
+    def has_pending_requests(self):
+        '''True if a dnf5daemon reply or a local search result is expected'''
+        if self._search_thread is not None and self._search_thread.is_alive():
+            return True
+        return dnfdragora.dnfd_client.Client.has_pending_requests(self)
 
     @ExceptionHandler
     def quit(self):
         """Quit the dnf backend daemon."""
         logger.info("Quit")
+        self.details_prefetcher.stop()
+        if self._search_cancel is not None:
+            self._search_cancel.set()
+        self.parallel_search.shutdown()
+        if self.rpmdb_watcher is not None:
+            self.rpmdb_watcher.stop()
+        logger.info("Attribute cache: %s", self.attribute_store.stats())
+        logger.info("Package views: %s", self.cache.view_stats())
+        if self._text_index is not None:
+            logger.info("Text index: %s", self._text_index[1].stats())
+        if self.file_index.ready:
+            logger.info("File index: %s", self.file_index.stats())
+        if self._use_comps:
+            logger.info("Comps base: %s", self.comps_base_stats())
+        self.attribute_store.close()
 
     @ExceptionHandler
     def reload(self):
@@ -274,13 +749,20 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
         self.clear_cache()
 
     @ExceptionHandler
-    def clear_cache(self, also_groups=False):
+    def clear_cache(self, also_groups=False, keep_packages=False):
         '''empty package and group cache .'''
-        self.cache.reset()  # Reset the cache
+        if not keep_packages:
+            self.cache.reset()  # Reset the cache
+            if self.package_store is not None:
+                # rows of the dropped packages are freed with the old store
+                self.package_store = dnfdragora.package_store.PackageStore()
         self._group_cache = None
         #NOTE caching groups is slow let's do it only once if needed
         if also_groups:
           self._pkg_id_to_groups_cache = None
+          # repositories may have been enabled, disabled or refreshed
+          self._file_index_repos = None
+          self._file_index_generation += 1
 
     def to_pkg_tuple(self, pkg_id):
         """Get package nevra & repoid from an package pkg_id"""
@@ -302,9 +784,16 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
         append = po_list.append
         action = const.FILTER_ACTIONS[flt]
         for pkg_values in pkgs:
-            append(DnfPackage(self, dbus_pkg=pkg_values, action=action))
+            append(self._new_package(pkg_values, action))
         return self.cache.find_packages(po_list)
 
+    def _new_package(self, pkg_values, action):
+        '''package object of GetPackages values, a package_store row if any'''
+        store = self.package_store
+        if store is not None:
+            return DnfPackageRow(self, store, store.add(pkg_values, action))
+        return DnfPackage(self, dbus_pkg=pkg_values, action=action)
+
     @TimeFunction
     def make_pkg_object_with_attr(self, pkgs):
         """Make list of Packages from a list of pkg_ids & attrs.
@@ -348,31 +837,24 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
             filters = ['updates', 'installed', 'available']
         else:
             filters = [flt]
-        result = []
+        scopes = []
         for pkg_flt in filters:
-            # is this type of packages is already cached ?
-            if self.cache.is_populated(pkg_flt):
-              result += dnfdragora.backend.Backend.get_packages(self, pkg_flt)
+            # is this type of packages is already cached (or being cached) ?
+            if self.cache.is_populated(pkg_flt) or self.cache.is_loading(pkg_flt):
+              scopes.append(pkg_flt)
             else:
               logger.error("Cache is not populated for %s", pkg_flt) #TODO manage
+        # shared by the cache until its packages change, not to be modified
+        result = self.cache.view(scopes)
         logger.debug('get-packages : %s ', len(result))
         return result
 
     @ExceptionHandler
     @TimeFunction
     def _get_groups_from_packages(self):
-        """Get groups by looking for all packages group property."""
-        try:
-          packages = self.get_packages('all')
-        except Exception as err:
-          logger.error("Exception %s"%(err))
-        logger.debug('_get-groups-from-packages got %d',len(packages))
-        result = []
-        append = result.append
-        for pkg in packages:
-            if pkg.group not in result :
-                append(pkg.group)
-
+        """Get groups of all the cached packages (see PackageCache group index)."""
+        result = self.cache.groups()
+        logger.debug('_get-groups-from-packages got %d', len(result))
         return result
 
     @ExceptionHandler
@@ -392,52 +874,399 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
 
         return pkgs
 
+    # package attribute -> PackageCache index searched for it
+    INDEXED_SEARCH_ATTRS = {'name': 'name', 'arch': 'arch', 'repository': 'repo'}
+    # dnf5daemon search scope -> cached scopes of its packages
+    SEARCH_SCOPES = {
+        'all'        : ('updates', 'installed', 'available'),
+        'installed'  : ('installed',),
+        'available'  : ('updates', 'available'),
+        'upgrades'   : ('updates',),
+        'upgradable' : ('installed',),
+    }
+
+    def search_query(self, filter, repos=None, arches=None, complete=False):
+        '''
+        PackageQuery of the cached packages of a search scope (see
+        SEARCH_SCOPES, a cache scope is also accepted), restricted to the
+        given repositories and arches. Scopes not cached are skipped, if
+        complete is set None is returned unless every scope is cached.
+        '''
+        scopes = []
+        for scope in self.SEARCH_SCOPES.get(filter, (filter,)):
+            if self.cache.is_populated(scope) or (not complete and self.cache.is_loading(scope)):
+                scopes.append(scope)
+            elif complete:
+                return None
+            else:
+                logger.error("Cache is not populated for %s", scope) #TODO manage
+        query = self.cache.query().scope(*scopes)
+        if filter == 'upgradable':
+            query = query.has_update()
+        if repos:
+            query = query.repo(*repos)
+        if arches:
+            query = query.arch(*arches)
+        return query
+
+    # searched package attribute -> dnf5daemon attribute fetched as a column
+    COLUMN_ATTRS = {
+        'filelist'     : 'files',
+        'description'  : 'description',
+        'changelog'    : 'changelogs',
+        'requirements' : 'requires',
+    }
+    # dnf5daemon search scope -> scope listed for an attribute column
+    COLUMN_SCOPES = {'installed': 'installed', 'upgradable': 'installed', 'available': 'available',
+                     'upgrades': 'upgrades'}
+
+    def attribute_column(self, filter, attr):
+        '''
+        dictionary package -> text (see search_worker.column_text) of the
+        dnf5daemon attribute attr of the cached packages of a search scope,
+        listed with one GetPackages_fd call instead of a GetAttribute per
+        package. The last column is kept until the cache changes, a column
+        of all the packages serves every scope.
+        The listing is a scheduled request waited for, from the search
+        thread: DaemonError is raised, and nothing kept, if it fails or is
+        incomplete.
+        '''
+        scope = self.COLUMN_SCOPES.get(filter, 'all')
+        versions = self._cache_versions()
+        column = self._attribute_column
+        if column is not None and column[1] == attr and column[2] == versions and column[0] in (scope, 'all'):
+            return column[3]
+        start = time.monotonic()
+        options = {
+          "package_attrs": [attr] + ['name', 'epoch', 'version', 'release', 'arch'],
+          "scope": scope,
+          "with_src": False,
+        }
+        texts = {}
+        for pkg in self.GetPackages(options, wait=True) or []:
+            po = self.cache.get_nevra(pkg.get('name'), pkg.get('epoch'), pkg.get('version'),
+                                      pkg.get('release'), pkg.get('arch'))
+            if po is not None:
+                texts[po] = dnfdragora.search_worker.column_text(pkg.get(attr))
+        logger.debug("Attribute column %s of %s: %d packages in %.3f seconds", attr, scope, len(texts),
+                     time.monotonic() - start)
+        self._attribute_column = (scope, attr, versions, texts)
+        return texts
+
+    def _search_packages(self, filter, attr, regexp, repos=None, arches=None, partial=None, cancel=None):
+      '''
+      packages of filter whose attr matches regexp, indexed attributes are
+      tried once per distinct value instead of per package, the attributes
+      of COLUMN_ATTRS are searched in their column by parallel_search.
+      partial is called with the packages found as they are, None is
+      returned if cancel is set (see ParallelSearch.search)
+      '''
+      query = self.search_query(filter, repos, arches)
+      if attr in self.COLUMN_ATTRS:
+        column = self.attribute_column(filter, self.COLUMN_ATTRS[attr])
+        if cancel is not None and cancel.is_set():
+          return None
+        pkgs = [po for po in query if po in column]
+        on_partial = None
+        if partial is not None:
+          on_partial = lambda indexes: partial([pkgs[i] for i in indexes])
+        found = self.parallel_search.search(regexp, [column[po] for po in pkgs], on_partial, cancel)
+        return None if found is None else [pkgs[i] for i in found]
+      s = re.compile(regexp)
+      field = self.INDEXED_SEARCH_ATTRS.get(attr)
+      if field is not None:
+        return query.match(field, s.search).list()
+      first = query.first()
+      if first is not None and not hasattr(first, attr):
+        raise AttributeError(_("package has not any %s attributes"%(attr)))
+      return query.filter(lambda p: s.search(str(getattr(p, attr)))).list()
+
+    # seconds between two partial results of a search
+    PARTIAL_INTERVAL = 0.5
+
     @TimeFunction
-    def __search_loop(self, filter, attr, regexp):
+    def __search_loop(self, find, description, search_id=0, cancel=None):
       '''
       Async thread loop to be used in searching. Requires package caching performed.
-      Emits a "RESearch" dnfdaemon client like event.
+      find(partial, cancel) returns the packages found, None if cancelled
+      (see _search_packages).
+      Emits a "RESearch" dnfdaemon client like event, with the packages found
+      so far every PARTIAL_INTERVAL seconds ('complete' is False) if the
+      search is long, nothing if it is cancelled.
       '''
-      pl = self.get_packages(filter)
-      logger.debug("Searching <%s> from <%s> attribute into %d packages", regexp, attr, len(pl))
+      logger.debug("Searching %s", description)
+      found = []
+      posted = [time.monotonic()]
+
+      def partial(packages):
+        found.extend(packages)
+        now = time.monotonic()
+        if now - posted[0] >= self.PARTIAL_INTERVAL:
+          posted[0] = now
+          response = {'result': list(found), 'error': None, 'complete': False, 'search_id': search_id}
+          self.eventQueue.put({'event': 'RESearch', 'value': response})
+
       packages = []
       exe_error = None
-      if len(pl) > 0:
-        if not hasattr(pl[0], attr):
-          exe_error = _("package has not any %s attributes"%(attr))
-          logger.error("package has not any %s attributes", attr)
-
-      if exe_error == None:
-        try:
-          s = re.compile(regexp)
-          #for p in pl:
-            #if hasattr(p, attr) and s.search(str(getattr(p, attr))):
-              #packages.append(p)
-            #elif not hasattr(p, attr):
-              #logger.error("package has not any %s attributes", attr)
-          packages = [ p for p in pl if s.search(str(getattr(p, attr))) ]
-        except Exception as e:
-          logger.error(str(e))
-          exe_error = str(e)
-
-      response = { 'result' : None if exe_error else packages, 'error' : exe_error }
+      try:
+        packages = find(partial, cancel)
+      except Exception as e:
+        logger.error(str(e))
+        exe_error = str(e)
+      if packages is None:
+        logger.debug("__search_loop exit. Search cancelled")
+        return
+
+      response = { 'result' : None if exe_error else packages, 'error' : exe_error,
+                   'complete': True, 'search_id': search_id }
       self.eventQueue.put({'event': 'RESearch', 'value': response})
       logger.debug("__search_loop exit. Found %d pacakges", len(packages))
 
     @TimeFunction
     @ExceptionHandler
-    def search(self, filter, attr, regexp, sync=False):
+    def search(self, filter, attr, regexp, sync=False, repos=None, arches=None):
         """Search given pkg attributes for given keys.
         :param filter: filter packages for all, updates, installed or available
         :param attr: package attr to search in (name, filelist, etc.)
         :param regexp: regular expression using python syntax to search for
+        :param repos: repository ids the packages must come from, all if empty
+        :param arches: arches of the packages, all if empty
+
+        An async search cancels the previous one, its RESearch events carry
+        search_id.
         """
         if sync:
-          packages = [p for p in self.get_packages(filter) if re.search(regexp, str(p.get_attribute(attr))) ]  # str(p.filelist)) ]
+          if attr in self.INDEXED_SEARCH_ATTRS or attr in self.COLUMN_ATTRS:
+            return self._search_packages(filter, attr, regexp, repos, arches)
+          query = self.search_query(filter, repos, arches)
+          packages = [p for p in query if re.search(regexp, str(p.get_attribute(attr))) ]  # str(p.filelist)) ]
           return packages
         else:
-          t = threading.Thread(target=self.__search_loop, args=(filter, attr, regexp))
-          t.start()
+          self._start_search(
+            lambda partial, cancel: self._search_packages(filter, attr, regexp, repos, arches, partial, cancel),
+            "<%s> from <%s> attribute of %s packages" % (regexp, attr, filter))
+
+    def _start_search(self, find, description):
+      '''run find in a new search thread (see __search_loop), the previous search is cancelled'''
+      if self._search_cancel is not None:
+        self._search_cancel.set()
+      self.search_id += 1
+      self._search_cancel = threading.Event()
+      self._search_thread = threading.Thread(target=self.__search_loop, args=(find, description, self.search_id,
+                                                                             self._search_cancel))
+      self._search_thread.start()
+
+    def search_text(self, filter, patterns, fields=('name', 'summary'), substring=False, icase=True,
+                    filenames=False, binaries=False, repos=None, arches=None):
+      '''
+      Async text search of the words of patterns in fields of the text index
+      (see text_search), and of the files matching patterns in the file
+      index if filenames or binaries (see file_search), for the searches
+      dnf5daemon cannot answer (summaries) while the indexes are built: they
+      are waited for in the search thread. Emits RESearch events as search.
+      '''
+      words = [pattern.strip('*') for pattern in patterns]
+
+      def find(partial, cancel):
+        query = self.search_query(filter, repos, arches)
+        index = self._wait_text_index(cancel)
+        if index is None:
+          return None
+        packages = self.text_search(query, words, fields, substring, icase, index)
+        if not (filenames or binaries):
+          return packages
+        files = self._wait_file_search(query, patterns, filenames, binaries, icase, cancel)
+        if cancel.is_set():
+          return None
+        if files is None:
+          raise dnfdragora.dnfd_client.DaemonError(
+            _("Files cannot be searched together with summaries, the file index is not available"))
+        found = set(packages)
+        return packages + [po for po in files if po not in found]
+
+      self._start_search(find, "%s in %s of %s packages" % (words, ", ".join(fields), filter))
+
+    def _wait_text_index(self, cancel):
+      '''text index, waited for if it is being built: search thread only. None if cancel is set'''
+      while not cancel.is_set():
+        index = self.text_index()
+        if index is not None:
+          return index
+        thread = self._text_index_thread
+        if thread is not None:
+          thread.join(0.5)
+      return None
+
+    def _wait_file_search(self, query, patterns, filenames, binaries, icase, cancel):
+      '''file_search, the file index being waited for if it is built: search thread only'''
+      files = self.file_search(query, patterns, filenames, binaries, icase)
+      while files is None and not cancel.is_set():
+        thread = self._file_index_thread
+        if thread is None or not thread.is_alive():
+          break
+        thread.join(0.5)
+        if not thread.is_alive():
+          files = self.file_search(query, patterns, filenames, binaries, icase)
+      return files
+
+    def _cache_versions(self):
+        return tuple(self.cache.version(scope) for scope in dnfdragora.package_query.SCOPES)
+
+    def _cached_packages(self):
+        return [po for scope in dnfdragora.package_query.SCOPES for po in self.cache.packages(scope)]
+
+    def build_text_index(self):
+        '''
+        Build in background the text index (see text_index.TextIndex) of the
+        cached packages, e.g. once they are all cached. Descriptions already
+        in the attribute store are indexed too.
+        '''
+        versions = self._cache_versions()
+        self._text_index_thread = threading.Thread(target=self._build_text_index,
+                                                   args=(versions, self._cached_packages()),
+                                                   name="TextIndex", daemon=True)
+        self._text_index_thread.start()
+
+    def _build_text_index(self, versions, packages):
+        descriptions = None
+        known = self.attribute_store.values('description')
+        if known:
+            descriptions = lambda po: known.get(dnfdragora.misc.full_nevra_key(po.full_nevra))
+        index = dnfdragora.text_index.TextIndex(packages, descriptions)
+        self._text_index = (versions, index)
+        logger.info("Text index built in %.3f seconds: %s", index.build_time, index.stats())
+
+    def text_index(self):
+        '''
+        TextIndex of the cached packages, None if the cache has changed since
+        the last one: a background build is started (see build_text_index)
+        unless one is running, the UI thread never waits for it
+        '''
+        index = self._text_index
+        if index is not None and index[0] == self._cache_versions():
+            return index[1]
+        thread = self._text_index_thread
+        if thread is None or not thread.is_alive():
+            self.build_text_index()
+        return None
+
+    def text_search(self, query, words, fields=('name', 'summary'), substring=False, icase=True, index=None):
+        '''
+        packages of query (see search_query) matching the words in the text
+        index (see TextIndex.search), best match first, the words are found
+        as they are in names or summaries unless icase. None if the text
+        index is being built, dnf5daemon must be asked.
+        '''
+        if index is None:
+            index = self.text_index()
+            if index is None:
+                return None
+        hits = index.search(words, fields, substring)
+        found = set(query.among(po for po, _ in hits))
+        packages = [po for po, _ in hits if po in found]
+        if not icase:
+            packages = [po for po in packages
+                        if all(w in po.name or w in (po.known_summary or '') for w in words)]
+        return packages
+
+    def name_search(self, query, patterns, icase=True, fuzzy=False):
+        '''
+        packages of query (see search_query) whose NEVRA matches one of the
+        glob patterns. If fuzzy is set and every pattern is a *word* glob of
+        a single index token (see text_index.is_token), the text index gives
+        the candidates, best match first. None if the text index is being
+        built, dnf5daemon must be asked.
+        '''
+        words = [pattern.strip('*') for pattern in patterns]
+        if fuzzy and all(dnfdragora.text_index.is_token(w, dnfdragora.text_index.TextIndex.MIN_SUBSTRING_LENGTH)
+                         for w in words):
+            packages = self.text_search(query, words, ('name',), substring=True)
+            if packages is None:
+                return None
+            # names are checked as *word* globs
+            if icase:
+                words = [w.lower() for w in words]
+                return [p for p in packages if all(w in p.name.lower() for w in words)]
+            return [p for p in packages if all(w in p.name for w in words)]
+        return query.name_glob(patterns, icase=icase, nevra=True).list()
+
+    def file_index_sources(self):
+        '''
+        sources of the file index (see FileIndex.update): the cached
+        filelists metadata of the enabled repositories and the rpmdb. None
+        if the index would be incomplete, a repository without cached
+        filelists (not downloaded by default) or no rpm python module, it is
+        not asked again by file searches until the repositories change (see
+        clear_cache). The enabled repositories are listed once per change.
+        '''
+        generation = self._file_index_generation
+        rpmdb = self.rpmdb_state()
+        if dnfdragora.file_index.rpm is None or rpmdb is None:
+            logger.info("rpm module or rpmdb not found, file searches are done by dnf5daemon")
+            self._file_index_unavailable = generation
+            return None
+        repos = self._file_index_repos
+        if repos is None:
+            repos = [repo['id'] for repo in self.GetRepositories(enable_disable='enabled', sync=True)]
+            if generation == self._file_index_generation:
+                self._file_index_repos = repos
+        sources = []
+        for repo_id in repos:
+            found = dnfdragora.comps_reader.find_repo_file(repo_id, dnfdragora.file_index.FILELISTS_TYPES)
+            if found is None:
+                logger.info("Filelists of repository %s not cached, file searches are done by dnf5daemon",
+                            repo_id)
+                self._file_index_unavailable = generation
+                return None
+            if found:
+                path, checksum = found
+                sources.append((repo_id, checksum,
+                                lambda path=path: dnfdragora.file_index.read_filelists(path)))
+        sources.append((dnfdragora.file_index.INSTALLED, rpmdb, dnfdragora.file_index.read_rpmdb))
+        return sources
+
+    def update_file_index(self, force=False):
+        '''
+        Update in background the file index, only if a file search has
+        already asked for it unless force. Only the segments of the sources
+        changed since the last update are built again.
+        '''
+        if not force and self._file_index_thread is None:
+            return
+        if self._file_index_thread is not None and self._file_index_thread.is_alive():
+            return
+        self._file_index_thread = threading.Thread(target=self._update_file_index, name="FileIndex", daemon=True)
+        self._file_index_thread.start()
+
+    def _update_file_index(self):
+        try:
+            sources = self.file_index_sources()
+            if sources is not None:
+                self.file_index.update(sources)
+        except Exception as e:
+            logger.error("Cannot update the file index: %s", e)
+
+    def file_search(self, query, patterns, filenames=True, binaries=False, icase=True):
+        '''
+        packages of query (see search_query) having a file matching one of
+        patterns in the file index (see FileIndex.search), sorted by name.
+        None if dnf5daemon must be asked: the index is not built yet (it is
+        then built in background, unless its sources were not available for
+        the same repositories) or cannot answer the patterns.
+        '''
+        if not self.file_index.ready:
+            if self._file_index_unavailable != self._file_index_generation:
+                self.update_file_index(force=True)
+            return None
+        names = self.file_index.search(patterns, filenames, binaries, icase)
+        if names is None:
+            return None
+        pkgs = []
+        for full_nevra in names:
+            po = self.cache.get_nevra(*dnfdragora.misc.parse_nevra(full_nevra))
+            if po is not None:
+                pkgs.append(po)
+        return sorted(query.among(pkgs), key=lambda po: (po.name, po.full_nevra))
 
 
     @ExceptionHandler
@@ -487,13 +1316,13 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
     @ExceptionHandler
     def get_groups(self):
         """Get groups/categories from dnf daemon backend if use comps or evaluated from packages otherwise"""
+        if not self._use_comps:
+            # the group index follows the package cache, no need to keep it
+            return self._get_groups_from_packages()
         if not self._group_cache :
-            if self._use_comps:
-                self._group_cache = []
-                rpm_comps =  self.GetGroups(sync=True)
-                self._group_cache = [gr[0] for gr in rpm_comps]
-            else :
-                self._group_cache = self._get_groups_from_packages()
+            self._group_cache = []
+            rpm_comps =  self.GetGroups(sync=True)
+            self._group_cache = [gr[0] for gr in rpm_comps]
 
         return self._group_cache
 
@@ -534,6 +1363,7 @@ class DnfRootBackend(dnfdragora.backend.Backend, dnfdragora.dnfd_client.Client):
             if len(groups) == 0:
                 groups = ['Uncategorized']
         else :
-            groups.append(pkg.group)
+            # as indexed, pkg.group would ask dnf5daemon if not cached
+            groups.append(dnfdragora.backend.package_group(pkg))
 
         return groups
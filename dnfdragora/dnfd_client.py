@@ -13,6 +13,8 @@ This module implements the interface to dnf5daemon dbus APIs
 
 import dbus
 import dbus.mainloop.glib
+import codecs
+import itertools
 import json # needed for list_fd
 import sys
 import re
@@ -21,11 +23,14 @@ import logging
 import threading
 import os
 import select
+import time
 import libdnf5
-import locale
-from queue import SimpleQueue, Empty
+from collections import deque
+from queue import Empty
 
 import dnfdragora.misc
+import dnfdragora.comps_reader
+from dnfdragora.comps_index import CompsIndex
 
 logger = logging.getLogger("dnfdaemon.client")
 
@@ -98,6 +103,321 @@ class DBus:
         )
 
 
+class JsonStreamDecoder:
+    '''Incremental decoder for the JSON object stream written by list_fd
+
+    dnf5daemon writes one JSON object per package into the pipe and the
+    reader gets them back in arbitrary 64 KiB slices.  Bytes go through an
+    incremental UTF-8 decoder, so a multi-byte sequence split between two
+    reads is kept until it is complete instead of being dropped.  Objects
+    are decoded in place by moving an offset over the text buffer; only the
+    unread tail (at most one partial object) is carried over when the next
+    chunk arrives, which keeps a whole listing linear in its size.
+    '''
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._parser = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+
+    @property
+    def pending(self):
+        '''number of characters received but not decoded yet'''
+        return len(self._buf) - self._pos
+
+    def feed(self, chunk):
+        '''
+        Add a chunk of bytes read from the pipe.
+        Returns the list of objects completed by this chunk.
+        '''
+        self._append(self._utf8.decode(chunk))
+        return self._decode_available()
+
+    def close(self):
+        '''
+        Flush the decoder at end of stream.
+        Returns the last completed objects, ValueError is raised if undecodable
+        trailing characters are left (a truncated stream), they are discarded.
+        '''
+        self._append(self._utf8.decode(b'', final=True))
+        items = self._decode_available()
+        pending = self.pending
+        self._buf = ""
+        self._pos = 0
+        if pending:
+            raise ValueError("list_fd: %d undecodable trailing characters, the stream is truncated" % pending)
+        return items
+
+    def _append(self, text):
+        if not text:
+            return
+        if self._pos:
+            self._buf = self._buf[self._pos:] + text
+            self._pos = 0
+        else:
+            self._buf += text
+
+    def _decode_available(self):
+        items = []
+        buf = self._buf
+        size = len(buf)
+        pos = self._WHITESPACE.match(buf, self._pos).end()
+        while pos < size:
+            try:
+                obj, pos = self._parser.raw_decode(buf, pos)
+            except json.decoder.JSONDecodeError:
+                # incomplete object, wait for more data
+                break
+            items.append(obj)
+            pos = self._WHITESPACE.match(buf, pos).end()
+        self._pos = pos
+        return items
+
+
+class RequestScheduler:
+    '''
+    Dispatch of the async D-Bus requests.
+
+    Every request gets an id. Read only requests (listing, advisories,
+    history, repo list...) may run together up to max_concurrent at a time,
+    any other request changes the session state (goal, transaction, repo
+    enable/disable, reset...) and runs alone. Requests that cannot start yet
+    are queued and started in submission order as running requests complete.
+    Control commands (see CONTROL_COMMANDS) are always started at once,
+    being needed while a transaction is in progress.
+    '''
+    READ_ONLY_COMMANDS = frozenset([
+        'GetPackages_fd', 'GetPackages', 'GetAttribute', 'GetAttributes', 'Search',
+        'GetRepositories', 'Advisories', 'HistoryRecentChanges', 'HistoryList',
+        'TransactionProblems', 'OfflineGetStatus', 'GetConfig',
+    ])
+    CONTROL_COMMANDS = frozenset(['ConfirmGPGImport', 'CancelTransaction'])
+
+    def __init__(self, max_concurrent=4, ids=None):
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        # schedulers of the same client share ids
+        self._ids = ids if ids is not None else itertools.count(1)
+        self._running = {}
+        self._queue = deque()
+
+    def is_read_only(self, cmd):
+        return cmd in self.READ_ONLY_COMMANDS
+
+    def submit(self, request, start, request_id=None):
+        '''
+        Add a request, a dict with at least 'cmd', start(request) is invoked
+        when the request can run, possibly from the thread completing the
+        previous one. request_id keeps the id of a request moved from
+        another scheduler.
+        Returns the request id, also stored into request['request_id'].
+        '''
+        with self._lock:
+            request['request_id'] = request_id if request_id is not None else next(self._ids)
+            if request['cmd'] in self.CONTROL_COMMANDS:
+                ready = [(request, start)]
+            else:
+                self._queue.append((request, start))
+                ready = self._admit()
+                if not ready:
+                    logger.debug("Request %d %s queued, running %s", request['request_id'],
+                                 request['cmd'], list(self.running()))
+        self._start(ready)
+        return request['request_id']
+
+    def done(self, request_id):
+        '''
+        Request request_id is completed, start the queued requests that can run now.
+        Unknown ids (control commands, requests dropped by reset) are ignored.
+        '''
+        with self._lock:
+            if self._running.pop(request_id, None) is None:
+                return
+            ready = self._admit()
+        self._start(ready)
+
+    def is_busy(self):
+        '''True if some request is running or waiting to run'''
+        with self._lock:
+            return bool(self._running or self._queue)
+
+    def running(self):
+        '''commands of the running requests'''
+        return [request['cmd'] for request in self._running.values()]
+
+    def reset(self, reason=""):
+        '''
+        Forget running and queued requests, their replies may never arrive
+        (e.g. the daemon session has been closed).
+        Returns the requests forgotten.
+        '''
+        with self._lock:
+            if self._running or self._queue:
+                logger.debug("Reset request scheduler (running %s, queued %d) reason=%s",
+                             self.running(), len(self._queue), reason)
+            dropped = list(self._running.values()) + [request for request, _ in self._queue]
+            self._running = {}
+            self._queue.clear()
+        return dropped
+
+    def _admit(self):
+        '''pop from the queue the requests that can run, lock must be held'''
+        ready = []
+        while self._queue:
+            request, start = self._queue[0]
+            if self.is_read_only(request['cmd']):
+                if len(self._running) >= self.max_concurrent or \
+                   any(not self.is_read_only(r['cmd']) for r in self._running.values()):
+                    break
+            elif self._running:
+                break
+            self._queue.popleft()
+            self._running[request['request_id']] = request
+            ready.append((request, start))
+        return ready
+
+    def _start(self, ready):
+        for request, start in ready:
+            logger.debug("Request %d %s started", request['request_id'], request['cmd'])
+            start(request)
+
+
+class CoalescingEventQueue:
+    '''
+    SimpleQueue replacement for Client.eventQueue merging progress signals.
+
+    A progress event (see COALESCE) replaces the value of the same progress
+    (same event, session and download id or nevra) still waiting in the
+    queue, so that the consumer gets the latest value once instead of every
+    signal. Any other event is a barrier: it keeps its position and progress
+    events put after it are never merged with the ones before it, so the
+    order of start, stop and error events is preserved.
+
+    wait() lets a consumer sleep until something is queued instead of
+    polling, and stats() reports how long events stayed in the queue.
+    '''
+    # progress event -> value field identifying the progress, or None
+    COALESCE = {
+        'OnDownloadProgress': 'download_id',
+        'OnTransactionActionProgress': 'nevra',
+        'OnTransactionElemProgress': None,
+        'OnTransactionVerifyProgress': None,
+        'OnTransactionTransactionProgress': None,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._queue = deque()
+        self._slots = {}
+        self.queued = 0
+        self.merged = 0
+        self.delivered = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _key(self, item):
+        event = item.get('event')
+        if event not in self.COALESCE:
+            return None
+        value = item.get('value')
+        if not isinstance(value, dict):
+            return None
+        field = self.COALESCE[event]
+        return (event, value.get('session_object_path'), value.get(field) if field else None)
+
+    def put(self, item, block=True, timeout=None):
+        key = self._key(item)
+        with self._lock:
+            self.queued += 1
+            if key is None:
+                # barrier, later progress events must not move before it
+                self._slots.clear()
+                self._queue.append([item, None, time.monotonic()])
+            else:
+                entry = self._slots.get(key)
+                if entry is not None:
+                    # latency is counted from the first merged value
+                    entry[0] = item
+                    self.merged += 1
+                    return
+                entry = [item, key, time.monotonic()]
+                self._slots[key] = entry
+                self._queue.append(entry)
+            self._not_empty.notify_all()
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self._lock:
+            if block and not self._queue:
+                self._not_empty.wait_for(lambda: self._queue, timeout)
+            if not self._queue:
+                raise Empty
+            entry = self._queue.popleft()
+            item, key, queued_at = entry
+            if key is not None and self._slots.get(key) is entry:
+                # delivered, next values of this progress are queued again
+                del self._slots[key]
+            self.delivered += 1
+            latency = time.monotonic() - queued_at
+            self._latency_total += latency
+            if latency > self._latency_max:
+                self._latency_max = latency
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def wait(self, timeout=None):
+        '''
+        Block until an event is queued or timeout (seconds) expires,
+        return True if the queue is not empty. Nothing is dequeued.
+        '''
+        with self._lock:
+            return bool(self._not_empty.wait_for(lambda: self._queue, timeout))
+
+    def empty(self):
+        with self._lock:
+            return not self._queue
+
+    def qsize(self):
+        with self._lock:
+            return len(self._queue)
+
+    def stats(self):
+        '''
+        counters: events put, merged into a queued one and delivered, average
+        and maximum time in ms between put and get of the delivered events
+        '''
+        with self._lock:
+            avg = self._latency_total / self.delivered if self.delivered else 0.0
+            return {'queued': self.queued, 'merged': self.merged, 'delivered': self.delivered,
+                    'latency_avg_ms': avg * 1000.0, 'latency_max_ms': self._latency_max * 1000.0}
+
+
+# package attributes needed to match GetAttributes replies with requests
+_NEVRA_ATTRS = ('name', 'epoch', 'version', 'release', 'arch')
+
+
+def _attributes_by_nevra(full_nevras, packages):
+    '''map GetAttributes list_fd packages to the requested full nevras'''
+    found = {}
+    for pkg in packages or []:
+        key = dnfdragora.misc.full_nevra_key("%s-%s:%s-%s.%s" % tuple(pkg.get(attr, '') for attr in _NEVRA_ATTRS))
+        # the same nevra can be listed as installed and available, keep the first one
+        found.setdefault(key, pkg)
+    result = {}
+    for full_nevra in full_nevras:
+        pkg = found.get(dnfdragora.misc.full_nevra_key(full_nevra))
+        if pkg is not None:
+            result[full_nevra] = pkg
+    return result
+
+
 class WeakMethod:
     ''' Helper class to work with a weakref class method '''
     def __init__(self, inst, method):
@@ -126,36 +446,257 @@ IFACE_GOAL = '{}.Goal'.format(DNFDAEMON_BUS_NAME)
 IFACE_OFFLINE = '{}.Offline'.format(DNFDAEMON_BUS_NAME)
 IFACE_ADVISORY = '{}.Advisory'.format(DNFDAEMON_BUS_NAME)
 IFACE_HISTORY = '{}.History'.format(DNFDAEMON_BUS_NAME)
+IFACE_INTROSPECTABLE = 'org.freedesktop.DBus.Introspectable'
 
 
-def unpack_dbus(data):
-    ''' convert dbus data types to python native data types '''
-    if (isinstance(data, dbus.String) or
-        isinstance(data, dbus.ObjectPath) or
-        isinstance(data, dbus.Signature)):
-        data = str(data)
+def _unpack_dbus_array(data):
+    '''
+    dbus.Array / dbus.Struct to list. Arrays are mostly homogeneous (array of
+    package dicts, of strings...), so the converter found for the first item
+    is reused as long as items have the same type.
+    '''
+    if not data:
+        return []
+    item_type = type(data[0])
+    convert = _UNPACK_DISPATCH.get(item_type) or _unpack_dbus_fallback
+    if convert is _unpack_dbus_dict:
+        # array of dictionaries (package lists, history transactions...)
+        return [_unpack_dbus_dict(value) if type(value) is item_type else unpack_dbus(value)
+                for value in data]
+    return [convert(value) if type(value) is item_type else unpack_dbus(value)
+            for value in data]
+
+
+def _unpack_dbus_dict(data):
+    ''' dbus.Dictionary to dict, keys are almost always dbus.String '''
+    dispatch = _UNPACK_DISPATCH
+    new_data = {}
+    for key, value in data.items():
+        convert = dispatch.get(type(key)) or _unpack_dbus_fallback
+        key = convert(key)
+        convert = dispatch.get(type(value)) or _unpack_dbus_fallback
+        new_data[key] = convert(value)
+    return new_data
+
+
+def _identity(data):
+    return data
+
+
+def _unpack_dbus_fallback(data):
+    '''
+    convert a type missing in _UNPACK_DISPATCH (subclasses of the dbus types)
+    the converter found is remembered for the next values of the same type
+    '''
+    if isinstance(data, (dbus.String, dbus.ObjectPath, dbus.Signature)):
+        convert = str
     elif isinstance(data, dbus.Boolean):
-        data = bool(data)
-    elif (isinstance(data, dbus.Int64) or
-          isinstance(data, dbus.UInt64) or
-          isinstance(data, dbus.Int32) or
-          isinstance(data, dbus.UInt32) or
-          isinstance(data, dbus.Int16) or
-          isinstance(data, dbus.UInt16) or
-          isinstance(data, dbus.Byte)):
-        data = int(data)
+        convert = bool
+    elif isinstance(data, (dbus.Int64, dbus.UInt64, dbus.Int32, dbus.UInt32,
+                           dbus.Int16, dbus.UInt16, dbus.Byte)):
+        convert = int
     elif isinstance(data, dbus.Double):
-        data = float(data)
-    elif isinstance(data, dbus.Array):
-        data = [unpack_dbus(value) for value in data]
-    elif isinstance(data, dbus.Struct):
-        data = [unpack_dbus(value) for value in data]
+        convert = float
+    elif isinstance(data, (dbus.Array, dbus.Struct)):
+        convert = _unpack_dbus_array
     elif isinstance(data, dbus.Dictionary):
-        new_data = dict()
-        for key in data.keys():
-            new_data[unpack_dbus(key)] = unpack_dbus(data[key])
-        data = new_data
-    return data
+        convert = _unpack_dbus_dict
+    else:
+        convert = _identity
+    _UNPACK_DISPATCH[type(data)] = convert
+    return convert(data)
+
+
+# exact type -> converter, native python values are returned as they are
+_UNPACK_DISPATCH = {
+    str: _identity, int: _identity, float: _identity, bool: _identity,
+    type(None): _identity, list: _identity, tuple: _identity, dict: _identity,
+}
+_UNPACK_DISPATCH.update({
+    dbus.String: str, dbus.ObjectPath: str, dbus.Signature: str,
+    dbus.Boolean: bool,
+    dbus.Int64: int, dbus.UInt64: int, dbus.Int32: int, dbus.UInt32: int,
+    dbus.Int16: int, dbus.UInt16: int, dbus.Byte: int,
+    dbus.Double: float,
+    dbus.Array: _unpack_dbus_array, dbus.Struct: _unpack_dbus_array,
+    dbus.Dictionary: _unpack_dbus_dict,
+})
+
+
+def unpack_dbus(data):
+    ''' convert dbus data types to python native data types '''
+    convert = _UNPACK_DISPATCH.get(type(data)) or _unpack_dbus_fallback
+    return convert(data)
+
+
+class PooledSession:
+    ''' A read only dnf5daemon session of a SessionPool '''
+    def __init__(self, bus, path, generation):
+        self.bus = bus
+        self.path = path
+        self.generation = generation
+        self.last_used = time.monotonic()
+        self.suspect = False
+        self._interfaces = {}
+
+    def interface(self, name):
+        ''' D-Bus interface name of this session, proxies are created once '''
+        iface = self._interfaces.get(name)
+        if iface is None:
+            iface = dbus.Interface(self.bus.get_object(DNFDAEMON_BUS_NAME, self.path), dbus_interface=name)
+            self._interfaces[name] = iface
+        return iface
+
+    def is_alive(self):
+        ''' health check, the session object must still be exported by the daemon '''
+        try:
+            self.interface(IFACE_INTROSPECTABLE).Introspect(timeout=10)
+            return True
+        except Exception as err:
+            logger.warning("Pooled session %s failed health check: %s", self.path, err)
+            return False
+
+
+class SessionPool:
+    '''
+    Pool of read only dnf5daemon sessions.
+
+    Queries in COMMAND_INTERFACES (search, attributes, advisories, history,
+    repo list) are run on these sessions, so that they do not wait for the
+    main session while it resolves or runs a transaction or reloads metadata.
+    Sessions are opened on demand up to size, with the options of the main
+    session, and checked before reuse when they were idle for more than
+    HEALTH_CHECK_INTERVAL seconds. recycle() retires all of them, e.g. when
+    the repository or rpmdb state they loaded is outdated.
+    '''
+    COMMAND_INTERFACES = {
+        'Search': IFACE_RPM,
+        'GetAttribute': IFACE_RPM,
+        'GetAttributes': IFACE_RPM,
+        'GetRepositories': IFACE_REPO,
+        'Advisories': IFACE_ADVISORY,
+        'HistoryRecentChanges': IFACE_HISTORY,
+        'HistoryList': IFACE_HISTORY,
+    }
+    # commands changing what sessions have loaded
+    RECYCLE_COMMANDS = frozenset([
+        'ResetSession', 'ReloadMetadata', 'CleanCache',
+        'SetEnabledRepos', 'SetDisabledRepos', 'RunTransaction',
+    ])
+    HEALTH_CHECK_INTERVAL = 30
+
+    def __init__(self, bus, size=2):
+        self.bus = bus
+        self.size = size
+        self.session_options = {}
+        self._lock = threading.Lock()
+        self._manager = None
+        self._idle = []
+        self._busy = set()
+        # sessions being opened, they count as busy
+        self._opening = 0
+        self._generation = 0
+
+    def is_pooled(self, cmd):
+        return self.size > 0 and cmd in self.COMMAND_INTERFACES
+
+    def acquire(self):
+        '''
+        Return an idle session, opening one if needed, or None if the pool
+        is exhausted or sessions cannot be opened. Health checks and D-Bus
+        calls are made without the lock, not to stall the other requests.
+        '''
+        while True:
+            with self._lock:
+                if self._idle:
+                    session = self._idle.pop()
+                    self._busy.add(session)
+                elif len(self._busy) + self._opening >= self.size:
+                    return None
+                else:
+                    session = None
+                    self._opening += 1
+                    options = self.session_options
+                    generation = self._generation
+            if session is None:
+                return self._open(options, generation)
+            if session.suspect or time.monotonic() - session.last_used > self.HEALTH_CHECK_INTERVAL:
+                if not session.is_alive():
+                    with self._lock:
+                        self._busy.discard(session)
+                    self._close(session)
+                    continue
+                session.suspect = False
+            return session
+
+    def _open(self, options, generation):
+        ''' open a session for acquire(), a slot is reserved in _opening '''
+        session = None
+        try:
+            manager = self._manager
+            if manager is None:
+                manager = dbus.Interface(
+                    self.bus.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
+                    dbus_interface=IFACE_SESSION_MANAGER)
+                self._manager = manager
+            path = manager.open_session(options)
+            logger.debug("Opened pooled read only session %s", path)
+            # recycled while opening, the session is closed once released
+            session = PooledSession(self.bus, path, generation)
+        except Exception as err:
+            logger.error("Cannot open a pooled read only session: %s", err)
+        with self._lock:
+            self._opening -= 1
+            if session is not None:
+                self._busy.add(session)
+        return session
+
+    def release(self, session, failed=False):
+        '''
+        Give back a session got by acquire(), failed marks it to be checked
+        before being used again.
+        '''
+        with self._lock:
+            self._busy.discard(session)
+            if session.generation == self._generation:
+                session.suspect = session.suspect or failed
+                session.last_used = time.monotonic()
+                self._idle.append(session)
+                return
+        self._close(session)
+
+    def recycle(self, session_options=None):
+        '''
+        Retire all the sessions, idle ones are closed now and busy ones when
+        released. New sessions are opened with session_options if given.
+        '''
+        with self._lock:
+            if session_options is not None:
+                self.session_options = session_options
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._close(session)
+
+    def close(self):
+        ''' Close all the sessions, running queries on them are aborted '''
+        with self._lock:
+            self._generation += 1
+            sessions = self._idle + list(self._busy)
+            self._idle = []
+            self._busy = set()
+        for session in sessions:
+            self._close(session)
+        self._manager = None
+
+    def _close(self, session):
+        ''' close session, called without the lock '''
+        try:
+            if self._manager is not None:
+                self._manager.close_session(session.path)
+                logger.debug("Closed pooled read only session %s", session.path)
+        except Exception as err:
+            logger.warning("Cannot close pooled session %s: %s", session.path, err)
 
 #
 # Main Client Class
@@ -189,23 +730,39 @@ class Client:
         self.iface_base_signalhandler_maches = None
         self.iface_rpm_signalhandler_maches = None
 
-        # Async request guard
-        self._async_lock = threading.Lock()
-        self._sent = False
-        self._data = {'cmd': None}
-        self.eventQueue = SimpleQueue()
-        self.__async_thread = None
+        # Async requests dispatch, read only requests may overlap. Queries run on
+        # the read only session pool have their own lane, not to wait for the
+        # main session (see SessionPool)
+        self._session_pool = SessionPool(self.bus)
+        request_ids = itertools.count(1)
+        self._scheduler = RequestScheduler(ids=request_ids)
+        self._pool_scheduler = RequestScheduler(max_concurrent=self._session_pool.size, ids=request_ids)
+        self.eventQueue = CoalescingEventQueue()
+        # list_fd reader threads of the async requests in progress, by request id
+        self.__async_threads = {}
+        self.__async_threads_lock = threading.Lock()
+
+        # Progressive list_fd delivery: a partial batch is posted every
+        # list_fd_batch_size objects or list_fd_batch_interval seconds
+        self.list_fd_batch_size = 500
+        self.list_fd_batch_interval = 0.25
 
         # 300 secs, e.g. 5 minutes without receiving anything during a transaction
         # kernel postscriptlet execution can take a long time, so we need a long timeout here to avoid false positives.
         self.__TransactionTimer = dnfdragora.misc.TimerEvent(300, self.on_TransactionTimeoutEvent)
         self.__TransactionTimer.AutoRpeat = False
 
-        # Shared libdnf5 Base used by comps queries to avoid repeated repo metadata loading.
+        # Shared comps index used by comps queries to avoid repeated repo metadata loading.
         # Initialised BEFORE _get_daemon() so that __del__ -> unloadDaemon() ->
         # _invalidate_comps_base() never raises AttributeError if _get_daemon() fails.
-        self._comps_base = None
+        self._comps_index = None
         self._comps_base_lock = threading.RLock()
+        # bumped by _invalidate_comps_base, an index built meanwhile is dropped
+        self._comps_generation = 0
+        self._comps_building = None   # threading.Event set when the running build ends
+        self.comps_source = None      # where the comps index has been read from
+        self.comps_build_time = None  # seconds spent building the last comps index
+        self.comps_wait_time = 0.0    # seconds callers have been blocked waiting for it
 
         self._get_daemon()
 
@@ -218,6 +775,7 @@ class Client:
           'GetPackages_fd'      : 'list_fd',
           'GetPackages'         : 'list', #WARNING list often hangs for big data through dbus, use list_fd
           'GetAttribute'        : 'list',
+          'GetAttributes'       : 'list_fd',
           'Search'              : 'list',
           'Install'             : 'install',
           'Remove'              : 'remove',
@@ -268,6 +826,8 @@ class Client:
                 dbus_interface=IFACE_SESSION_MANAGER)
             self.session_path = self.iface_session.open_session(session_options)
             logger.debug(f"Open Dnf5Daemon session: {self.session_path}")
+            # read only sessions are opened with the same options
+            self._session_pool.recycle(session_options)
 
             self.iface_base = dbus.Interface(
                 self.bus.get_object(DNFDAEMON_BUS_NAME, self.session_path),
@@ -385,22 +945,32 @@ class Client:
             logger.critical("", exc_info=(exc_type, exc_value, exc_traceback))
 
     def _reset_async_request_guard(self, reason=""):
-        '''Reset single-flight async command guard state.
+        '''Forget running and queued async requests.
 
         This is required when reloading/unloading daemon sessions because
         pending callbacks from the old session may never arrive.
         '''
-        with self._async_lock:
-            if self._sent:
-                logger.debug("Reset async guard (previous cmd=%s) reason=%s", self._data.get('cmd'), reason)
-            self._sent = False
-            self._data = {'cmd': None}
+        dropped = self._scheduler.reset(reason) + self._pool_scheduler.reset(reason)
+        for data in dropped:
+            # a waiting thread (see _run_dbus_waited) gets no reply
+            callback = data.get('callback')
+            if callback is not None:
+                callback({'result': None, 'error': DaemonError(f"{data['cmd']} request dropped ({reason})")})
+
+    def is_busy(self):
+        '''True if some async request is running or waiting to run on the main session'''
+        return self._scheduler.is_busy()
+
+    def has_pending_requests(self):
+        '''True if a reply is expected, from the main session or a pooled one'''
+        return self._scheduler.is_busy() or self._pool_scheduler.is_busy()
 
     def unloadDaemon(self):
         '''Close the D-Bus connection and disconnect signals.'''
         logger.debug(f"Unloading Dnf5Daemon session: {self.session_path if self.session_path else 'None'}...")
         self._invalidate_comps_base()
         self._reset_async_request_guard("unloadDaemon")
+        self._session_pool.close()
         if self.session_path:
             try:
                 # Disconnect all signals
@@ -477,14 +1047,7 @@ class Client:
     #def _return_handler(self, obj, result, user_data):
     def _return_handler(self, result, user_data):
         '''Async DBus call, return handler '''
-        logger.debug("return_handler %s", user_data['cmd'])
-        # clear sent flag under lock to avoid races with the async thread loop
-        try:
-            with self._async_lock:
-                self._sent = False
-        except Exception:
-            # fallback if lock missing for any reason
-            self._sent = False
+        logger.debug("return_handler %s (request %s)", user_data['cmd'], user_data.get('request_id'))
         if isinstance(result, Exception):
             # print(result)
             user_data['result'] = None
@@ -495,9 +1058,33 @@ class Client:
         #user_data['main_loop'].quit()
 
         response = self._get_result(user_data)
-        self.eventQueue.put({'event': user_data['cmd'], 'value': response})        
+        if 'batch' in user_data:
+            # last batch of a progressive list_fd request
+            response['batch'] = user_data['batch']
+            response['complete'] = True
+        # release the request before posting its result, so that the event
+        # consumer sees the client idle if nothing else is pending
+        self._release_request(user_data, failed=isinstance(result, Exception))
+        callback = user_data.get('callback')
+        if callback is not None:
+            callback(response)
+        else:
+            self.eventQueue.put({'event': user_data['cmd'], 'value': response,
+                                 'request_id': user_data['request_id']})
         logger.debug("Quit return_handler error %s", user_data['error'])
 
+    def _post_batch(self, user_data, items, batch):
+        '''Post a partial list_fd result, the request is still in progress'''
+        logger.debug("post_batch %s batch %d (%d items)", user_data['cmd'], batch, len(items))
+        response = {
+            'result': items,
+            'error': None,
+            'batch': batch,
+            'complete': False,
+        }
+        self.eventQueue.put({'event': user_data['cmd'], 'value': response,
+                             'request_id': user_data['request_id']})
+
 
 
     def _get_result(self, user_data):
@@ -526,37 +1113,112 @@ class Client:
               # args is a tuple (options_dict,); options_dict['package_attrs'] holds the requested attr name
               attr = user_data["args"][0]["package_attrs"][0]
               result['result'] = user_data['result'][0][attr] if result['result'] else None
+          elif user_data['cmd'] == 'GetAttributes':
+            result['result'] = _attributes_by_nevra(user_data["args"][0]["patterns"], user_data['result'])
 
           else:
             pass
 
         return result
 
-    def _run_dbus_async(self, cmd, return_value, *args, timeout=_DBUS_TIMEOUT_DEFAULT):
+    def _run_dbus_async(self, cmd, return_value, *args, timeout=_DBUS_TIMEOUT_DEFAULT, progressive=False,
+                        callback=None):
         '''Make an async call to a DBus method in the dnf5daemon service
 
         cmd: method to run
         timeout: D-Bus reply timeout in seconds (default _DBUS_TIMEOUT_DEFAULT).
                  Use _DBUS_TIMEOUT_INFINITE for long-running commands like RunTransaction.
-        '''
-        # Single outstanding async request enforced with a lock
-        with self._async_lock:
-            if self._sent:
-                logger.warning("run_dbus_async %s, previous command %s in progress", cmd, self._data.get('cmd'))
-                result = {
-                    'result': False,
-                    'error': _("Command in progress"),
-                }
-                self.eventQueue.put({'event': cmd, 'value': result})
-                logger.debug("Command %s executed (rejected), result %s ", cmd, result)
-                return
-            self._sent = True
-            logger.debug("run_dbus_async %s (return=%d) args: (%s)", cmd, return_value, repr(args) if args else "")
-            self._data = {'cmd': cmd, 'return_value': return_value, 'args': args}
-            data = self._data
+        progressive: list_fd commands only, post results in batches (see _post_batch)
+                 instead of a single event once the pipe is drained.
+        callback: called with the result value ('result' and 'error') instead
+                 of posting the result event, possibly from another thread.
+
+        The request is queued if it cannot run yet (see RequestScheduler), its
+        result event carries the returned request id.
+        '''
+        logger.debug("run_dbus_async %s (return=%s) args: (%s)", cmd, return_value, repr(args) if args else "")
+        data = {
+            'cmd': cmd,
+            'return_value': return_value,
+            'args': args,
+            'timeout': timeout,
+            'progressive': progressive,
+        }
+        if callback is not None:
+            data['callback'] = callback
+        scheduler = self._pool_scheduler if self._session_pool.is_pooled(cmd) else self._scheduler
+        data['scheduler'] = scheduler
+        return scheduler.submit(data, self._dispatch_async)
+
+    def _run_dbus_waited(self, cmd, *args, timeout=_DBUS_TIMEOUT_DEFAULT):
+        '''Make an async call, scheduled as the UI requests are, and wait for its result
+
+        For worker threads only: unlike _run_dbus_sync the request does not
+        overlap the exclusive requests of the main session, and a pooled
+        session is used when there is one. DaemonError is raised if the
+        request fails, is dropped (see _reset_async_request_guard) or gets
+        no reply within timeout.
+        '''
+        response = {}
+        done = threading.Event()
+
+        def on_result(value):
+            if not done.is_set():
+                response.update(value)
+                done.set()
+
+        self._run_dbus_async(cmd, True, *args, timeout=timeout, callback=on_result)
+        if not done.wait(timeout):
+            raise DaemonError(f"{cmd}: no reply in {timeout} seconds")
+        error = response['error']
+        if error is not None:
+            raise error if isinstance(error, DaemonError) else DaemonError(str(error))
+        return response['result']
+
+    def _request_proxy(self, data):
+        '''
+        proxy for data['cmd'], requests of the pool scheduler get a pooled
+        session (stored into data['session']), None if none is available
+        '''
+        cmd = data['cmd']
+        if data['scheduler'] is self._pool_scheduler:
+            session = self._session_pool.acquire()
+            if session is None:
+                return None
+            data['session'] = session
+            return session.interface(SessionPool.COMMAND_INTERFACES[cmd])
+        return self.Proxy(cmd)
+
+    def _release_request(self, data, failed=False):
+        '''
+        the async request data is completed, release its session and
+        let the scheduler start the next ones
+        '''
+        session = data.pop('session', None)
+        if session is not None:
+            self._session_pool.release(session, failed)
+        if data['cmd'] in SessionPool.RECYCLE_COMMANDS:
+            self._session_pool.recycle()
+        data['scheduler'].done(data['request_id'])
+
+    def _dispatch_async(self, data):
+        '''Issue the D-Bus call of a request accepted by the scheduler'''
+        cmd = data['cmd']
+        return_value = data['return_value']
+        args = data['args']
+        timeout = data['timeout']
+        progressive = data['progressive']
 
         # Resolve proxy and method
-        proxy = self.Proxy(cmd)
+        proxy = self._request_proxy(data)
+        if proxy is None and data['scheduler'] is self._pool_scheduler:
+            # no pooled session, the request runs on the main session and
+            # must not overlap its exclusive requests
+            logger.debug("No pooled session available for %s, queued for the main session", cmd)
+            data['scheduler'] = self._scheduler
+            self._pool_scheduler.done(data['request_id'])
+            self._scheduler.submit(data, self._dispatch_async, request_id=data['request_id'])
+            return
         if proxy is None:
             err = DaemonError(f"No proxy available for command {cmd}")
             self._return_handler(err, data)
@@ -578,7 +1240,7 @@ class Client:
         # Handlers
         def on_error(error):
             logger.error("run_dbus_async error for command %s: %s", cmd, error)
-            # Route via _return_handler so _sent is cleared and UI notified (when applicable)
+            # Route via _return_handler so the request is released and UI notified (when applicable)
             if isinstance(error, Exception):
                 self._return_handler(error, data)
             else:
@@ -594,16 +1256,30 @@ class Client:
                     self._return_handler(e, data)
                     return
 
-                parser = json.JSONDecoder()
-                state = {'buf': "", 'items': []}
+                decoder = JsonStreamDecoder()
+                state = {'items': [], 'flushed': time.monotonic()}
                 _done = [False]  # one-shot guard: first caller wins, prevents double delivery
+                if progressive:
+                    data['batch'] = 0
 
                 def _finish_with(value):
                     if not _done[0]:
                         _done[0] = True
-                        # _return_handler is thread-safe (SimpleQueue + Lock); no GLib.idle_add needed
+                        # _return_handler is thread-safe (event queue + scheduler locks); no GLib.idle_add needed
                         self._return_handler(value, data)
 
+                def _add_items(items):
+                    state['items'].extend(items)
+                    if not progressive or not state['items'] or _done[0]:
+                        return
+                    now = time.monotonic()
+                    if len(state['items']) >= self.list_fd_batch_size or \
+                       now - state['flushed'] >= self.list_fd_batch_interval:
+                        self._post_batch(data, state['items'], data['batch'])
+                        data['batch'] += 1
+                        state['items'] = []
+                        state['flushed'] = now
+
                 def _reader_loop(fd):
                     timeout = 1000
                     buffer_size = 65536
@@ -616,22 +1292,17 @@ class Client:
                                 # keep waiting; server may still stream
                                 continue
                             for descriptor, event in polled:
+                                if event & (select.POLLERR | select.POLLNVAL):
+                                    raise DaemonError("list_fd: error on the pipe, listing incomplete")
                                 if event & select.POLLIN:
                                     chunk = os.read(descriptor, buffer_size)
                                     if not chunk:
+                                        state['items'].extend(decoder.close())
                                         _finish_with(state['items'])
                                         return
-                                    buffer = chunk.decode(errors='ignore')
-                                    if buffer:
-                                        state['buf'] += buffer
-                                        while state['buf']:
-                                            try:
-                                                obj, end = parser.raw_decode(state['buf'])
-                                                state['items'].append(obj)
-                                                state['buf'] = state['buf'][end:].lstrip()
-                                            except json.decoder.JSONDecodeError:
-                                                break
+                                    _add_items(decoder.feed(chunk))
                                 if event & select.POLLHUP:
+                                    state['items'].extend(decoder.close())
                                     _finish_with(state['items'])
                                     return
                     except Exception as ex:
@@ -642,6 +1313,8 @@ class Client:
                             os.close(fd)
                         except Exception:
                             pass
+                        with self.__async_threads_lock:
+                            self.__async_threads.pop(data['request_id'], None)
 
                 # 1. Schedule the D-Bus call; pass pipe_w FD to the daemon.
                 #    error_handler uses _finish_with so the _done guard prevents
@@ -675,8 +1348,10 @@ class Client:
                 #    be running in GUI mode (QT/GTK). The thread-based reader with
                 #    select.poll() works reliably in all scenarios.
                 logger.debug("list_fd: using thread reader for pipe_r=%d", pipe_r)
-                self.__async_thread = threading.Thread(target=_reader_loop, args=(pipe_r,), daemon=True)
-                self.__async_thread.start()
+                reader = threading.Thread(target=_reader_loop, args=(pipe_r,), daemon=True)
+                with self.__async_threads_lock:
+                    self.__async_threads[data['request_id']] = reader
+                reader.start()
 
             else:
                 # Regular async method with return value
@@ -685,8 +1360,8 @@ class Client:
                     if len(result) == 0:
                         # Method has no output args (e.g. Repo.enable / Repo.disable):
                         # call _return_handler with True so the event is queued and
-                        # _sent is cleared.  Without this branch _sent stayed True
-                        # forever and ui.py never received the SetEnabledRepos event.
+                        # the request released.  Without this branch the request never
+                        # completed and ui.py never received the SetEnabledRepos event.
                         self._return_handler(True, data)
                     elif len(result) == 1:
                         self._return_handler(unpack_dbus(result[0]), data)
@@ -694,12 +1369,8 @@ class Client:
                         self._return_handler((unpack_dbus(result[0]), unpack_dbus(result[1])), data)
                     elif len(result) > 2:
                         logger.error("run_dbus_async: some return values are not managed")
-                        # since return_handler is not invoked we need to clear _sent here
-                        try:
-                            with self._async_lock:
-                                self._sent = False
-                        except Exception:
-                            self._sent = False
+                        # since return_handler is not invoked we need to release the request here
+                        self._release_request(data)
 
                 try:
                     func(*args, reply_handler=on_success, error_handler=on_error, timeout=timeout)
@@ -707,26 +1378,40 @@ class Client:
                     self._return_handler(e, data)
                     return
         else:
-            # Fire-and-forget: clear _sent when the daemon acks; results will arrive as signals
+            # Fire-and-forget: release the request when the daemon acks; results will arrive as signals
             def on_success_novalue():
                 logger.debug("run_dbus_async.on_success_novalue %s", cmd)
-                try:
-                    with self._async_lock:
-                        self._sent = False
-                except Exception:
-                    self._sent = False
+                self._release_request(data)
 
             try:
                 func(*args, reply_handler=on_success_novalue, error_handler=on_error, timeout=timeout)
             except Exception as e:
-                # Route via _return_handler so _sent is cleared and UI handles error
+                # Route via _return_handler so the request is released and UI handles error
                 self._return_handler(e, data)
                 return
 
     def _run_dbus_sync(self, cmd, *args):
         '''Make a sync call to a DBus method in the dnf5daemon service'''
         logger.debug("_run_dbus_sync %s - args: (%s)", cmd, repr(args) if args else "")
-        proxy = self.Proxy(cmd)
+        session = self._session_pool.acquire() if self._session_pool.is_pooled(cmd) else None
+        if session is not None:
+            proxy = session.interface(SessionPool.COMMAND_INTERFACES[cmd])
+        else:
+            proxy = self.Proxy(cmd)
+        failed = False
+        try:
+            return self._call_dbus_sync(proxy, cmd, *args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if session is not None:
+                self._session_pool.release(session, failed)
+            if cmd in SessionPool.RECYCLE_COMMANDS:
+                self._session_pool.recycle()
+
+    def _call_dbus_sync(self, proxy, cmd, *args):
+        '''D-Bus call of _run_dbus_sync on the given proxy'''
         if proxy is None:
             raise DaemonError(f"No proxy available for command {cmd}")
 
@@ -751,36 +1436,30 @@ class Client:
                 buffer_size = 65536
                 poller = select.poll()
                 poller.register(pipe_r, select.POLLIN | select.POLLHUP)
-                parser = json.JSONDecoder()
-                to_parse = ""
+                decoder = JsonStreamDecoder()
                 items = []
                 read_finished = False
 
                 while not read_finished:
                     events = poller.poll(timeout)
                     if not events:
-                        logger.warning("_run_dbus_sync(list_fd): timeout reached while reading from pipe.")
-                        break
+                        raise DaemonError(f"{cmd}: no data for {timeout // 1000} seconds, listing incomplete")
                     for fd, ev in events:
+                        if ev & (select.POLLERR | select.POLLNVAL):
+                            raise DaemonError(f"{cmd}: error on the pipe, listing incomplete")
                         if ev & select.POLLIN:
                             chunk = os.read(fd, buffer_size)
                             if not chunk:
                                 read_finished = True
                                 break
-                            buf = chunk.decode(errors='ignore')
-                            if buf:
-                                to_parse += buf
-                                while to_parse:
-                                    try:
-                                        obj, end = parser.raw_decode(to_parse)
-                                        items.append(obj)
-                                        to_parse = to_parse[end:].lstrip()
-                                    except json.decoder.JSONDecodeError:
-                                        # wait for more data
-                                        break
+                            items.extend(decoder.feed(chunk))
                         if ev & select.POLLHUP:
                             read_finished = True
                             break
+                try:
+                    items.extend(decoder.close())
+                except ValueError as e:
+                    raise DaemonError(f"{cmd}: {e}")
                 return items
             finally:
                 # ensure both ends are closed
@@ -798,11 +1477,14 @@ class Client:
 
     def waitForLastAsyncRequestTermination(self):
       '''
-      join async thread
+      join the list_fd reader threads of the async requests in progress
       '''
-      if self.__async_thread and self.__async_thread.is_alive():
+      with self.__async_threads_lock:
+          readers = list(self.__async_threads.values())
+      deadline = time.monotonic() + 10
+      for reader in readers:
           try:
-              self.__async_thread.join(timeout=10)
+              reader.join(timeout=max(0, deadline - time.monotonic()))
           except Exception:
               pass
 #
@@ -958,6 +1640,7 @@ class Client:
                 @success: true if the rpm transaction was completed successfully
         '''
         logger.debug("on_TransactionAfterComplete (%s)", "success" if success else "failed")
+        logger.debug("Event queue counters: %s", self.eventQueue.stats())
         # Transaction is finished stop the timer
         self.__TransactionTimer.cancel()
         self.eventQueue.put({'event': 'OnTransactionAfterComplete',
@@ -1227,40 +1910,119 @@ class Client:
 # Calls to libdnf5
 #
     def _invalidate_comps_base(self):
-        '''Drop cached libdnf5 Base used by comps queries.'''
+        '''Drop the comps data (CompsIndex) used by comps queries.'''
         with self._comps_base_lock:
-            if self._comps_base is not None:
-                logger.debug("Invalidating cached comps base")
-            self._comps_base = None
+            if self._comps_index is not None:
+                logger.debug("Invalidating cached comps index")
+            self._comps_index = None
+            self._comps_generation += 1
 
-    def _get_comps_base(self):
-        '''Return a shared, lazily initialized libdnf5 Base configured for comps metadata.'''
+    def prewarm_comps_base(self):
+        '''
+        Build the comps index on a worker thread, so that the first comps
+        query (GetGroups at startup) does not freeze the UI reading the
+        comps of every enabled repository. Callers needing it before it is
+        ready wait for the build in progress (see _get_comps_index).
+        '''
+        def _prewarm():
+            try:
+                self._get_comps_index()
+            except Exception as error:
+                logger.warning("Comps pre-warming failed: %s", error)
+
+        threading.Thread(target=_prewarm, name='comps-prewarm', daemon=True).start()
+
+    def comps_base_stats(self):
+        '''
+        ready: comps index available, source: 'comps.xml' or 'libdnf5',
+        build_time: seconds spent building it, wait_time: seconds comps
+        queries have been blocked waiting for it
+        '''
         with self._comps_base_lock:
-            if self._comps_base is not None:
-                return self._comps_base
-
-            logger.debug("Initializing shared comps base")
-            base = libdnf5.base.Base()
-            base.load_config()
-            config = base.get_config()
-
-            types_config = config.get_optional_metadata_types_option()
-            types_config.add(libdnf5.conf.Option.Priority_RUNTIME, (libdnf5.conf.METADATA_TYPE_COMPS))
-
-            base.setup()
-
-            repo_sack = base.get_repo_sack()
-            repo_sack.create_repos_from_system_configuration()
-            # load_repos(Type_AVAILABLE) is the non-deprecated replacement for
-            # update_and_load_enabled_repos(True) introduced in libdnf5 ≥ 5.2.
-            # Fall back to the old API on older installations.
-            if hasattr(repo_sack, 'load_repos'):
-                repo_sack.load_repos(libdnf5.repo.Repo.Type_AVAILABLE)
-            else:
-                repo_sack.update_and_load_enabled_repos(True)
+            return {'ready': self._comps_index is not None,
+                    'source': self.comps_source,
+                    'build_time': self.comps_build_time,
+                    'wait_time': self.comps_wait_time}
+
+    def _get_comps_index(self):
+        '''
+        Return the shared CompsIndex, lazily built. It is built out of the
+        lock, a caller finding a build in progress waits for it, an index
+        invalidated while being built is not kept.
+        '''
+        while True:
+            with self._comps_base_lock:
+                if self._comps_index is not None:
+                    return self._comps_index
+                building = self._comps_building
+                if building is None:
+                    building = self._comps_building = threading.Event()
+                    generation = self._comps_generation
+                    break
+            start = time.monotonic()
+            building.wait()
+            with self._comps_base_lock:
+                self.comps_wait_time += time.monotonic() - start
+            logger.debug("Waited %.3f seconds for the comps index", time.monotonic() - start)
+
+        start = time.monotonic()
+        index = None
+        try:
+            index, source = self._build_comps_index()
+        finally:
+            build_time = time.monotonic() - start
+            with self._comps_base_lock:
+                self._comps_building = None
+                if index is not None and generation == self._comps_generation:
+                    self._comps_index = index
+                    self.comps_source = source
+                    self.comps_build_time = build_time
+                    logger.info("Comps index of %d groups ready in %.3f seconds (%s)",
+                                len(index), build_time, source)
+                elif index is not None:
+                    logger.info("Comps index built in %.3f seconds but invalidated meanwhile", build_time)
+            building.set()
+        return index
+
+    def _build_comps_index(self):
+        '''
+        Return (CompsIndex, source). Comps files of the enabled repositories
+        are read from the metadata cached by dnf5daemon, if they are all
+        there, otherwise a libdnf5 Base loads the repositories. The Base is
+        not kept, the index holds what comps queries need.
+        '''
+        try:
+            repos = self.GetRepositories(repo_attrs=['id'], enable_disable='enabled', sync=True)
+            index = dnfdragora.comps_reader.load_comps_index([repo['id'] for repo in repos])
+            if index is not None:
+                return index, 'comps.xml'
+        except Exception as error:
+            logger.warning("Cannot read cached comps, loading repositories: %s", error)
+        return CompsIndex.from_libdnf5(self._build_comps_base()), 'libdnf5'
+
+    def _build_comps_base(self):
+        '''Build a libdnf5 Base with the comps metadata of the enabled repositories.'''
+        logger.debug("Initializing shared comps base")
+        base = libdnf5.base.Base()
+        base.load_config()
+        config = base.get_config()
+
+        types_config = config.get_optional_metadata_types_option()
+        types_config.add(libdnf5.conf.Option.Priority_RUNTIME, (libdnf5.conf.METADATA_TYPE_COMPS))
+
+        base.setup()
+
+        repo_sack = base.get_repo_sack()
+        repo_sack.create_repos_from_system_configuration()
+        # load_repos(Type_AVAILABLE) is the non-deprecated replacement for
+        # update_and_load_enabled_repos(True) introduced in libdnf5 ≥ 5.2.
+        # Fall back to the old API on older installations.
+        if hasattr(repo_sack, 'load_repos'):
+            repo_sack.load_repos(libdnf5.repo.Repo.Type_AVAILABLE)
+        else:
+            repo_sack.update_and_load_enabled_repos(True)
 
-            self._comps_base = base
-            return self._comps_base
+        return base
 
     def __getComps(self):
         '''
@@ -1270,15 +2032,7 @@ class Client:
         '''
         for attempt in (1, 2):
             try:
-                base = self._get_comps_base()
-                query = libdnf5.comps.GroupQuery(base)
-
-                # locale.getlocale()[0] can return None when no locale is set.
-                loc_raw = locale.getlocale()[0]
-                loc = loc_raw.split('_')[0] if loc_raw else 'en'
-
-                groups = [[grp.get_groupid(), grp.get_translated_name(loc)] for grp in query]
-                return groups
+                return self._get_comps_index().groups()
             except Exception as error:
                 logger.exception("Failed to load comps groups (attempt %d/2): %s", attempt, error)
                 self._invalidate_comps_base()
@@ -1295,15 +2049,7 @@ class Client:
         '''
         for attempt in (1, 2):
             try:
-                base = self._get_comps_base()
-                query = libdnf5.comps.GroupQuery(base)
-                query.filter_groupid(groupID)
-
-                comps = [grp for grp in query]
-                if len(comps):
-                    packages = comps[0].get_packages()
-                    return [package.get_name() for package in packages]
-                return []
+                return list(self._get_comps_index().package_names(groupID))
             except Exception as error:
                 logger.exception("Failed to load package names for comps group '%s' (attempt %d/2): %s", groupID, attempt, error)
                 self._invalidate_comps_base()
@@ -1321,10 +2067,7 @@ class Client:
         '''
         for attempt in (1, 2):
             try:
-                base = self._get_comps_base()
-                query = libdnf5.comps.GroupQuery(base)
-                query.filter_package_name(packageNames)
-                return [grp.get_groupid() for grp in query]
+                return self._get_comps_index().groups_of_packages(packageNames)
             except Exception as error:
                 logger.exception("Failed to map comps groups from package names (attempt %d/2): %s", attempt, error)
                 self._invalidate_comps_base()
@@ -1336,7 +2079,7 @@ class Client:
 #
     def Proxy(self, cmd) :
         ''' return the proxy interface that manages the given command '''
-        if cmd == 'GetPackages' or cmd == 'GetPackages_fd' or cmd == 'GetAttribute' or \
+        if cmd == 'GetPackages' or cmd == 'GetPackages_fd' or cmd == 'GetAttribute' or cmd == 'GetAttributes' or \
            cmd == 'Search' or cmd == 'Install' or cmd == 'Remove' or cmd == 'Update' or \
            cmd == 'Reinstall' or cmd == 'Downgrade' or cmd == 'DistroSync' or \
            cmd == 'SystemUpgrade':
@@ -1365,11 +2108,16 @@ class Client:
 # API Methods
 #
 
-    def GetPackages(self, options, sync=False, piped=True):
+    def GetPackages(self, options, sync=False, piped=True, progressive=False, wait=False):
         '''
           Get a list of pkg list for a given option
 
           Args:
+            progressive: (async and piped only) deliver the result as a sequence of
+              GetPackages_fd events, each value carrying 'batch' (sequence number) and
+              'complete' (True on the last one) besides 'result' and 'error'
+            wait: (async only) return the result of the scheduled request instead of
+              posting an event, from a worker thread (see _run_dbus_waited)
             options: an array of key/value pairs
               Following options and filters are supported:
                 package_attrs: list of strings
@@ -1416,9 +2164,11 @@ class Client:
                     limit the resulting set only to packages that conflict with any of given capabilities
         '''
         method_name = 'GetPackages_fd' if piped else 'GetPackages'
+        if wait and not sync:
+          return unpack_dbus(self._run_dbus_waited(method_name, options))
         if not sync:
-          self._run_dbus_async(
-              method_name, True, options)
+          return self._run_dbus_async(
+              method_name, True, options, progressive=progressive and piped)
         else:
           result = self._run_dbus_sync(
               method_name, options)
@@ -1471,11 +2221,41 @@ class Client:
         }
 
         if not sync:
-          self._run_dbus_async('GetAttribute', True, options)
+          return self._run_dbus_async('GetAttribute', True, options)
         else:
           result = self._run_dbus_sync('GetAttribute', options)
           return unpack_dbus(result)[0][attr] if result else None
 
+    def GetAttributes(self, full_nevras, attrs, sync=False):
+        '''Get many attributes of many packages with one list_fd call
+
+        Args:
+            full_nevras: list of package full nevra (epoch can be omitted if 0)
+            attrs: list of attribute names, see GetAttribute
+
+        Returns:
+            dictionary full_nevra (as given) -> dictionary attr -> value,
+            packages that have not been found are missing
+        '''
+        package_attrs = list(attrs)
+        for attr in _NEVRA_ATTRS:
+            if attr not in package_attrs:
+                package_attrs.append(attr)
+        options = {
+          "package_attrs": package_attrs,
+          "scope": "all",
+          "patterns": list(full_nevras),
+          "with_provides": False,
+          "with_filenames": False,
+          "with_binaries": False,
+        }
+
+        if not sync:
+          return self._run_dbus_async('GetAttributes', True, options)
+        else:
+          result = self._run_dbus_sync('GetAttributes', options)
+          return _attributes_by_nevra(options["patterns"], result)
+
     def Search(self, options, sync=False):
         '''Search for packages where keys is matched in fields
 
@@ -1494,7 +2274,7 @@ class Client:
         existing = set(options.get('package_attrs', []))
         options['package_attrs'] = list(existing | _required_attrs)
         if not sync:
-          self._run_dbus_async('Search', True, options)
+          return self._run_dbus_async('Search', True, options)
         else:
           result = self._run_dbus_sync('Search', options)
           pkg_ids = [dnfdragora.misc.to_pkg_id(p["name"], p["epoch"], p["version"], p["release"],p["arch"], p["repo_id"]) for p in unpack_dbus(result)]
@@ -1552,7 +2332,7 @@ class Client:
         }
 
         if not sync:
-          self._run_dbus_async('GetRepositories', True, options)
+          return self._run_dbus_async('GetRepositories', True, options)
         else:
           result = self._run_dbus_sync('GetRepositories', options)
           return unpack_dbus(result)
@@ -1565,7 +2345,7 @@ class Client:
         '''
         if not sync:
                     self._invalidate_comps_base()
-                    self._run_dbus_async('SetEnabledRepos', True, repo_ids)
+                    return self._run_dbus_async('SetEnabledRepos', True, repo_ids)
         else:
                     result = self._run_dbus_sync('SetEnabledRepos', repo_ids)
                     self._invalidate_comps_base()
@@ -1579,7 +2359,7 @@ class Client:
         '''
         if not sync:
                     self._invalidate_comps_base()
-                    self._run_dbus_async('SetDisabledRepos', True, repo_ids)
+                    return self._run_dbus_async('SetDisabledRepos', True, repo_ids)
         else:
                     result = self._run_dbus_sync('SetDisabledRepos', repo_ids)
                     self._invalidate_comps_base()
@@ -1593,7 +2373,7 @@ class Client:
         '''
         if not sync:
                     self._invalidate_comps_base()
-                    self._run_dbus_async('ReloadMetadata', True)
+                    return self._run_dbus_async('ReloadMetadata', True)
         else:
                     result = self._run_dbus_sync('ReloadMetadata')
                     self._invalidate_comps_base()
@@ -1611,7 +2391,7 @@ class Client:
         '''
         self._invalidate_comps_base()
         if not sync:
-            self._run_dbus_async('CleanCache', True, cache_type)
+            return self._run_dbus_async('CleanCache', True, cache_type)
         else:
             success, error_msg = self._run_dbus_sync('CleanCache', cache_type)
             return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -1625,7 +2405,7 @@ class Client:
         '''
         self._invalidate_comps_base()
         if not sync:
-            self._run_dbus_async('ResetSession', True)
+            return self._run_dbus_async('ResetSession', True)
         else:
             success, error_msg = self._run_dbus_sync('ResetSession')
             return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -1649,7 +2429,7 @@ class Client:
         if options is None:
             options = {}
         if not sync:
-            self._run_dbus_async('SystemUpgrade', False, options)
+            return self._run_dbus_async('SystemUpgrade', False, options)
         else:
             self._run_dbus_sync('SystemUpgrade', options)
 
@@ -1661,7 +2441,7 @@ class Client:
                 @confirmed: whether the key import is confirmed by user
         '''
         if not sync:
-          self._run_dbus_async('ConfirmGPGImport', False, key_id, confirmed)
+          return self._run_dbus_async('ConfirmGPGImport', False, key_id, confirmed)
         else:
           self._run_dbus_sync('ConfirmGPGImport', key_id, confirmed)
 
@@ -1701,7 +2481,7 @@ class Client:
 
         '''
         if not sync:
-          self._run_dbus_async(
+          return self._run_dbus_async(
               'Advisories', True, options)
         else:
           result = self._run_dbus_sync(
@@ -1725,7 +2505,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('Install', False, specs, options)
+          return self._run_dbus_async('Install', False, specs, options)
         else:
           self._run_dbus_sync('Install', specs, options)
 
@@ -1738,7 +2518,7 @@ class Client:
                 Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('Remove', False, specs, options)
+          return self._run_dbus_async('Remove', False, specs, options)
         else:
           self._run_dbus_sync('Remove', specs, options)
 
@@ -1755,7 +2535,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('Update', False, specs, options)
+          return self._run_dbus_async('Update', False, specs, options)
         else:
           self._run_dbus_sync('Update', specs, options)
 
@@ -1770,7 +2550,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('Reinstall', False, specs, options)
+          return self._run_dbus_async('Reinstall', False, specs, options)
         else:
           self._run_dbus_sync('Reinstall', specs, options)
 
@@ -1785,7 +2565,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('Downgrade', False, specs, options)
+          return self._run_dbus_async('Downgrade', False, specs, options)
         else:
           self._run_dbus_sync('Downgrade', specs, options)
 
@@ -1801,7 +2581,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('DistroSync', False, specs, options)
+          return self._run_dbus_async('DistroSync', False, specs, options)
         else:
           self._run_dbus_sync('DistroSync', specs, options)
 
@@ -1825,7 +2605,7 @@ class Client:
             Unknown options are ignored.
         '''
         if not sync:
-          self._run_dbus_async('BuildTransaction', True, options)
+          return self._run_dbus_async('BuildTransaction', True, options)
         else:
           resolved, result = self._run_dbus_sync('BuildTransaction', options)
           return (unpack_dbus(result), unpack_dbus(resolved))
@@ -1835,7 +2615,7 @@ class Client:
             Reset the prepared rpm transaction. After this call the session is ready to perform another rpm transaction.
         '''
         if not sync:
-          self._run_dbus_async('ResetTransaction', False)
+          return self._run_dbus_async('ResetTransaction', False)
         else:
           return self._run_dbus_sync('ResetTransaction')
 
@@ -1855,7 +2635,7 @@ class Client:
           # arrives only after the entire transaction completes (downloads + RPM install).
           # A 10-minute transaction would exceed the default 600s timeout and trigger
           # a spurious NoReply.  Use an effectively infinite timeout instead.
-          self._run_dbus_async('RunTransaction', False, options, timeout=_DBUS_TIMEOUT_INFINITE)
+          return self._run_dbus_async('RunTransaction', False, options, timeout=_DBUS_TIMEOUT_INFINITE)
         else:
           self._run_dbus_sync('RunTransaction', options)
 
@@ -1869,7 +2649,7 @@ class Client:
                 @error_msg: error message if the cancellation was refused
         '''
         if not sync:
-          self._run_dbus_async('CancelTransaction', True)
+          return self._run_dbus_async('CancelTransaction', True)
         else:
           success, error_msg = self._run_dbus_sync('CancelTransaction')
           return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -1882,7 +2662,7 @@ class Client:
                             @transaction_status: map with the offline transaction status details.
             '''
             if not sync:
-                self._run_dbus_async('OfflineGetStatus', True)
+                return self._run_dbus_async('OfflineGetStatus', True)
             else:
                 pending, transaction_status = self._run_dbus_sync('OfflineGetStatus')
                 return (unpack_dbus(pending), unpack_dbus(transaction_status))
@@ -1895,7 +2675,7 @@ class Client:
                             @error_msg: error message when cancellation fails.
             '''
             if not sync:
-                self._run_dbus_async('OfflineCancel', True)
+                return self._run_dbus_async('OfflineCancel', True)
             else:
                 success, error_msg = self._run_dbus_sync('OfflineCancel')
                 return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -1912,7 +2692,7 @@ class Client:
             if options is None:
                 options = {}
             if not sync:
-                self._run_dbus_async('OfflineClean', True, options)
+                return self._run_dbus_async('OfflineClean', True, options)
             else:
                 success, error_msg = self._run_dbus_sync('OfflineClean', options)
                 return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -1927,7 +2707,7 @@ class Client:
                             @error_msg: error message when setting fails.
             '''
             if not sync:
-                self._run_dbus_async('OfflineSetFinishAction', True, action)
+                return self._run_dbus_async('OfflineSetFinishAction', True, action)
             else:
                 success, error_msg = self._run_dbus_sync('OfflineSetFinishAction', action)
                 return (unpack_dbus(success), unpack_dbus(error_msg))
@@ -2022,7 +2802,7 @@ class Client:
         '''
         try:
           if not sync:
-            self._run_dbus_async('SetWatchdogState', "(b)", state)
+            return self._run_dbus_async('SetWatchdogState', "(b)", state)
           else:
             self._run_dbus_sync('SetWatchdogState', "(b)", state)
           #self.daemon.SetWatchdogState("(b)", state)
@@ -2037,7 +2817,7 @@ class Client:
             setting: setting to read
         '''
         if not sync:
-          self._run_dbus_async('GetConfig', '(s)', setting)
+          return self._run_dbus_async('GetConfig', '(s)', setting)
         else:
           result = self._run_dbus_sync('GetConfig', '(s)', setting)
           return json.loads(result)
@@ -2045,7 +2825,7 @@ class Client:
     def Exit(self, sync=True):
       '''End the daemon'''
       if not sync:
-        self._run_dbus_async('Exit')
+        return self._run_dbus_async('Exit')
       else:
         self._run_dbus_sync('Exit')
 
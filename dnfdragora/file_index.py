@@ -0,0 +1,385 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+from array import array
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+
+import dnfdragora.comps_reader
+
+try:
+    import rpm
+except ImportError:
+    rpm = None
+
+logger = logging.getLogger('dnfdragora.file_index')
+
+# repomd.xml data types of file lists, in order of preference
+FILELISTS_TYPES = ('filelists',)
+# directories whose files are the binaries of a with_binaries search
+BINARY_DIRS = ('/usr/bin', '/usr/sbin')
+# source of the installed packages
+INSTALLED = '@System'
+
+_FILELISTS_NS = '{http://linux.duke.edu/metadata/filelists}'
+_MAGIC = b'DDFI'
+_VERSION = 1
+# written in native byte order, a segment of another machine is rebuilt
+_BYTE_ORDER = 0x01020304
+_HEADER = struct.Struct('=4sIII')
+_SECTION = struct.Struct('=QQ')
+_SECTIONS = ('pkg_off', 'pkg_blob', 'dir_off', 'dir_blob', 'name_off', 'name_blob',
+             'dir_start', 'entry_name', 'entry_pkg', 'name_start', 'by_name')
+_BLOBS = ('pkg_blob', 'dir_blob', 'name_blob')
+
+
+def iter_filelists(fileobj):
+    '''
+    stream parse a filelists.xml file, yield (full nevra, file paths) of
+    every package, elements are dropped once read
+    '''
+    root = None
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != _FILELISTS_NS + 'package':
+            continue
+        version = elem.find(_FILELISTS_NS + 'version')
+        if version is not None:
+            yield ("%s-%s:%s-%s.%s" % (elem.get('name'), version.get('epoch') or 0, version.get('ver'),
+                                       version.get('rel'), elem.get('arch')),
+                   [f.text for f in elem.iterfind(_FILELISTS_NS + 'file') if f.text])
+        root.clear()
+
+
+def read_filelists(path):
+    ''' (full nevra, file paths) of the packages of a filelists metadata file '''
+    with dnfdragora.comps_reader.open_metadata(path) as f:
+        yield from iter_filelists(f)
+
+
+def _text(value):
+    return value.decode('utf-8', 'surrogateescape') if isinstance(value, bytes) else value
+
+
+def read_rpmdb():
+    ''' (full nevra, file paths) of the installed packages, from the rpmdb '''
+    ts = rpm.TransactionSet()
+    for hdr in ts.dbMatch():
+        name = _text(hdr[rpm.RPMTAG_NAME])
+        if name == 'gpg-pubkey':
+            continue
+        yield ("%s-%s:%s-%s.%s" % (name, hdr[rpm.RPMTAG_EPOCH] or 0, _text(hdr[rpm.RPMTAG_VERSION]),
+                                   _text(hdr[rpm.RPMTAG_RELEASE]), _text(hdr[rpm.RPMTAG_ARCH])),
+               [_text(f) for f in hdr[rpm.RPMTAG_FILENAMES] or []])
+
+
+def _sort_key(text):
+    return (text.lower(), text)
+
+
+def _strings(values):
+    ''' (offsets, blob) of a list of strings '''
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode('utf-8', 'surrogateescape')
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def write_segment(path, packages):
+    '''
+    write the file index segment of packages, an iterable of (full nevra,
+    file paths), to path (see FileSegment), returns the number of files
+    '''
+    pkgs = []
+    dirs = {}
+    names = {}
+    # dir id -> name id << 32 | package of its files
+    dir_files = {}
+    for full_nevra, paths in packages:
+        pkg = len(pkgs)
+        pkgs.append(full_nevra)
+        for file_path in paths:
+            dirname, _, name = file_path.rpartition('/')
+            did = dirs.setdefault(dirname, len(dirs))
+            nid = names.setdefault(name, len(names))
+            files = dir_files.get(did)
+            if files is None:
+                files = dir_files[did] = array('Q')
+            files.append(nid << 32 | pkg)
+
+    dir_order = sorted(dirs, key=_sort_key)
+    name_order = sorted(names, key=_sort_key)
+    name_rank = array('I', bytes(4 * len(names)))
+    for rank, name in enumerate(name_order):
+        name_rank[names[name]] = rank
+    del names
+
+    # files sorted by directory then name
+    dir_start = array('I', [0])
+    entry_name = array('I')
+    entry_pkg = array('I')
+    for dirname in dir_order:
+        for rank, pkg in sorted((name_rank[value >> 32], value & 0xffffffff)
+                                for value in dir_files.pop(dirs[dirname])):
+            entry_name.append(rank)
+            entry_pkg.append(pkg)
+        dir_start.append(len(entry_name))
+    # files by name, a counting sort of their names
+    name_start = array('I', bytes(4 * (len(name_order) + 1)))
+    for rank in entry_name:
+        name_start[rank + 1] += 1
+    for rank in range(len(name_order)):
+        name_start[rank + 1] += name_start[rank]
+    by_name = array('I', bytes(4 * len(entry_name)))
+    fill = array('I', name_start)
+    for entry, rank in enumerate(entry_name):
+        by_name[fill[rank]] = entry
+        fill[rank] += 1
+
+    sections = {'dir_start': dir_start, 'entry_name': entry_name, 'entry_pkg': entry_pkg,
+                'name_start': name_start, 'by_name': by_name}
+    sections['pkg_off'], sections['pkg_blob'] = _strings(pkgs)
+    sections['dir_off'], sections['dir_blob'] = _strings(dir_order)
+    sections['name_off'], sections['name_blob'] = _strings(name_order)
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        offset = _HEADER.size + _SECTION.size * len(_SECTIONS)
+        table = []
+        for name in _SECTIONS:
+            data = sections[name]
+            size = len(data) * data.itemsize if isinstance(data, array) else len(data)
+            # sections aligned to 8 bytes
+            offset = (offset + 7) & ~7
+            table.append((offset, size))
+            offset += size
+        f.write(_HEADER.pack(_MAGIC, _VERSION, _BYTE_ORDER, len(_SECTIONS)))
+        for section in table:
+            f.write(_SECTION.pack(*section))
+        for name, (offset, _) in zip(_SECTIONS, table):
+            f.write(bytes(offset - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp_path, path)
+    return len(entry_name)
+
+
+class FileSegment:
+    '''
+    File paths of the packages of one source (a repository or the rpmdb),
+    memory mapped from the file written by write_segment.
+
+    Directories and file names are kept once, sorted case insensitively:
+    the files are sorted by directory then name, with the ranges of the
+    files of every directory (dir_start) and of every name (name_start in
+    by_name), so that path prefix and file name lookups are binary
+    searches on the mapped file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, count = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION or byte_order != _BYTE_ORDER or count != len(_SECTIONS):
+            raise ValueError("%s is not a file index segment" % path)
+        view = memoryview(self._map)
+        for i, name in enumerate(_SECTIONS):
+            offset, size = _SECTION.unpack_from(self._map, _HEADER.size + i * _SECTION.size)
+            if offset + size > len(self._map):
+                raise ValueError("%s is truncated" % path)
+            data = view[offset:offset + size]
+            setattr(self, '_' + name, data if name in _BLOBS else data.cast('I'))
+
+    def __len__(self):
+        return len(self._entry_pkg)
+
+    def _string(self, kind, i):
+        offsets = getattr(self, '_%s_off' % kind)
+        blob = getattr(self, '_%s_blob' % kind)
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8', 'surrogateescape')
+
+    def _bisect(self, kind, key):
+        ''' first id of kind (dir or name) whose lower case string is not less than key '''
+        lo, hi = 0, len(getattr(self, '_%s_off' % kind)) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(kind, mid).lower() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _ids(self, kind, text, prefix, icase):
+        ''' ids of kind (dir or name) equal to text, or starting with it if prefix '''
+        key = text.lower()
+        lo = self._bisect(kind, key)
+        hi = self._bisect(kind, key + '\U0010ffff' if prefix else key + '\0')
+        if icase:
+            return range(lo, hi)
+        if prefix:
+            return [i for i in range(lo, hi) if self._string(kind, i).startswith(text)]
+        return [i for i in range(lo, hi) if self._string(kind, i) == text]
+
+    def package(self, pkg):
+        return self._string('pkg', pkg)
+
+    def _path(self, did, nid):
+        return "%s/%s" % (self._string('dir', did), self._string('name', nid))
+
+    def paths(self, text, prefix=False, icase=True):
+        ''' (package, path) of the files whose path is text, or starts with it if prefix '''
+        dirname, _, name = text.rpartition('/')
+        names = self._ids('name', name, prefix, icase) if name or prefix else []
+        if names:
+            for did in self._ids('dir', dirname, False, icase):
+                start, end = self._dir_start[did], self._dir_start[did + 1]
+                entries = self._entry_name[start:end]
+                first = start + bisect.bisect_left(entries, names[0])
+                last = start + bisect.bisect_right(entries, names[-1])
+                allowed = names if isinstance(names, range) else set(names)
+                for entry in range(first, last):
+                    nid = self._entry_name[entry]
+                    if nid in allowed:
+                        yield self._entry_pkg[entry], self._path(did, nid)
+        if prefix:
+            # files of the directories under text
+            for did in self._ids('dir', text, True, icase):
+                for entry in range(self._dir_start[did], self._dir_start[did + 1]):
+                    yield self._entry_pkg[entry], self._path(did, self._entry_name[entry])
+
+    def names(self, name, prefix=False, icase=True, dirs=None):
+        '''
+        (package, path) of the files named name, or whose name starts with
+        it if prefix, in one of dirs if given
+        '''
+        for nid in self._ids('name', name, prefix, icase):
+            for i in range(self._name_start[nid], self._name_start[nid + 1]):
+                entry = self._by_name[i]
+                did = bisect.bisect_right(self._dir_start, entry) - 1
+                dirname = self._string('dir', did)
+                if dirs is None or dirname in dirs:
+                    yield self._entry_pkg[entry], "%s/%s" % (dirname, self._string('name', nid))
+
+
+def file_pattern(pattern):
+    '''
+    (text, prefix) of a search pattern the index can answer, an exact text
+    or a text followed by *, None for other globs
+    '''
+    text = pattern.rstrip('*')
+    if not text or any(c in text for c in '*?['):
+        return None
+    return text, text != pattern
+
+
+class FileIndex:
+    '''
+    On disk index of the file paths of the packages, so that a search of
+    the package providing a file, or a binary, does not ask dnf5daemon.
+
+    There is a FileSegment per source: the filelists metadata of every
+    repository and the rpmdb for the installed packages. Segment files are
+    named after their source and the checksum of its data (repomd checksum,
+    rpmdb state), update() builds only the segments of the sources whose
+    checksum has changed and removes the other files of the directory.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._segments = {}
+        self._lock = threading.Lock()
+        # False while updating, or if the index has never been built
+        self.ready = False
+
+    def _segment_name(self, source, checksum):
+        key = hashlib.sha1(repr(checksum).encode('utf-8')).hexdigest()[:16]
+        return "%s-%s.idx" % (urllib.parse.quote(source, safe=''), key)
+
+    def update(self, sources):
+        '''
+        index sources, a list of (source, checksum, function returning the
+        (full nevra, file paths) of its packages), the index is not ready
+        until it completes. Returns the number of segments built.
+        '''
+        with self._lock:
+            self.ready = False
+            start = time.monotonic()
+            os.makedirs(self.directory, exist_ok=True)
+            segments = {}
+            built = 0
+            for source, checksum, read in sources:
+                name = self._segment_name(source, checksum)
+                path = os.path.join(self.directory, name)
+                segment = self._segments.get(name)
+                if segment is None and os.path.exists(path):
+                    try:
+                        segment = FileSegment(path)
+                    except (OSError, ValueError, struct.error) as e:
+                        logger.warning("File index segment %s built again: %s", path, e)
+                if segment is None:
+                    files = write_segment(path, read())
+                    segment = FileSegment(path)
+                    built += 1
+                    logger.debug("File index of %s: %d files", source, files)
+                segments[name] = segment
+            for name in os.listdir(self.directory):
+                if name.endswith('.idx') and name not in segments:
+                    os.remove(os.path.join(self.directory, name))
+            # old segments are unmapped once no search uses them
+            self._segments = segments
+            self.ready = True
+            logger.info("File index updated in %.3f seconds, %d of %d segments built",
+                        time.monotonic() - start, built, len(segments))
+            return built
+
+    def search(self, patterns, filenames=True, binaries=False, icase=True):
+        '''
+        set of the full nevras of the packages having a file matching
+        one of patterns: with filenames a path (or path prefix if followed
+        by *), with binaries a file name in BINARY_DIRS (or name prefix).
+        None if the index is not ready or a pattern is another glob.
+        '''
+        if not self.ready:
+            return None
+        queries = []
+        for pattern in patterns:
+            query = file_pattern(pattern)
+            if query is None:
+                return None
+            queries.append(query)
+        found = set()
+        for segment in list(self._segments.values()):
+            pkgs = set()
+            for text, prefix in queries:
+                if filenames and text.startswith('/'):
+                    pkgs.update(pkg for pkg, _ in segment.paths(text, prefix, icase))
+                if binaries and '/' not in text:
+                    pkgs.update(pkg for pkg, _ in segment.names(text, prefix, icase, BINARY_DIRS))
+            found.update(segment.package(pkg) for pkg in pkgs)
+        return found
+
+    def stats(self):
+        ''' indexed segments, packages and files '''
+        segments = list(self._segments.values())
+        return {'segments': len(segments), 'packages': sum(len(s._pkg_off) - 1 for s in segments),
+                'files': sum(len(s) for s in segments)}
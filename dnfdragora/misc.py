@@ -139,6 +139,33 @@ def pkg_id_to_full_name(pkg_id):
     else:
         return "%s-%s-%s.%s" % (n, v, r, a)
 
+def full_nevra_key(full_nevra):
+    '''
+    full nevra without epoch if it is 0, as pkg_id_to_full_name, so that
+    nano-0:7.2-1.x86_64 and nano-7.2-1.x86_64 give the same key
+    '''
+    head, sep, tail = full_nevra.partition(':')
+    if sep:
+        name, _, epoch = head.rpartition('-')
+        if epoch in ('', '0'):
+            return "%s-%s" % (name, tail)
+    return full_nevra
+
+def parse_nevra(nevra):
+    '''
+    (name, epoch, version, release, arch) of name-[epoch:]version-release.arch,
+    epoch is '' if missing, as libdnf5.rpm.Nevra.get_epoch()
+    '''
+    rest, _, arch = nevra.rpartition('.')
+    rest, _, release = rest.rpartition('-')
+    name, _, version = rest.rpartition('-')
+    epoch, sep, ver = version.partition(':')
+    if sep:
+        version = ver
+    else:
+        epoch = ''
+    return (name, epoch, version, release, arch)
+
 
 def rpmvercmp(a, b):
     """Compare two RPM version or release strings using the rpmvercmp algorithm.
@@ -0,0 +1,210 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import copy
+import fnmatch
+import logging
+import re
+
+logger = logging.getLogger('dnfdragora.package_query')
+
+# scopes of a query if none is given, in package list order
+SCOPES = ('updates', 'installed', 'available')
+
+
+def glob_matcher(patterns, icase=True):
+    '''
+    function telling if a string matches any of the glob patterns
+    '''
+    regexp = '|'.join(fnmatch.translate(pattern) for pattern in patterns)
+    return re.compile(regexp, re.IGNORECASE if icase else 0).match
+
+
+def nevra_forms(po):
+    '''
+    names a package can be given with, as the NEVRA forms of a dnf spec
+    '''
+    name, ver, rel, arch = po.name, po.version, po.release, po.arch
+    forms = [name, "%s.%s" % (name, arch), "%s-%s" % (name, ver), "%s-%s-%s" % (name, ver, rel),
+             "%s-%s-%s.%s" % (name, ver, rel, arch)]
+    epoch = po.epoch
+    forms.append("%s-%s:%s-%s.%s" % (name, epoch or 0, ver, rel, arch))
+    return forms
+
+
+class PackageQuery:
+    '''
+    Lazy query of the packages of a PackageCache, built by chaining
+    filters, e.g. the installed editors of the machine arch:
+
+        cache.query('installed').group('Applications/Editors').multilib('x86_64')
+
+    Every filter returns a new query. Filters on an indexed field (name,
+    arch, repository and RPM group, see PackageCache) are planned against
+    the cache indexes: the packages of a scope are taken from the smallest
+    index lookup, then checked against the other filters. The cache
+    filters (the arch filter of PackageCacheWithFilters) are applied as in
+    get_packages. Packages are yielded while iterating, scope by scope.
+    '''
+    # packages checked before running the cache filters on them
+    CHUNK = 512
+
+    def __init__(self, cache, scopes=None):
+        self._cache = cache
+        self._scopes = tuple(str(scope) for scope in scopes) if scopes else SCOPES
+        # (field, set of values or predicate on the value)
+        self._terms = ()
+        # predicates on the package
+        self._predicates = ()
+        # packages the query is restricted to, None for all
+        self._among = None
+
+    def _with(self, term=None, predicate=None):
+        query = copy.copy(self)
+        if term is not None:
+            query._terms = self._terms + (term,)
+        if predicate is not None:
+            query._predicates = self._predicates + (predicate,)
+        return query
+
+    def scope(self, *scopes):
+        ''' packages of the given scopes only ('installed', 'updates'...) '''
+        query = copy.copy(self)
+        query._scopes = tuple(str(scope) for scope in scopes)
+        return query
+
+    def names(self, names):
+        ''' packages named as one of names '''
+        return self._with(term=('name', frozenset(names)))
+
+    def match(self, field, predicate):
+        '''
+        packages whose indexed field (name, arch, repo or group) value
+        satisfies predicate, it is called once per distinct value
+        '''
+        return self._with(term=(field, predicate))
+
+    def name_glob(self, patterns, icase=True, nevra=False):
+        '''
+        packages whose name matches one of the glob patterns, or any of
+        their NEVRA forms (see nevra_forms) if nevra is set
+        '''
+        match = glob_matcher(patterns, icase)
+        if not nevra:
+            return self.match('name', match)
+        return self._with(predicate=lambda po: any(match(form) for form in nevra_forms(po)))
+
+    def arch(self, *arches):
+        return self._with(term=('arch', frozenset(arches)))
+
+    def multilib(self, machine_arch):
+        ''' packages of the machine arch or noarch, the skip_other list filter '''
+        return self.arch('noarch', machine_arch)
+
+    def repo(self, *repos):
+        return self._with(term=('repo', frozenset(repos)))
+
+    def group(self, *groups):
+        ''' packages of the given RPM groups (see backend.package_group) '''
+        return self._with(term=('group', frozenset(groups)))
+
+    def queued(self, actions, action=None):
+        '''
+        packages in the queue actions (pkg_id -> queued action, as
+        PackageQueue.actions), only those queued for action if given
+        '''
+        if action is None:
+            return self._with(predicate=lambda po: po.pkg_id in actions)
+        return self._with(predicate=lambda po: actions.get(po.pkg_id) == action)
+
+    def among(self, packages):
+        '''
+        packages in packages only, e.g. the result of a text index search,
+        they are the candidates instead of an index lookup
+        '''
+        query = copy.copy(self)
+        query._among = frozenset(packages)
+        return query
+
+    def size(self, min_size=None, max_size=None):
+        ''' packages whose size is in [min_size, max_size] '''
+        return self._with(predicate=lambda po: (min_size is None or po.size >= min_size) and
+                                               (max_size is None or po.size <= max_size))
+
+    def has_update(self, state=True):
+        ''' packages (if state is False, packages not) having an update of the same name '''
+        updates = self._cache.index_values('name', 'updates')
+        return self._with(predicate=lambda po: (po.name in updates) == state)
+
+    def filter(self, predicate):
+        ''' packages for which predicate(po) is true '''
+        return self._with(predicate=predicate)
+
+    def _plan(self, scope):
+        '''
+        (candidate package sets, remaining terms) of scope: the candidates
+        come from the smallest index lookup of the terms, or are the
+        packages of among
+        '''
+        cache = self._cache
+        best = None
+        terms = []
+        for field, values in self._terms:
+            if callable(values):
+                values = frozenset(value for value in cache.index_values(field, scope)
+                                   if value is not None and values(value))
+            terms.append((field, values))
+            if self._among is not None:
+                continue
+            members = [cache.index_members(field, scope, value) for value in values]
+            size = sum(len(m) for m in members)
+            if best is None or size < best[0]:
+                best = (size, len(terms) - 1, members)
+        if self._among is not None:
+            members = cache.scope_members(scope)
+            return [[po for po in self._among if po in members]], terms
+        if best is None:
+            return [cache.scope_members(scope)], terms
+        del terms[best[1]]
+        return best[2], terms
+
+    def _scope_packages(self, scope):
+        candidates, terms = self._plan(scope)
+        index_value = self._cache.index_value
+        predicates = self._predicates
+        # copied, the cache can change while the query is iterated
+        for members in candidates:
+            for po in list(members):
+                if all(index_value(field, po) in values for field, values in terms) and \
+                   all(predicate(po) for predicate in predicates):
+                    yield po
+
+    def __iter__(self):
+        run_filters = getattr(self._cache, 'filters', None)
+        run_filters = run_filters.run if run_filters is not None else None
+        for scope in self._scopes:
+            chunk = []
+            for po in self._scope_packages(scope):
+                chunk.append(po)
+                if len(chunk) == self.CHUNK:
+                    yield from run_filters(chunk) if run_filters else chunk
+                    chunk = []
+            if chunk:
+                yield from run_filters(chunk) if run_filters else chunk
+
+    def list(self):
+        return list(self)
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def first(self):
+        ''' a package of the query, None if it is empty '''
+        return next(iter(self), None)
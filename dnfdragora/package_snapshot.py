@@ -0,0 +1,96 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import gzip
+import json
+import logging
+import os
+
+logger = logging.getLogger('dnfdragora.package_snapshot')
+
+SCOPES = ('installed', 'updates', 'available')
+
+
+class PackageSnapshot:
+    '''
+    Installed, updates and available package lists saved at the end of a
+    caching, to fill the package list at the next start before dnf5daemon
+    has listed the packages again.
+
+    A snapshot is tagged with the state the lists depend on (see
+    DnfRootBackend.package_state): the rpmdb and the metadata of the enabled
+    repositories. changed_scopes() tells which lists are outdated when the
+    state differs. Packages are stored as GetPackages values, gzipped JSON.
+    '''
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        '''
+        return (state, scopes), scopes is a dictionary scope -> list of
+        package values, None if there is no usable snapshot
+        '''
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning("Package snapshot %s ignored: %s", self.path, e)
+            return None
+        if not isinstance(data, dict) or data.get('version') != self.VERSION or \
+           not data.get('state') or set(data.get('scopes', {})) != set(SCOPES):
+            logger.warning("Package snapshot %s ignored: unknown format", self.path)
+            return None
+        return data['state'], data['scopes']
+
+    def save(self, state, scopes):
+        '''
+        write the package values of every scope (scope -> list of values)
+        tagged with state, the previous snapshot is replaced atomically
+        '''
+        data = {'version': self.VERSION, 'state': state, 'scopes': scopes}
+        tmp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Cannot save package snapshot %s: %s", self.path, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return False
+        logger.debug("Package snapshot saved: %s", ", ".join(
+            "%d %s" % (len(scopes[scope]), scope) for scope in SCOPES))
+        return True
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def changed_scopes(snapshot_state, state):
+    '''
+    scopes whose package list can differ between the two states: any rpmdb
+    change can move packages in every scope, repository metadata changes
+    do not touch installed packages
+    '''
+    if not snapshot_state or not state or snapshot_state.get('rpmdb') != state.get('rpmdb'):
+        return list(SCOPES)
+    if snapshot_state.get('repos') != state.get('repos'):
+        return ['updates', 'available']
+    return []
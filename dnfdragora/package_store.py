@@ -0,0 +1,187 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import logging
+import sys
+import threading
+from array import array
+
+import dnfdragora.misc
+
+logger = logging.getLogger('dnfdragora.package_store')
+
+
+class ValueTable:
+    '''
+    Interned values of a PackageStore: every distinct value (name, version,
+    arch, repository id...) is kept once and columns refer to its index.
+    '''
+
+    def __init__(self):
+        # index -> value, read directly by PackageStore
+        self.items = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def intern(self, value):
+        ''' index of value, added if new '''
+        i = self._index.get(value)
+        if i is None:
+            i = len(self.items)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            self.items.append(value)
+            self._index[value] = i
+        return i
+
+    def find(self, value):
+        ''' index of value, None if it is not in the table '''
+        return self._index.get(value)
+
+
+class PackageStore:
+    '''
+    Package values kept in compact columns instead of an object with its
+    own __dict__ per package: strings (name, epoch, version, release, arch,
+    repository id, group, action) are interned in a ValueTable and a row
+    holds their indexes, sizes are 64 bits integers and summaries are utf-8
+    encoded in a single buffer (offset, length per row).
+
+    DnfPackageRow is the package object reading a row, the other fields
+    of a package (details, selection...) are kept in a dictionary for the
+    rows that set them. The row of a duplicate package is freed and
+    reused by the next add, a row whose package is replaced stays in the
+    store until the store is dropped (see DnfRootBackend.clear_cache).
+    Changes are serialized, lazy fields (group, summary) can be filled by
+    the details prefetcher thread.
+    '''
+    STRING_COLUMNS = ('name', 'epoch', 'version', 'release', 'arch', 'repo', 'group', 'action')
+
+    def __init__(self):
+        self.values = ValueTable()
+        self._columns = {}
+        for column in self.STRING_COLUMNS:
+            self._columns[column] = array('I')
+            setattr(self, column, self._columns[column])
+        self.install_size = array('Q')
+        self.download_size = array('Q')
+        self.summary_offset = array('Q')
+        self.summary_length = array('I')
+        self._summaries = bytearray()
+        # row -> {field: value} of the fields set on the package of a row
+        self._fields = {}
+        # freed rows, reused by add
+        self._free = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.name)
+
+    def add(self, pkg_values, action=None):
+        '''
+        add a package from its GetPackages values (name, epoch... or
+        nevra), returns its row
+        '''
+        if 'nevra' in pkg_values:
+            name, epoch, version, release, arch = dnfdragora.misc.parse_nevra(pkg_values['nevra'])
+        else:
+            name = epoch = version = release = arch = None
+        name = pkg_values.get('name', name)
+        epoch = pkg_values.get('epoch', epoch) or 0
+        version = pkg_values.get('version', version)
+        release = pkg_values.get('release', release)
+        arch = pkg_values.get('arch', arch)
+
+        intern = self.values.intern
+        values = (intern(name), intern(epoch), intern(version), intern(release), intern(arch),
+                  intern(pkg_values.get('repo_id')), intern(pkg_values.get('group')), intern(action))
+        install_size = pkg_values.get('install_size') or 0
+        download_size = pkg_values.get('download_size') or 0
+        with self._lock:
+            if self._free:
+                row = self._free.pop()
+                for column, value in zip(self.STRING_COLUMNS, values):
+                    self._columns[column][row] = value
+                self.install_size[row] = install_size
+                self.download_size[row] = download_size
+            else:
+                row = len(self.name)
+                for column, value in zip(self.STRING_COLUMNS, values):
+                    self._columns[column].append(value)
+                self.install_size.append(install_size)
+                self.download_size.append(download_size)
+                self.summary_offset.append(0)
+                self.summary_length.append(0)
+            self.set_summary(row, pkg_values.get('summary'))
+        return row
+
+    def free(self, row):
+        ''' row is no longer used, it is reused by the next add '''
+        with self._lock:
+            self._fields.pop(row, None)
+            self._free.append(row)
+
+    def get(self, column, row):
+        ''' value of the string column for row '''
+        return self.values.items[self._columns[column][row]]
+
+    def set(self, column, row, value):
+        with self._lock:
+            self._columns[column][row] = self.values.intern(value)
+
+    def field(self, row, name, default=None):
+        ''' value of a field set on the package of row, default if not set '''
+        fields = self._fields.get(row)
+        return default if fields is None else fields.get(name, default)
+
+    def set_field(self, row, name, value, default=None):
+        ''' set a field of the package of row, nothing is kept for a default value never set '''
+        with self._lock:
+            fields = self._fields.get(row)
+            if fields is None:
+                if value == default:
+                    return
+                fields = self._fields[row] = {}
+            fields[name] = value
+
+    def nevra_key(self, row):
+        ''' backend.nevra_key of row, read at once '''
+        items = self.values.items
+        return (items[self.name[row]], str(items[self.epoch[row]] or 0), items[self.version[row]],
+                items[self.release[row]], items[self.arch[row]])
+
+    def summary(self, row):
+        ''' summary of row, None if not known '''
+        with self._lock:
+            length = self.summary_length[row]
+            if not length:
+                return None
+            offset = self.summary_offset[row]
+            data = self._summaries[offset:offset + length]
+        return data.decode('utf-8')
+
+    def set_summary(self, row, summary):
+        ''' a changed summary is appended, the old one is not reclaimed '''
+        data = summary.encode('utf-8') if summary else b''
+        with self._lock:
+            self.summary_offset[row] = len(self._summaries)
+            self.summary_length[row] = len(data)
+            self._summaries += data
+
+    def nbytes(self):
+        ''' approximate size of the columns and summaries, without the value table '''
+        columns = [getattr(self, column) for column in self.STRING_COLUMNS]
+        columns += [self.install_size, self.download_size, self.summary_offset, self.summary_length]
+        return sum(column.itemsize * len(column) for column in columns) + len(self._summaries)
@@ -0,0 +1,168 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+
+logger = logging.getLogger('dnfdragora.rpmdb_watcher')
+
+# inotify(7) constants
+IN_MODIFY      = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_NONBLOCK    = 0o4000
+IN_CLOEXEC     = 0o2000000
+_EVENT_HEADER  = struct.Struct('iIII')
+
+
+def _inotify_libc():
+    ''' libc with inotify functions, None if not available (e.g. not linux) '''
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class RpmdbWatcher:
+    '''
+    Watch the rpmdb for changes made by other tools (dnf, PackageKit...)
+    while dnfdragora is running. callback() is called from the watcher
+    thread once the rpmdb has not been written for debounce seconds, so
+    that a whole transaction gives a single call.
+
+    The rpmdb directory is watched with inotify, falling back to a stat of
+    the rpmdb files every poll_interval seconds if inotify is not available.
+    Only the rpmdb file and its journal are considered, readers touch the
+    other files of the directory (sqlite -shm, Berkeley DB __db.*).
+    '''
+    DEBOUNCE = 2.0
+    POLL_INTERVAL = 5.0
+
+    def __init__(self, path, callback, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._directory, name = os.path.split(path)
+        self._names = (name, name + '-wal', name + '-journal')
+        self._stop = threading.Event()
+        self._fd = None
+        self._thread = None
+
+    def start(self):
+        ''' start watching, returns False if the rpmdb directory is missing '''
+        if not os.path.isdir(self._directory):
+            logger.warning("rpmdb directory %s not found, changes are not watched", self._directory)
+            return False
+        self._fd = self._inotify_fd()
+        target = self._inotify_loop if self._fd is not None else self._poll_loop
+        self._thread = threading.Thread(target=target, name='rpmdb-watcher', daemon=True)
+        self._thread.start()
+        logger.info("Watching %s (%s)", self.path, 'inotify' if self._fd is not None else 'polling')
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(max(self.poll_interval, 1.0) + 1.0)
+        self._thread = None
+
+    def _inotify_fd(self):
+        libc = _inotify_libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.warning("inotify_init1 failed: %s", os.strerror(ctypes.get_errno()))
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(self._directory), mask) < 0:
+            logger.warning("Cannot watch %s: %s", self._directory, os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return None
+        return fd
+
+    def _read_events(self):
+        ''' True if one of the inotify events read is about the rpmdb '''
+        changed = False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if name in self._names:
+                changed = True
+        return changed
+
+    def _inotify_loop(self):
+        due = None
+        try:
+            while not self._stop.is_set():
+                timeout = 0.5 if due is None else max(0.0, min(0.5, due - time.monotonic()))
+                readable, _, _ = select.select([self._fd], [], [], timeout)
+                if readable and self._read_events():
+                    # wait for the rpmdb to be quiet
+                    due = time.monotonic() + self.debounce
+                elif due is not None and time.monotonic() >= due:
+                    due = None
+                    self._notify()
+        except OSError as e:
+            logger.warning("rpmdb watcher stopped: %s", e)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _signature(self):
+        ''' stat of the rpmdb files, changed by any write '''
+        signature = []
+        for name in self._names:
+            try:
+                st = os.stat(os.path.join(self._directory, name))
+            except OSError:
+                continue
+            signature.append((name, st.st_mtime_ns, st.st_size))
+        return signature
+
+    def _poll_loop(self):
+        last = self._signature()
+        pending = False
+        while not self._stop.wait(self.debounce if pending else self.poll_interval):
+            signature = self._signature()
+            if signature != last:
+                # wait for the rpmdb to be quiet
+                last = signature
+                pending = True
+            elif pending:
+                pending = False
+                self._notify()
+
+    def _notify(self):
+        logger.debug("rpmdb %s changed", self.path)
+        try:
+            self.callback()
+        except Exception as e:
+            logger.error("rpmdb change callback failed: %s", e)
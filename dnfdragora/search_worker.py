@@ -0,0 +1,115 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+from concurrent import futures
+import logging
+import multiprocessing
+import os
+import re
+import time
+
+logger = logging.getLogger('dnfdragora.search_worker')
+
+
+def match_texts(pattern, texts):
+    '''
+    indexes of the texts where the regular expression pattern is found,
+    ^ and $ match at every line (see column_text), run by the search processes
+    '''
+    search = re.compile(pattern, re.MULTILINE).search
+    return [i for i, text in enumerate(texts) if search(text)]
+
+
+def column_text(value):
+    ''' text searched for an attribute value, one line per item of a list '''
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(str(item) for item in value)
+    return str(value)
+
+
+class ParallelSearch:
+    '''
+    Regular expression search of a list of texts (an attribute column, see
+    DnfRootBackend.attribute_column) split in chunks matched by a pool of
+    processes, so that a search on file lists or descriptions uses every
+    core and does not hold the GIL of the UI.
+
+    Small lists are matched in process. The pool is started at the first
+    parallel search, with spawn since the process has threads and a D-Bus
+    connection, and kept until shutdown().
+    '''
+    # characters of a chunk of texts sent to a process
+    CHUNK_SIZE = 1 << 20
+    # lists with fewer characters are matched in process
+    MIN_PARALLEL_SIZE = 4 << 20
+    MAX_WORKERS = 4
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(self.MAX_WORKERS, os.cpu_count() or 1)
+        self._pool = None
+
+    def _chunks(self, texts):
+        ''' (offset, texts) chunks of about CHUNK_SIZE characters '''
+        start = size = 0
+        for i, text in enumerate(texts):
+            size += len(text)
+            if size >= self.CHUNK_SIZE:
+                yield start, texts[start:i + 1]
+                start, size = i + 1, 0
+        if start < len(texts):
+            yield start, texts[start:]
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = futures.ProcessPoolExecutor(self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def search(self, pattern, texts, partial=None, cancel=None):
+        '''
+        sorted indexes of the texts where pattern is found, None if cancel
+        (a threading.Event) is set before the search ends. partial, if
+        given, is called with the indexes of every chunk as it is matched.
+        re.error is raised if pattern is not a valid regular expression.
+        '''
+        re.compile(pattern)
+        start = time.perf_counter()
+        found = []
+        chunks = list(self._chunks(texts))
+        size = sum(len(text) for text in texts)
+        pending = {}
+        if self.max_workers < 2 or len(chunks) < 2 or size < self.MIN_PARALLEL_SIZE:
+            results = ((offset, match_texts(pattern, chunk)) for offset, chunk in chunks)
+        else:
+            pool = self._executor()
+            pending = {pool.submit(match_texts, pattern, chunk): offset for offset, chunk in chunks}
+            results = ((pending[future], future.result()) for future in futures.as_completed(pending))
+        for offset, indexes in results:
+            if cancel is not None and cancel.is_set():
+                # chunks not started yet are dropped
+                for future in pending:
+                    future.cancel()
+                logger.debug("Search of %s cancelled", pattern)
+                return None
+            indexes = [offset + i for i in indexes]
+            found.extend(indexes)
+            if partial is not None and indexes:
+                partial(indexes)
+        found.sort()
+        logger.debug("Searched %s in %d texts (%d chunks) in %.3f seconds: %d found", pattern, len(texts),
+                     len(chunks), time.perf_counter() - start, len(found))
+        return found
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
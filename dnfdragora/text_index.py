@@ -0,0 +1,231 @@
+'''
+dnfdragora is a graphical package management tool based on libyui python bindings
+
+License: GPLv3
+
+Author:  Angelo Naselli <anaselli@linux.it>
+
+@package dnfdragora
+'''
+
+from array import array
+import bisect
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger('dnfdragora.text_index')
+
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+
+def tokens(text, min_length=1):
+    ''' lower case alphanumeric words of text '''
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) >= min_length]
+
+
+def is_token(word, min_length=1):
+    ''' word is a single token of at least min_length characters '''
+    return len(word) >= min_length and tokens(word) == [word.lower()]
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def padded_trigrams(token):
+    ''' trigrams of token with its start and end, as compared by similarity '''
+    return trigrams('$%s$' % token)
+
+
+class TextIndex:
+    '''
+    Inverted index of the name, summary and (once fetched) description
+    words of the cached packages, so that a text search does not scan them.
+
+    Every word is a token of the vocabulary with, per field, the array of
+    the packages having it. Tokens are looked up by exact match, by prefix
+    on the sorted vocabulary and by substring or similarity (typos) through
+    the trigrams of the vocabulary. Each search word must be found in a
+    package, which is ranked by the field (see FIELD_WEIGHTS) and the kind
+    of match (see MATCH_WEIGHTS) of its words, packages named as a search
+    word first.
+
+    The index is built once from a list of packages, descriptions can be
+    added later, searches and additions can be run by different threads.
+    '''
+    FIELD_WEIGHTS = {'name': 10.0, 'summary': 3.0, 'description': 1.0}
+    MATCH_WEIGHTS = {'exact': 1.0, 'prefix': 0.7, 'substring': 0.4, 'similar': 0.3}
+    # score added to packages named as a search word
+    NAME_BONUS = 20.0
+    # summary and description words shorter than this are not indexed
+    MIN_TEXT_TOKEN = 2
+    # similar tokens share at least this Dice coefficient of trigrams
+    MIN_SIMILARITY = 0.5
+    # shorter words are not matched to similar tokens
+    MIN_SIMILAR_LENGTH = 4
+    # shorter words have no trigram, they are found as a token prefix only
+    MIN_SUBSTRING_LENGTH = 3
+
+    def __init__(self, packages, descriptions=None):
+        '''
+        index packages, descriptions is an optional function returning the
+        known description of a package (None if not fetched)
+        '''
+        start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._packages = list(packages)
+        self._docs = {po: doc for doc, po in enumerate(self._packages)}
+        self._vocabulary = {}
+        self._tokens = []
+        self._sorted = None
+        self._trigrams = {}
+        self._postings = {field: {} for field in self.FIELD_WEIGHTS}
+        self._names = {}
+        # packages whose description is indexed
+        self._described = set()
+        for doc, po in enumerate(self._packages):
+            name = po.name
+            self._names.setdefault(name.lower(), []).append(doc)
+            self._add(doc, 'name', tokens(name))
+            self._add(doc, 'summary', tokens(po.known_summary or '', self.MIN_TEXT_TOKEN))
+            if descriptions is not None:
+                description = descriptions(po)
+                if description:
+                    self._described.add(doc)
+                    self._add(doc, 'description', tokens(description, self.MIN_TEXT_TOKEN))
+        self.build_time = time.perf_counter() - start
+
+    def _token_id(self, token):
+        tid = self._vocabulary.get(token)
+        if tid is None:
+            tid = self._vocabulary[token] = len(self._tokens)
+            self._tokens.append(token)
+            self._sorted = None
+            for trigram in padded_trigrams(token):
+                self._trigrams.setdefault(trigram, array('I')).append(tid)
+        return tid
+
+    def _add(self, doc, field, words):
+        postings = self._postings[field]
+        for token in set(words):
+            tid = self._token_id(token)
+            docs = postings.get(tid)
+            if docs is None:
+                postings[tid] = array('I', (doc,))
+            else:
+                docs.append(doc)
+
+    def add_description(self, po, description):
+        '''
+        index the description of po, fetched after the index was built,
+        packages not in the index or already having one are ignored
+        '''
+        if not description:
+            return
+        with self._lock:
+            doc = self._docs.get(po)
+            if doc is None or doc in self._described:
+                return
+            self._described.add(doc)
+            self._add(doc, 'description', tokens(description, self.MIN_TEXT_TOKEN))
+
+    def __len__(self):
+        return len(self._packages)
+
+    def _matching_tokens(self, term, substring, fuzzy):
+        '''
+        list of (token id, match kind) of the vocabulary tokens matching term
+        '''
+        found = {}
+        tid = self._vocabulary.get(term)
+        if tid is not None:
+            found[tid] = 'exact'
+        if self._sorted is None:
+            self._sorted = sorted(self._tokens)
+        pos = bisect.bisect_left(self._sorted, term)
+        while pos < len(self._sorted) and self._sorted[pos].startswith(term):
+            found.setdefault(self._vocabulary[self._sorted[pos]], 'prefix')
+            pos += 1
+        term_trigrams = trigrams(term)
+        if substring and term_trigrams:
+            # tokens having every trigram of term, from the rarest one
+            lists = sorted((self._trigrams.get(trigram, ()) for trigram in term_trigrams), key=len)
+            candidates = set(lists[0])
+            for tids in lists[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(tids)
+            for tid in candidates:
+                if tid not in found and term in self._tokens[tid]:
+                    found[tid] = 'substring'
+        if not found and fuzzy and len(term) >= self.MIN_SIMILAR_LENGTH:
+            term_trigrams = padded_trigrams(term)
+            shared = {}
+            for trigram in term_trigrams:
+                for tid in self._trigrams.get(trigram, ()):
+                    shared[tid] = shared.get(tid, 0) + 1
+            for tid, count in shared.items():
+                similarity = 2.0 * count / (len(term_trigrams) + len(self._tokens[tid]))
+                if similarity >= self.MIN_SIMILARITY:
+                    found[tid] = similarity
+        return found.items()
+
+    def _term_scores(self, term, fields, substring, fuzzy):
+        ''' dictionary package -> score of the packages matching term '''
+        scores = {}
+        matches = self._matching_tokens(term, substring, fuzzy)
+        for field in fields:
+            postings = self._postings[field]
+            field_scores = {}
+            for tid, kind in matches:
+                docs = postings.get(tid)
+                if not docs:
+                    continue
+                if isinstance(kind, float):
+                    score = self.MATCH_WEIGHTS['similar'] * kind
+                else:
+                    score = self.MATCH_WEIGHTS[kind]
+                for doc in docs:
+                    if field_scores.get(doc, 0.0) < score:
+                        field_scores[doc] = score
+            weight = self.FIELD_WEIGHTS[field]
+            for doc, score in field_scores.items():
+                scores[doc] = scores.get(doc, 0.0) + weight * score
+        return scores
+
+    def search(self, words, fields=('name', 'summary'), substring=False, fuzzy=True):
+        '''
+        list of (package, score) of the packages where every word of words
+        is found in one of fields, best first. Words are found as a token
+        or a token prefix, or anywhere in a token if substring is set. If
+        fuzzy is set, a word found nowhere matches the tokens similar to it.
+        '''
+        terms = []
+        for word in words:
+            terms.extend(tokens(word))
+        if not terms:
+            return []
+        with self._lock:
+            term_scores = sorted((self._term_scores(term, fields, substring, fuzzy) for term in set(terms)),
+                                 key=len)
+            scores = term_scores[0]
+            for other in term_scores[1:]:
+                scores = {doc: score + other[doc] for doc, score in scores.items() if doc in other}
+            for word in words:
+                for doc in self._names.get(word.lower(), ()):
+                    if doc in scores:
+                        scores[doc] += self.NAME_BONUS
+            packages = self._packages
+        result = [(packages[doc], score) for doc, score in scores.items()]
+        result.sort(key=lambda hit: (-hit[1], len(hit[0].name), hit[0].name))
+        return result
+
+    def stats(self):
+        ''' indexed packages, tokens, postings and build time '''
+        with self._lock:
+            return {'packages': len(self._packages), 'tokens': len(self._tokens),
+                    'postings': sum(len(docs) for postings in self._postings.values()
+                                    for docs in postings.values()),
+                    'build_time': self.build_time}
@@ -15,6 +15,7 @@ import sys
 import platform
 import datetime
 import re
+import time
 from functools import cmp_to_key
 import manatools.aui.yui as MUI
 
@@ -32,6 +33,7 @@ from gi.repository import GLib
 
 import manatools.ui.helpdialog as helpdialog
 import manatools.ui.common as common
+import dnfdragora.backend
 import dnfdragora.basedragora
 import dnfdragora.compsicons as compsicons
 import dnfdragora.groupicons as groupicons
@@ -39,6 +41,7 @@ import dnfdragora.progress_ui as progress_ui
 import dnfdragora.dialogs as dialogs
 import dnfdragora.misc as misc
 import dnfdragora.helpinfo as helpinfo
+import dnfdragora.package_snapshot as package_snapshot
 
 import dnfdragora.config
 from dnfdragora import const
@@ -181,7 +184,6 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
   It builds the AUI layout, handles frontend events, and bridges
   asynchronous backend (dnfdaemon) notifications to widgets.
     """
-
     def __init__(self, options=None):
         '''
         constructor
@@ -200,6 +202,8 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         self.toRemove = []
         self.toInstall = []
         self.itemList = {}
+        self._packageRows = []  # itemList keys in package list order
+        self._packageRowIndex = {}
         self.appname = "dnfdragora"
         self._selPkg = None
         self.md_update_interval = 48 # check any 48 hours as default
@@ -209,9 +213,26 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
           'in_progress' : 0,
           'downloads' : {}
         } # obsoletes _files_to_download and _files_downloaded
-        # Track caching requests to avoid race conditions
-        self._caching_filter_pending = None  # Which filter (installed, updates, available) is currently being requested
-        self._caching_sequence = []          # Expected sequence of caching operations
+        # Track caching requests, installed, updates and available are requested together
+        self._caching_requests = {}  # GetPackages request id -> filter (installed, updates, available)
+        self._caching_received = {}  # filter -> packages received so far
+        self._caching_started = {}   # filter -> time.monotonic() of the request
+        self._caching_start_time = 0.0
+        self._caching_state = None   # backend.package_state() of the cached lists
+        self._outdated_scopes = set()  # scopes to cache again once the running requests end
+        self._caching_names = None   # package names listed again after a transaction
+        self._caching_verify = False # _caching_names must match the cache (see refresh_packages)
+        self._rpmdb_diff_request = None  # installed packages listed after a rpmdb change
+        # resolve list of the running transaction, applied to the cache if it succeeds
+        self._transaction_resolve = None
+        self._transaction_succeeded = False
+        self._refresh_names = None   # names to list again once the session is reset
+        # package lists of the last run, shown at startup while they are checked
+        self._snapshot = package_snapshot.PackageSnapshot(os.path.join(const.CACHE_DIR, 'packages.json.gz'))
+        self._snapshot_restored = False
+        # main loop wake ups, logged with event queue latency every LOOP_STATS_INTERVAL
+        self._loop_wakeups = 0
+        self._loop_stats_time = time.monotonic()
 
         self.packageActionValue = const.Actions.NORMAL
         # TODO... _package_name, _gpg_confirm imported from old event management
@@ -257,7 +278,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         self._search_filenames= False  # search in all file paths         (with_filenames)
         self._search_binaries = False  # search in binary paths           (with_binaries)
         self._search_src      = False  # include source RPMs              (with_src)
-        self._search_summary  = False  # search in summary, regexp only
+        self._search_summary  = False  # search in summary, by the package cache if not regexp
         self._search_text = ''
         self._search_use_regexp = False
         self._search_repos  = []       # list of repo IDs to restrict search; [] = all
@@ -849,6 +870,31 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         item.addCell(size_cell)
         return item
 
+    def _setPackageRows(self, keylist):
+        '''
+        keep the package list order (itemList keys) to find the packages
+        around the selected one, prefetching for the old list is dropped
+        '''
+        self._packageRows = keylist
+        self._packageRowIndex = {key: i for i, key in enumerate(keylist)}
+        self.backend.details_prefetcher.cancel()
+
+    def _prefetchDetailsAround(self, pkg):
+        '''
+        fetch in background the information of the PREFETCH_ROWS packages
+        before and after pkg in the list, nearest first
+        '''
+        index = self._packageRowIndex.get(pkg.fullname)
+        if index is None:
+            return
+        pkgs = []
+        for distance in range(1, self.PREFETCH_ROWS + 1):
+            for i in (index + distance, index - distance):
+                if 0 <= i < len(self._packageRows):
+                    pkgs.append(self.itemList[self._packageRows[i]]['pkg'])
+        if pkgs:
+            self.backend.details_prefetcher.prefetch(pkgs, self._detailAttributes())
+
     def _fillPackageList(self, groupName=None, filter="all") :
         '''
         fill package list filtered by group if groupName is given,
@@ -889,125 +935,64 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
                 return True
             if self.use_comps:
                 return pkg.name in group_packages
-            try:
-                groups_pkg = self.backend.get_groups_from_package(pkg) or []
-            except Exception as error:
-                logger.exception("Cannot read groups for package '%s': %s", pkg.name, error)
-                return False
-            return groupName in groups_pkg
+            return dnfdragora.backend.package_group(pkg) == groupName
+
+        def _query(scope):
+            """Query of the cached packages of scope to be listed (group and skip_other rules)."""
+            query = self.backend.cache.query(scope)
+            if groupName and groupName != 'All':
+                query = query.names(group_packages) if self.use_comps else query.group(groupName)
+            if filter == 'skip_other':
+                query = query.multilib(machine_arch)
+            return query
+
+        def _is_downgrade(pkg):
+            """Return True when pkg is older than the installed package of the same name."""
+            installed_pkgs = self.backend.get_name_packages('installed', pkg.name)
+            return bool(installed_pkgs) and pkg.fullname < max(p.fullname for p in installed_pkgs)
+
+        def _add_item(pkg):
+            item = self._createCBItem(self.packageQueue.checked(pkg),
+                               pkg.name,
+                               pkg.summary,
+                               pkg.version,
+                               pkg.release,
+                               pkg.arch,
+                               pkg.sizeM)
+            pkg_name = pkg.fullname
+            if sel_pkg :
+                if sel_pkg.fullname == pkg_name :
+                    item.setSelected(True)
+            self.itemList[pkg_name] = {
+                'pkg' : pkg, 'item' : item
+                }
+            if not self.update_only:
+                item.addCell(" ")
+                self._setStatusToItem(pkg,item)
 
+        scopes = []
         if filter == 'all' or filter == 'to_update' or filter == 'skip_other':
-            updates = self.backend.get_packages('updates')
-            for pkg in updates :
-                insert_items = _is_package_in_selected_group(pkg)
-
-                if insert_items :
-                    skip_insert = (filter == 'skip_other' and not (pkg.arch == 'noarch' or pkg.arch == machine_arch))
-                    if not skip_insert :
-                        item = self._createCBItem(self.packageQueue.checked(pkg),
-                                           pkg.name,
-                                           pkg.summary,
-                                           pkg.version,
-                                           pkg.release,
-                                           pkg.arch,
-                                           pkg.sizeM)
-                        pkg_name = pkg.fullname
-                        if sel_pkg :
-                            if sel_pkg.fullname == pkg_name :
-                                item.setSelected(True)
-                        self.itemList[pkg_name] = {
-                            'pkg' : pkg, 'item' : item
-                            }
-                        if not self.update_only:
-                            item.addCell(" ")
-                            self._setStatusToItem(pkg,item)
-
+            scopes.append('updates')
         if filter == 'all' or filter == 'installed' or filter == 'skip_other':
-            installed = self.backend.get_packages('installed')
-            for pkg in installed :
-                insert_items = _is_package_in_selected_group(pkg)
-
-                if insert_items :
-                    skip_insert = (filter == 'skip_other' and not (pkg.arch == 'noarch' or pkg.arch == machine_arch))
-                    if not skip_insert :
-                        item = self._createCBItem(self.packageQueue.checked(pkg),
-                                           pkg.name,
-                                           pkg.summary,
-                                           pkg.version,
-                                           pkg.release,
-                                           pkg.arch,
-                                           pkg.sizeM)
-                        pkg_name = pkg.fullname
-                        if sel_pkg :
-                            if sel_pkg.fullname == pkg_name :
-                                item.setSelected(True)
-                        self.itemList[pkg_name] = {
-                            'pkg' : pkg, 'item' : item
-                            }
-                        if not self.update_only:
-                            item.addCell(" ")
-                            self._setStatusToItem(pkg,item)
-
+            scopes.append('installed')
         if filter == 'all' or filter == 'not_installed' or filter == 'skip_other':
-            installed_pkgs = {}
-            if self.packageActionValue == const.Actions.DOWNGRADE:
-               installed = self.backend.get_packages('installed')
-               installed_pkgs = {p.name:p for p in installed}
-
-            available = self.backend.get_packages('available')
-            for pkg in available :
-                insert_items = _is_package_in_selected_group(pkg)
-                # if looking for downgrade we must add only the available that are installed and not upgrades
-                if self.packageActionValue == const.Actions.DOWNGRADE:
-                  if pkg.name not in installed_pkgs:
-                    insert_items = False
-                  elif pkg.fullname >= installed_pkgs[pkg.name].fullname:
-                     insert_items = False
-
-                if insert_items :
-                    skip_insert = (filter == 'skip_other' and not (pkg.arch == 'noarch' or pkg.arch == machine_arch))
-                    if not skip_insert :
-                        item = self._createCBItem(self.packageQueue.checked(pkg),
-                                           pkg.name,
-                                           pkg.summary,
-                                           pkg.version,
-                                           pkg.release,
-                                           pkg.arch,
-                                           pkg.sizeM)
-                        pkg_name = pkg.fullname
-                        if sel_pkg :
-                            if sel_pkg.fullname == pkg_name :
-                                item.setSelected(True)
-                        self.itemList[pkg_name] = {
-                            'pkg' : pkg, 'item' : item
-                            }
-                        if not self.update_only:
-                            item.addCell(" ")
-                            self._setStatusToItem(pkg,item)
+            scopes.append('available')
+
+        for scope in scopes:
+            query = _query(scope)
+            # if looking for downgrade we must add only the available that are installed and not upgrades
+            if scope == 'available' and self.packageActionValue == const.Actions.DOWNGRADE:
+                query = query.filter(_is_downgrade)
+            for pkg in query:
+                _add_item(pkg)
 
         if filter == 'GUI':
           for pkg in gui_packages:
-            insert_items = _is_package_in_selected_group(pkg)
-            if insert_items:
-              item = self._createCBItem(self.packageQueue.checked(pkg),
-                          pkg.name,
-                          pkg.summary,
-                          pkg.version,
-                          pkg.release,
-                          pkg.arch,
-                          pkg.sizeM)
-              pkg_name = pkg.fullname
-              if sel_pkg:
-                if sel_pkg.fullname == pkg_name:
-                  item.setSelected(True)
-              self.itemList[pkg_name] = {
-                'pkg': pkg, 'item': item
-                }
-              if not self.update_only:
-                item.addCell(" ")
-                self._setStatusToItem(pkg, item)
+            if _is_package_in_selected_group(pkg):
+              _add_item(pkg)
 
         keylist = sorted(self.itemList.keys())
+        self._setPackageRows(keylist)
         v = []
         for key in keylist :
             item = self.itemList[key]['item']
@@ -1090,6 +1075,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         logger.debug("Invalidating visible search results while session/cache is refreshed")
         self._search_refresh_pending = True
         self.itemList = {}
+        self._setPackageRows([])
         self._selPkg = None
         try:
             self.packageList.deleteAllItems()
@@ -1189,6 +1175,10 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
                 logger.exception("Cannot read group cache from backend: %s", error)
                 return []
 
+        if not self.use_comps and filter_name != 'GUI':
+            # RPM groups are indexed by the package cache
+            return self.backend.cache.groups(package_scope)
+
         packages = []
         if filter_name == 'GUI':
             packages = self._getGUIPackages()
@@ -1341,12 +1331,25 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
 
         return webref
 
+    def _detailAttributes(self):
+        '''
+        package attributes shown by _setInfoOnWidget
+        '''
+        attrs = ['summary', 'description', 'url']
+        for t, attr in (('requirements', 'requires'), ('files', 'files'), ('changelog', 'changelogs')):
+            if self.infoshown[t]["show"]:
+                attrs.append(attr)
+        return attrs
+
     def _setInfoOnWidget(self, pkg) :
         """
         writes package description into info widget
         """
         self.info.setValue("")
         if pkg :
+            # get all the shown attributes with one request
+            self.backend.fetch_attributes([pkg], self._detailAttributes())
+
             missing = _("Missing information")
             description = escape(pkg.description).replace("\n", "<br>") if pkg.description else ''
             s = "<h2> %s - %s </h2>%s" %(pkg.name, pkg.summary, description)
@@ -1428,12 +1431,84 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       common.warningMsgBox({'title' : title, "size": (400, 200), "text": error, "richtext":True})
       self._enableAction(True)
 
-    def _showSearchResult(self, packages, createTreeItem=False):
+    def _searchCache(self, scope, patterns):
+      '''
+      packages of a text search answered by the package cache, None if
+      dnf5daemon is needed: provides or source packages are searched, the
+      packages of scope are not all cached yet, the text index is being
+      built or the file index cannot answer the file searches.
+      Summaries, and names if fuzzy search is set, are searched in the
+      text index of the backend, best match first, then files in the file
+      index of the backend
+      '''
+      if not (self._search_nevra or self._search_summary or self._search_filenames or self._search_binaries) or \
+         self._search_provides or self._search_src:
+        return None
+      query = self.backend.search_query(scope, self._search_repos, self._search_arches, complete=True)
+      if query is None:
+        return None
+      files = []
+      if self._search_filenames or self._search_binaries:
+        files = self.backend.file_search(query, patterns, self._search_filenames, self._search_binaries,
+                                         self._search_icase)
+        if files is None:
+          return None
+      if not (self._search_nevra or self._search_summary):
+        return files
+      packages = self._searchNames(query, patterns)
+      if packages is None:
+        return None
+      found = set(packages)
+      return packages + [p for p in files if p not in found]
+
+    def _searchNames(self, query, patterns):
+      '''
+      packages of query whose name (or summary) matches patterns, see
+      _searchCache, None while the text index is built
+      '''
+      if self._search_summary:
+        words = [pattern.strip('*') for pattern in patterns]
+        fields = ('name', 'summary') if self._search_nevra else ('summary',)
+        return self.backend.text_search(query, words, fields, substring=self.fuzzy_search,
+                                        icase=self._search_icase)
+      return self.backend.name_search(query, patterns, self._search_icase, self.fuzzy_search)
+
+    def _showSearchPackages(self, packages):
+      '''
+      Shows the packages found by a local search, only the newest of each
+      name and arch if newest_only is set (as latest-limit does for dnf5daemon)
+      packages are best match first, the first one is selected if the
+      selected package is not found
+      '''
+      best = packages[0] if packages else None
+      if self.newest_only:
+        # Sort by (name, arch, EVR) using the RPM version-comparison
+        # algorithm so that, within each (name, arch) group, the newest
+        # package comes first after the reverse sort.
+        # Using only p.name as dedup key was wrong: packages with the
+        # same name but different arches (e.g. glibc.x86_64 and
+        # glibc.i686) must be kept independently.
+        pkgs = sorted(packages,
+                      key=cmp_to_key(misc.rpm_pkg_evr_cmp),
+                      reverse=True)
+        seen = set()
+        packages = []
+        for p in pkgs:
+          key = (p.name, p.arch)
+          if key not in seen:
+            packages.append(p)
+            seen.add(key)
+      self._showSearchResult(packages, createTreeItem=True, best=best)
+
+    def _showSearchResult(self, packages, createTreeItem=False, best=None):
       '''
       Shows search result package list on package view
       if createTreeItem is True clears the table and rebuilds item list
+      best is selected if the selected package is not in packages
       '''
       sel_pkg = self._selectedPackage()
+      if best is not None and (sel_pkg is None or sel_pkg not in packages):
+        sel_pkg = best
 
       #clean up tree
       if createTreeItem:
@@ -1465,6 +1540,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             self._setStatusToItem(pkg,item)
 
       keylist = sorted(self.itemList.keys())
+      self._setPackageRows(keylist)
       v = []
       for key in keylist :
           item = self.itemList[key]['item']
@@ -1510,13 +1586,12 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
     def _get_available_arches(self):
         """Return sorted list of architecture strings found in the package cache.
 
-        Collected by scanning the already-cached packages so no extra backend call
+        Taken from the arch index of the package cache so no extra backend call
         is needed. The result is cached in self._available_arches.
         """
         if self._available_arches is None:
             try:
-                pkgs = self.backend.get_packages('all')
-                self._available_arches = sorted({p.arch for p in pkgs if p.arch})
+                self._available_arches = self.backend.cache.arches()
             except Exception:
                 logger.exception("Could not collect architecture list for search dialog")
                 self._available_arches = []
@@ -1585,8 +1660,13 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             filter = _filter_to_scope.get(self._filterNameSelected(), 'all')
         if use_regexp:
           # Regexp mode: single-field search via backend.search().
-          # Field priority: summary (if checked) > names (fullname).
-          regexp_field = 'summary' if self._search_summary else 'fullname'
+          # Field priority: summary (if checked) > file list > names (fullname).
+          if self._search_summary:
+            regexp_field = 'summary'
+          elif self._search_filenames:
+            regexp_field = 'filelist'
+          else:
+            regexp_field = 'fullname'
           try:
             re.compile(search_string)
           except re.error as exc:
@@ -1601,12 +1681,29 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             self._search_text = ''
             self._search_use_regexp = False
             return False
-          self.backend.search(filter, regexp_field, search_string)
+          self.backend.search(filter, regexp_field, search_string,
+                              repos=self._search_repos, arches=self._search_arches)
         else:
           strings = [s for s in re.split('[ ,|:;]', search_string) if s]
           if self.fuzzy_search:
             strings = [s.join(["*", "*"]) for s in strings]
 
+          packages = self._searchCache(filter, strings)
+          if packages is not None:
+            logger.debug("Search of %s answered by the package cache: %d packages", strings, len(packages))
+            self._showSearchPackages(packages)
+            return True
+
+          if self._search_summary:
+            # dnf5daemon Search has no summary field, the search thread waits for the indexes
+            fields = ('name', 'summary') if self._search_nevra else ('summary',)
+            self.backend.search_text(filter, strings, fields, substring=self.fuzzy_search,
+                                     icase=self._search_icase, filenames=self._search_filenames,
+                                     binaries=self._search_binaries, repos=self._search_repos,
+                                     arches=self._search_arches)
+            self._enableAction(False)
+            return True
+
           options = {
             "scope":          filter,
             "with_nevra":     self._search_nevra,
@@ -1801,15 +1898,46 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
 
         return rebuild_package_list
 
+    # packages before and after the selected one whose details are prefetched
+    PREFETCH_ROWS = 10
+
+    # main loop timeouts in ms, NOTE 0 means no timeout for waitForEvent
+    EVENT_LOOP_PENDING_TIMEOUT = 1
+    EVENT_LOOP_BUSY_TIMEOUT = 20
+    EVENT_LOOP_IDLE_TIMEOUT = 1000
+    # time in seconds spent dequeuing backend events at every wake up
+    EVENT_DRAIN_BUDGET_RUNNING = 0.010
+    EVENT_DRAIN_BUDGET = 0.100
+    LOOP_STATS_INTERVAL = 60
+
     def _event_loop_timeout(self):
-      """Return the polling timeout used by the main AUI event loop."""
-      if self._status in (
-        DNFDragoraStatus.CACHING_AVAILABLE,
-        DNFDragoraStatus.CACHING_UPDATE,
-        DNFDragoraStatus.CACHING_INSTALLED,
-      ):
-        return 20
-      return 200
+      """
+      Return the polling timeout used by the main AUI event loop.
+
+      waitForEvent cannot be woken up from the D-Bus thread, so the timeout
+      follows what is expected: events left in the queue are managed at once,
+      replies and signals are polled every 20 ms while requests are pending or
+      the status is not RUNNING, an idle UI wakes up once a second only.
+      """
+      if not self.backend.eventQueue.empty():
+        return self.EVENT_LOOP_PENDING_TIMEOUT
+      if self._status != DNFDragoraStatus.RUNNING or self.backend.has_pending_requests():
+        return self.EVENT_LOOP_BUSY_TIMEOUT
+      return self.EVENT_LOOP_IDLE_TIMEOUT
+
+    def _log_event_loop_stats(self):
+      """Log main loop wake ups per second and backend event latency."""
+      self._loop_wakeups += 1
+      now = time.monotonic()
+      elapsed = now - self._loop_stats_time
+      if elapsed < self.LOOP_STATS_INTERVAL:
+        return
+      stats = self.backend.eventQueue.stats()
+      logger.debug("Main loop: %.1f wake ups/s, event latency avg %.1f ms max %.1f ms (%d events)",
+                   self._loop_wakeups / elapsed, stats['latency_avg_ms'],
+                   stats['latency_max_ms'], stats['delivered'])
+      self._loop_wakeups = 0
+      self._loop_stats_time = now
 
     def _handle_menu_event(self, event):
       """Handle AUI menu events and return (rebuild_package_list, request_exit)."""
@@ -2069,9 +2197,15 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
               group = self._groupNameFromItem(self.groupList, sel)
               self._fillPackageList(group, filter)
 
-      # Avoid sync GetAttribute calls while transaction is running.
+      # Avoid sync GetAttribute calls while transaction is running or packages
+      # are still being cached (the list can be shown from the first batches).
       # The daemon can legitimately be busy and not answer metadata requests quickly.
-      if self._status == DNFDragoraStatus.RUN_TRANSACTION:
+      if self._status in (
+        DNFDragoraStatus.RUN_TRANSACTION,
+        DNFDragoraStatus.CACHING_AVAILABLE,
+        DNFDragoraStatus.CACHING_UPDATE,
+        DNFDragoraStatus.CACHING_INSTALLED,
+      ):
         return
 
       sel_pkg = self._selectedPackage()
@@ -2079,6 +2213,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         if self._selPkg != sel_pkg:
           self._setInfoOnWidget(sel_pkg)
           self._selPkg = sel_pkg
+          self._prefetchDetailsAround(sel_pkg)
       else:
         self.info.setValue("")
 
@@ -2232,6 +2367,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
                           if self._trans_dialog is not None else self.dialog)
         event = _active_dialog.waitForEvent(self._event_loop_timeout())
         eventType = event.eventType()
+        self._log_event_loop_stats()
 
         rebuild_package_list = False
         request_exit = False
@@ -2246,8 +2382,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
               self.__resetDownloads()
               #restore actions to Normal
               self._updateActionView(const.Actions.NORMAL)
-              # TODO change UI and manage this better afer a transaction report
-              self.backend.clear_cache(also_groups=True)
+              self._updateCacheAfterTransaction()
               self.packageQueue.clear()
               self._invalidate_search_results()
               self._status = DNFDragoraStatus.RESET_SESSION
@@ -2255,10 +2390,9 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
               self._enableAction(False)
               # NOTE: do NOT call backend.ResetSession() here.
               # OnTransactionAfterComplete arrives as a D-Bus signal BEFORE the
-              # RunTransaction D-Bus method reply, so _sent is still True at this
-              # point. ResetSession would be rejected with "Command in progress".
-              # The RunTransaction event handler below waits for the reply (which
-              # clears _sent) and then issues ResetSession safely.
+              # RunTransaction D-Bus method reply, so the backend is still busy at
+              # this point. The RESET_SESSION status below waits for the reply
+              # (which releases RunTransaction) and then issues ResetSession.
               rebuild_package_list = True
             else:
               logger.warning("User requested close while transaction is still running")
@@ -2275,8 +2409,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
               self.__resetDownloads()
               #restore actions to Normal
               self._updateActionView(const.Actions.NORMAL)
-              # TODO change UI and manage this better afer a transaction report        
-              self.backend.clear_cache(also_groups=True)
+              self._updateCacheAfterTransaction()
               self.packageQueue.clear()
               self._invalidate_search_results()
               self._status = DNFDragoraStatus.RESET_SESSION
@@ -2284,10 +2417,9 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
               self._enableAction(False)
               # NOTE: do NOT call backend.ResetSession() here.
               # OnTransactionAfterComplete arrives as a D-Bus signal BEFORE the
-              # RunTransaction D-Bus method reply, so _sent is still True at this
-              # point. ResetSession would be rejected with "Command in progress".
-              # The RunTransaction event handler below waits for the reply (which
-              # clears _sent) and then issues ResetSession safely.
+              # RunTransaction D-Bus method reply, so the backend is still busy at
+              # this point. The RESET_SESSION status below waits for the reply
+              # (which releases RunTransaction) and then issues ResetSession.
               rebuild_package_list = True
           else:
             rebuild_package_list, request_exit = self._handle_widget_event(event)
@@ -2305,7 +2437,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
 
         self._refresh_ui_after_event(rebuild_package_list)
         self._sync_apply_button_state()
-        if self._status == DNFDragoraStatus.RUNNING and self._caching_filter_pending is None:
+        if self._status == DNFDragoraStatus.RUNNING and not self._caching_requests:
           # Keep pointer state sane on platforms where a stale busy cursor can survive
           # asynchronous startup/caching transitions.
           MUI.YUI.app().normalCursor()
@@ -2367,6 +2499,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       if event == 'OnTransactionActionStart':
         self._transaction_noreply_warned = False
       elif event == 'OnTransactionAfterComplete' or event == 'OnTransactionTimeoutEvent':
+        self._transaction_succeeded = event == 'OnTransactionAfterComplete' and bool(data.get('success'))
         if self._trans_dialog is not None:
           self._trans_dialog.mark_complete(event == 'OnTransactionAfterComplete')
         else:
@@ -2380,7 +2513,7 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       if self._offline_finish_action_pending is None:
         return
 
-      if self.backend._sent:
+      if self.backend.is_busy():
         return
 
       if not hasattr(self.backend, 'OfflineGetStatus') or not hasattr(self.backend, 'OfflineSetFinishAction'):
@@ -2947,10 +3080,12 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       @params pkg_flt (available, installed, updates)
       “all”, “installed”, “available”, “upgrades”, “upgradable”
       '''
-      # Prevent race conditions: wait for pending request to complete
-      if self._caching_filter_pending is not None:
-        logger.warning('Caching request for %s ignored: pending request for %s still in progress',
-                       pkg_flt, self._caching_filter_pending)
+      # Prevent race conditions: the same filter must not be requested twice
+      if pkg_flt in self._caching_requests.values():
+        logger.warning('Caching request for %s ignored: previous request still in progress', pkg_flt)
+        return
+      if pkg_flt not in ('installed', 'updates', 'available'):
+        logger.error("Wrong package filter %s", pkg_flt)
         return
 
       logger.debug('Start caching %s', pkg_flt)
@@ -2994,35 +3129,55 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
         "group",
         ],
         "scope": filter }
-      
-      # Mark this filter as pending BEFORE changing status and making the async call
-      self._caching_filter_pending = pkg_flt
-      
-      if pkg_flt == 'updates':
-        self.infobar.info_sub(_("Caching updates"))
-        self._status = DNFDragoraStatus.CACHING_UPDATE
-      elif pkg_flt == 'installed':
+      if self._caching_names:
+        # only the packages involved in a transaction, matched by name
+        options.update({"patterns": sorted(self._caching_names),
+                        "with_provides": False, "with_filenames": False, "with_binaries": False})
+
+      self._caching_received[pkg_flt] = 0
+      self._caching_started[pkg_flt] = time.monotonic()
+      # results arrive in batches, so that the package list can be shown
+      # before the whole scope is cached
+      request_id = self.backend.GetPackages(options, progressive=not self._caching_names)
+      self._caching_requests[request_id] = pkg_flt
+      logger.info('Requested GetPackages for filter=%s (pkg_flt=%s), request %s',
+                  filter, pkg_flt, request_id)
+      self._updateCachingStatus()
+
+    def _updateCachingStatus(self):
+      '''
+      set the caching status from the filters still being cached
+      '''
+      pending = set(self._caching_requests.values())
+      if 'installed' in pending:
         self.infobar.info_sub(_("Caching installed"))
         self._status = DNFDragoraStatus.CACHING_INSTALLED
-        #self.backend.reloadDaemon()
-      elif pkg_flt == 'available':
+      elif 'updates' in pending:
+        self.infobar.info_sub(_("Caching updates"))
+        self._status = DNFDragoraStatus.CACHING_UPDATE
+      elif 'available' in pending:
         self.infobar.info_sub(_("Caching available"))
         self._status = DNFDragoraStatus.CACHING_AVAILABLE
-        #self.backend.reloadDaemon()
-      else:
-        logger.error("Wrong package filter %s", pkg_flt)
-        self._caching_filter_pending = None
-        return
-      
-      logger.info('Requesting GetPackages for filter=%s (pkg_flt=%s), status=%s',
-                  filter, pkg_flt, self._status)
-      self.backend.GetPackages(options)
 
-    def _populateCache(self, pkg_flt, po_list) :
+    def _populateCache(self, pkg_flt, po_list, complete=True) :
       # is this type of packages is already cached ?
       if not self.backend.cache.is_populated(pkg_flt):
         pkgs = self.backend.make_pkg_object(po_list, pkg_flt)
-        self.backend.cache.populate(pkg_flt, pkgs)
+        self.backend.cache.populate(pkg_flt, pkgs, complete)
+      self._caching_received[pkg_flt] = self._caching_received.get(pkg_flt, 0) + len(po_list)
+
+    def _isFirstScreenBatch(self, pkg_flt, batch):
+      '''
+      True if this GetPackages batch is the first one of the packages shown
+      by the selected filter, i.e. the package list can be filled early
+      '''
+      if batch != 0 or self._search_text or self._viewNameSelected() != 'all':
+        return False
+      first_screen = {
+        'to_update': 'updates',
+        'not_installed': 'available',
+      }
+      return first_screen.get(self._filterNameSelected(), 'installed') == pkg_flt
 
     def _check_MD_cache_expired(self):
       ''' Check metadata expired if enabled or dnf makecache is disabled '''
@@ -3052,18 +3207,247 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       self.config.userPreferences['settings']['metadata']['last_update'] = now_str
       self.md_last_refresh_date =  now_str
 
-    def _start_caching_packages(self):
-      ''' Start caching packages from installed
-        next ones are requested after automatically.
+    def _start_caching_packages(self, scopes=package_snapshot.SCOPES, names=None, verify=False):
+      ''' Start caching installed, updates and available packages (or only
+        the given scopes), the requests are run together.
+        If names is given only the packages with those names are listed
+        again, e.g. after a transaction (see _updateCacheAfterTransaction),
+        verify tells if the installed ones must already match the cache.
       '''
       self.infobar.reset_all()
-      self.backend.cache.reset()
+      self._caching_names = names
+      self._caching_verify = verify
+      self._rpmdb_diff_request = None
+      if not names:
+        if len(scopes) == len(package_snapshot.SCOPES):
+          self.backend.cache.reset()
+        else:
+          for pkg_flt in scopes:
+            self.backend.cache.reset_scope(pkg_flt)
       # Reset caching tracking
-      self._caching_filter_pending = None
-      self._caching_sequence = []
+      self._caching_requests = {}
+      self._caching_received = {}
+      self._caching_started = {}
+      self._caching_start_time = time.monotonic()
       self.infobar.info(_('Creating packages cache'))
-      logger.info('Starting caching sequence: installed -> updates -> available')
-      self._cachingRequest('installed')
+      logger.info('Starting caching of installed, updates and available packages')
+      # taken before listing, a change while listing outdates the snapshot
+      self._caching_state = self._listedState(scopes, names)
+      if not names:
+        self._outdated_scopes.difference_update(scopes)
+      # NOTE fedora adds package in updates also as installable, PackageCache
+      #      keeps them as updates whatever the order replies arrive in
+      for pkg_flt in scopes:
+        self._cachingRequest(pkg_flt)
+
+    def _listedState(self, scopes, names):
+      '''
+      state of the cached lists once scopes are listed (only names if
+      given, after a rpmdb change): the rpmdb state moves forward if the
+      installed packages are listed, the repository one only if updates and
+      available are listed in full, as package_snapshot.changed_scopes
+      '''
+      state = self.backend.package_state()
+      if state is None or not self._caching_state or \
+         (not names and set(scopes) >= set(package_snapshot.SCOPES)):
+        return state
+      listed = dict(self._caching_state)
+      if 'installed' in scopes:
+        listed['rpmdb'] = state['rpmdb']
+      if not names and {'updates', 'available'} <= set(scopes):
+        listed['repos'] = state['repos']
+      return listed
+
+    def _cacheOutdatedScopes(self):
+      '''
+      cache again the scopes found outdated (see SnapshotChecked event)
+      while other packages were being listed, once nothing is pending
+      '''
+      if not self._outdated_scopes or self._status != DNFDragoraStatus.RUNNING or \
+         self._caching_requests or self._rpmdb_diff_request is not None:
+        return
+      scopes = [pkg_flt for pkg_flt in package_snapshot.SCOPES if pkg_flt in self._outdated_scopes]
+      logger.info("Package snapshot outdated, caching %s again", ", ".join(scopes))
+      self._start_caching_packages(scopes)
+
+    def _updateCacheAfterTransaction(self):
+      '''
+      Apply the transaction that has been run to the package cache, instead
+      of caching every package again. The packages involved are listed again
+      once the session has been reset (see ResetSession event). Everything
+      is cleared, and cached again, if the transaction cannot be applied.
+      '''
+      names = None
+      if self._transaction_resolve is not None and self._transaction_succeeded:
+        names = self.backend.apply_transaction(self._transaction_resolve)
+      self._transaction_resolve = None
+      self._transaction_succeeded = False
+      self._refresh_names = names
+      self.backend.clear_cache(also_groups=True, keep_packages=names is not None)
+
+    def _restoreSnapshot(self):
+      '''
+      Fill the package cache from the snapshot saved by the last run, only
+      once at startup. The snapshot is checked in background and the scopes
+      that are outdated are cached again (see SnapshotChecked event).
+      Returns False if there is no usable snapshot.
+      '''
+      if self._snapshot_restored:
+        return False
+      self._snapshot_restored = True
+      snapshot = self._snapshot.load()
+      if snapshot is None:
+        return False
+      state, scopes = snapshot
+      # the cached lists are the ones of the snapshot state
+      self._caching_state = state
+      start = time.monotonic()
+      self.backend.cache.reset()
+      self._caching_received = {}
+      try:
+        for pkg_flt in package_snapshot.SCOPES:
+          self._populateCache(pkg_flt, scopes[pkg_flt])
+      except Exception as e:
+        logger.warning("Package snapshot ignored: %s", e)
+        self.backend.cache.reset()
+        self._snapshot.remove()
+        return False
+      logger.info("Package list restored from snapshot in %.3f seconds (%s)", time.monotonic() - start,
+                  ", ".join("%d %s" % (self._caching_received[flt], flt) for flt in package_snapshot.SCOPES))
+      self._enableUpdateAll(self._caching_received['updates'] > 0)
+      threading.Thread(target=self._checkSnapshot, args=(state,), daemon=True).start()
+      return True
+
+    def _enableUpdateAll(self, has_updates):
+      ''' Enable/disable "Update All" menu item based on updates availability '''
+      try:
+          if hasattr(self, 'ActionMenu') and 'update_all' in self.ActionMenu:
+              self.menubar.setItemEnabled(self.ActionMenu['update_all'], has_updates)
+      except Exception:
+          pass
+
+    def _onRpmdbChanged(self, rpmdb):
+      '''
+      The rpmdb has been changed, by another tool if no caching or
+      transaction is in progress: list the installed packages to find out
+      which ones changed (see _onInstalledListed).
+      '''
+      if self._status != DNFDragoraStatus.RUNNING or self._caching_requests or \
+         self._rpmdb_diff_request is not None:
+        # packages are listed again after the change
+        logger.debug("rpmdb changed while in status %s, ignored", self._status)
+        return
+      if self._caching_state and self._caching_state.get('rpmdb') == rpmdb:
+        logger.debug("rpmdb changed, cached packages are up to date")
+        return
+      logger.info("rpmdb changed, looking for installed packages changes")
+      options = {"package_attrs": ["name", "epoch", "version", "release", "arch"], "scope": "installed"}
+      self._rpmdb_diff_request = self.backend.GetPackages(options)
+
+    def _onInstalledListed(self, pkgs):
+      '''
+      installed packages listed after a rpmdb change, only the installed
+      and updates packages with the names that changed are listed again,
+      available ones only for the packages that have been removed
+      '''
+      names, removed = self.backend.installed_changes(pkgs)
+      if not names:
+        logger.info("rpmdb changed, installed packages are the same")
+        if self._caching_state:
+          self._caching_state['rpmdb'] = self.backend.rpmdb_state()
+        self._cacheOutdatedScopes()
+        return
+      logger.info("rpmdb changed by another tool: %s", ", ".join(sorted(names)))
+      scopes = ['installed', 'updates']
+      if removed:
+        scopes.append('available')
+      self._start_caching_packages(scopes, names=names)
+
+    def _checkSnapshot(self, state):
+      '''
+      compare the snapshot state with the current one (thread), the
+      outdated scopes are posted as SnapshotChecked event
+      '''
+      changed = package_snapshot.changed_scopes(state, self.backend.package_state())
+      self.backend.eventQueue.put({'event': 'SnapshotChecked', 'value': {'changed': changed}})
+
+    def _saveSnapshot(self):
+      '''
+      save the cached package lists for the next run, the file is written
+      in background
+      '''
+      if self._caching_state is None:
+        return
+      scopes = {pkg_flt: [po.as_dbus_pkg() for po in self.backend.cache.packages(pkg_flt)]
+                for pkg_flt in package_snapshot.SCOPES}
+      threading.Thread(target=self._snapshot.save, args=(self._caching_state, scopes), daemon=True).start()
+
+    def _onPackagesCached(self):
+      '''
+      installed, updates and available packages are cached, complete startup
+      returns True if package list must be rebuilt
+      '''
+      rebuild_package_list = False
+      self.backend.build_text_index()
+      # packages or metadata may have changed, a file index in use is updated
+      self.backend.update_file_index()
+      rpm_groups = None
+      if self.use_comps :
+        # let's show the dialog with a poll event
+        rpm_groups = self.backend.GetGroups(sync=True)
+      self.gIcons = compsicons.CompsIcons(rpm_groups, self.group_icon_path) if self.use_comps else  groupicons.GroupIcons(self.group_icon_path)
+
+      self._status = DNFDragoraStatus.RUNNING
+
+      if not self._runtime_option_managed and 'install' in self.options.keys() :
+        # Convert relative RPM file paths to absolute paths
+        pkgs = []
+        for item in self.options['install']:
+          if item.endswith('.rpm') and not os.path.isabs(item):
+            # It's a relative RPM file path, convert to absolute
+            pkgs.append(os.path.abspath(item))
+          else:
+            # It's either a package name or already an absolute path
+            pkgs.append(item)
+
+        self.backend.Install(pkgs, sync=True)
+        self._buildTransaction()
+        self._runtime_option_managed = True
+        return False
+
+      if not self._runtime_option_managed and 'show' in self.options.keys() :
+        self._search_text = self.options['show']
+        self._search_nevra = True
+        self._search_scope = 'all'
+        self._runtime_option_managed = True
+        self._updateSearchState()
+        self._searchPackages()
+
+      if not self._runtime_option_managed and 'remove' in self.options.keys() :
+        pkgs = " ".join(self.options['remove'])
+        self.backend.Remove(pkgs, sync=True)
+        self._buildTransaction()
+        self._runtime_option_managed = True
+        return False
+
+      self._enableAction(True)
+      filter = self._filterNameSelected()
+      self.checkAllUpdateButton.setEnabled(filter == 'to_update')
+
+      if self._search_refresh_pending:
+        logger.debug("Search refresh pending after cache rebuild; rerunning saved search with stored dialog options")
+        rebuild_package_list = self._rebuildPackageListWithSearchGroup()
+      else:
+        sel = self.tree.selectedItem()
+        if sel :
+          rebuild_package_list = self._rebuildPackageListWithSearchGroup()
+        else:
+          rebuild_package_list = True
+      self.infobar.reset_all()
+      # Defensive reset for Qt/GNOME Wayland startup path:
+      # avoid leaving a stale busy cursor after caching completes.
+      MUI.YUI.app().normalCursor()
+      return rebuild_package_list
 
     def _OnBuildTransaction(self, info):
       '''
@@ -3170,6 +3554,9 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
 
           self.infobar.info(_('Applying changes to the system'))
           self._show_trans_dialog()
+          # an offline transaction changes nothing until the next boot
+          self._transaction_resolve = None if offline_requested else resolve
+          self._transaction_succeeded = False
           self.backend.RunTransaction(run_options)
 
           self._status = DNFDragoraStatus.RUN_TRANSACTION
@@ -3185,13 +3572,15 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
       '''
       rebuild_package_list = False
       try:
-        counter = 0
-        # On RUNNING we manage UI events, on other status dnfdaeomon let's try to increase
-        # dequeuing when we're not in RUNNING then
-        count_max = 1000 if self._status != DNFDragoraStatus.RUNNING else 1
-
-        while counter < count_max:
-          counter = counter + 1
+        # On RUNNING we keep the UI responsive, on other status dnfdaemon events
+        # have the priority. Events left are managed at the next (1 ms) wake up.
+        budget = self.EVENT_DRAIN_BUDGET_RUNNING if self._status == DNFDragoraStatus.RUNNING \
+          else self.EVENT_DRAIN_BUDGET
+        deadline = time.monotonic() + budget
+
+        while True:
+          if time.monotonic() > deadline:
+            break
           item = self.backend.eventQueue.get_nowait()
           event = item['event']
           info = item['value']
@@ -3243,10 +3632,20 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             self.backend_locked = False
           elif (event == 'ResetSession'):
             logger.info("Event %s received (%s)", event, info['result'])
-            # ResetSession has been invoked let's refresh data
-            self.backend.clear_cache(also_groups=True)
-            self._status = DNFDragoraStatus.STARTUP
-            self._enableAction(False)
+            if self._refresh_names is not None:
+              # the package cache has been updated with the transaction run,
+              # list again only the packages involved
+              names, self._refresh_names = self._refresh_names, None
+              self._status = DNFDragoraStatus.RUNNING
+              if names:
+                self._start_caching_packages(names=names, verify=True)
+              else:
+                rebuild_package_list = self._onPackagesCached()
+            else:
+              # ResetSession has been invoked let's refresh data
+              self.backend.clear_cache(also_groups=True)
+              self._status = DNFDragoraStatus.STARTUP
+              self._enableAction(False)
           elif (event == 'ReloadMetadata'):
             if not info['result']:
               logger.warning("Event %s received (%s)", event, info['result'])
@@ -3264,144 +3663,80 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             # CleanCache has been invoked let's refresh data => ReloadMetadata
             self.backend.ReloadMetadata()            
           elif (event == 'GetPackages') or (event == 'GetPackages_fd'):
-            logger.debug('%s event received: status=%s, pending_filter=%s, has_error=%s',
-                        event, self._status, self._caching_filter_pending, bool(info.get('error')))
-            
+            pkg_flt = self._caching_requests.get(item.get('request_id'))
+            logger.debug('%s event received: status=%s, filter=%s, has_error=%s',
+                        event, self._status, pkg_flt, bool(info.get('error')))
+
             if not info['error']:
-              # Verify this response matches the expected pending filter
-              current_pending = self._caching_filter_pending
-              
-              if current_pending is None:
-                logger.warning('GetPackages response received but no pending request tracked. Status=%s', self._status)
-                # Try to continue based on status for backward compatibility
-                current_pending = 'installed' if self._status == DNFDragoraStatus.CACHING_INSTALLED else \
-                                  'updates' if self._status == DNFDragoraStatus.CACHING_UPDATE else \
-                                  'available' if self._status == DNFDragoraStatus.CACHING_AVAILABLE else None
-              
-              if current_pending == 'installed':
-                po_list = info['result']
-                logger.info('Received %d installed packages', len(po_list))
-                # we requested installed for caching
-                self._populateCache('installed', po_list)
-                self.infobar.set_progress(0.33)
-                self._caching_filter_pending = None  # Clear pending before next request
-                self._cachingRequest('updates')
-              elif current_pending == 'updates':
-                po_list = info['result']
-                logger.info('Received %d update packages', len(po_list))
-                # we requested updates for caching
-                self._populateCache('updates', po_list)
-                self.infobar.set_progress(0.66)
-                
-                # Enable/disable "Update All" menu item based on updates availability
-                has_updates = len(po_list) > 0
-                try:
-                    if hasattr(self, 'ActionMenu') and 'update_all' in self.ActionMenu:
-                        self.menubar.setItemEnabled(self.ActionMenu['update_all'], has_updates)
-                except Exception:
-                    pass                
-                
-                self._caching_filter_pending = None  # Clear pending before next request
-                self._cachingRequest('available')
-              elif current_pending == 'available':
-                po_list = info['result']
-                logger.info('Received %d available packages', len(po_list))
-                rpm_groups = None
-                if self.use_comps :
-                  # let's show the dialog with a poll event
-                  rpm_groups = self.backend.GetGroups(sync=True)
-                self.gIcons = compsicons.CompsIcons(rpm_groups, self.group_icon_path) if self.use_comps else  groupicons.GroupIcons(self.group_icon_path)
-
-                # we requested available for caching
-                self.infobar.set_progress(1.0)
-                self._populateCache('available', po_list)
-                self._caching_filter_pending = None  # Clear pending
-                self._status = DNFDragoraStatus.RUNNING
-
-                if not self._runtime_option_managed and 'install' in self.options.keys() :
-                  # Convert relative RPM file paths to absolute paths
-                  pkgs = []
-                  for item in self.options['install']:
-                    if item.endswith('.rpm') and not os.path.isabs(item):
-                      # It's a relative RPM file path, convert to absolute
-                      pkgs.append(os.path.abspath(item))
-                    else:
-                      # It's either a package name or already an absolute path
-                      pkgs.append(item)
-
-                  self.backend.Install(pkgs, sync=True)
-                  self._buildTransaction()
-                  self._runtime_option_managed = True
-                  return
-
-                if not self._runtime_option_managed and 'show' in self.options.keys() :
-                  self._search_text = self.options['show']
-                  self._search_nevra = True
-                  self._search_scope = 'all'
-                  self._runtime_option_managed = True
-                  self._updateSearchState()
-                  self._searchPackages()
-
-                if not self._runtime_option_managed and 'remove' in self.options.keys() :
-                  pkgs = " ".join(self.options['remove'])
-                  self.backend.Remove(pkgs, sync=True)
-                  self._buildTransaction()
-                  self._runtime_option_managed = True
-                  return
-
-                self._enableAction(True)
-                filter = self._filterNameSelected()
-                self.checkAllUpdateButton.setEnabled(filter == 'to_update')
-
-                if self._search_refresh_pending:
-                  logger.debug("Search refresh pending after cache rebuild; rerunning saved search with stored dialog options")
-                  rebuild_package_list = self._rebuildPackageListWithSearchGroup()
+              if pkg_flt is None and item.get('request_id') == self._rpmdb_diff_request:
+                self._rpmdb_diff_request = None
+                self._onInstalledListed(info['result'])
+              elif pkg_flt is None:
+                logger.warning('GetPackages response for untracked request %s ignored. Status=%s',
+                               item.get('request_id'), self._status)
+              elif not info.get('complete', True):
+                # partial batch, the request is still in progress
+                self._populateCache(pkg_flt, info['result'], complete=False)
+                if self._isFirstScreenBatch(pkg_flt, info.get('batch')):
+                  logger.info('First %d %s packages received, filling package list',
+                              self._caching_received[pkg_flt], pkg_flt)
+                  # return now to let the package list be shown
+                  return True
+              elif self._caching_names:
+                del self._caching_requests[item['request_id']]
+                self._caching_received[pkg_flt] = len(info['result'])
+                if not self.backend.refresh_packages(pkg_flt, self._caching_names, info['result'],
+                                                     verify=self._caching_verify):
+                  logger.warning("Package cache does not match the transaction, caching all packages again")
+                  self._enableAction(False)
+                  self._start_caching_packages()
+                  continue
+                logger.info('Listed again %d %s packages in %.3f seconds', self._caching_received[pkg_flt],
+                            pkg_flt, time.monotonic() - self._caching_started[pkg_flt])
+                if pkg_flt == 'updates':
+                  self._enableUpdateAll(len(self.backend.cache.packages('updates')) > 0)
+                if self._caching_requests:
+                  self._updateCachingStatus()
                 else:
-                  sel = self.tree.selectedItem()
-                  if sel :
-                    rebuild_package_list = self._rebuildPackageListWithSearchGroup()
-                  else:
-                    rebuild_package_list = True
-                self.infobar.reset_all()
-                # Defensive reset for Qt/GNOME Wayland startup path:
-                # avoid leaving a stale busy cursor after caching completes.
-                MUI.YUI.app().normalCursor()
+                  logger.info('Packages cache updated in %.3f seconds',
+                              time.monotonic() - self._caching_start_time)
+                  self._caching_names = None
+                  self._saveSnapshot()
+                  rebuild_package_list = self._onPackagesCached()
+                  self._cacheOutdatedScopes()
               else:
-                logger.error('GetPackages response for unexpected filter: %s (status=%s)',
-                            current_pending, self._status)
-                self._caching_filter_pending = None
+                self._populateCache(pkg_flt, info['result'])
+                del self._caching_requests[item['request_id']]
+                logger.info('Cached %d %s packages in %.3f seconds', self._caching_received[pkg_flt],
+                            pkg_flt, time.monotonic() - self._caching_started[pkg_flt])
+                self.infobar.set_progress((3 - len(self._caching_requests)) / 3.0)
+
+                if pkg_flt == 'updates':
+                  self._enableUpdateAll(self._caching_received[pkg_flt] > 0)
+
+                if self._caching_requests:
+                  self._updateCachingStatus()
+                else:
+                  logger.info('Packages cache created in %.3f seconds',
+                              time.monotonic() - self._caching_start_time)
+                  self._saveSnapshot()
+                  rebuild_package_list = self._onPackagesCached()
+                  self._cacheOutdatedScopes()
             else:
-              logger.error("GetPackages error for filter=%s: %s", self._caching_filter_pending, info['error'])
-              self._caching_filter_pending = None  # Clear pending on error
+              logger.error("GetPackages error for filter=%s: %s", pkg_flt, info['error'])
+              self._caching_requests = {}  # Clear pending on error
               MUI.YUI.app().normalCursor()
               raise UIError(str(info['error']))
 
           elif (event == 'RESearch'):
-            if not info['error']:
-              pkgs = None
-              packages = None
-              if self.newest_only:
-                # Sort by (name, arch, EVR) using the RPM version-comparison
-                # algorithm so that, within each (name, arch) group, the newest
-                # package comes first after the reverse sort.
-                # Using only p.name as dedup key was wrong: packages with the
-                # same name but different arches (e.g. glibc.x86_64 and
-                # glibc.i686) must be kept independently.
-                pkgs = sorted(info['result'],
-                              key=cmp_to_key(misc.rpm_pkg_evr_cmp),
-                              reverse=True)
-                seen = set()
-                packages = []
-                for p in pkgs:
-                  key = (p.name, p.arch)
-                  if key not in seen:
-                    packages.append(p)
-                    seen.add(key)
-              else:
-                 packages = info['result']
-              self._showSearchResult(packages, createTreeItem=True)
+            if info.get('search_id', self.backend.search_id) != self.backend.search_id:
+              logger.debug("Result of a cancelled search ignored")
+            elif not info['error']:
+              if not info.get('complete', True):
+                logger.debug("Search in progress, %d packages found", len(info['result']))
+              self._showSearchPackages(info['result'])
             else:
-              self._showErrorAndContinue(_("Search error using regular expression"), info['error'])
+              self._showErrorAndContinue(_("Search error"), info['error'])
               logger.error("Search error: %s", info['error'])
 
           elif (event == 'Search'):
@@ -3473,6 +3808,20 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
             self._enableAction(False)
             # Enabled repositories are changes we need to force caching again
             self.backend.ResetSession()
+          elif (event == 'RpmdbChanged'):
+            self._onRpmdbChanged(info['rpmdb'])
+          elif (event == 'SnapshotChecked'):
+            changed = info['changed']
+            if not changed:
+              logger.info("Package snapshot is up to date")
+            else:
+              self._outdated_scopes.update(changed)
+              if self._status != DNFDragoraStatus.RUNNING or self._caching_requests or \
+                 self._rpmdb_diff_request is not None:
+                logger.info("Package snapshot outdated (%s), cached again once the running requests end",
+                            ", ".join(changed))
+              else:
+                self._cacheOutdatedScopes()
           else:
             logger.warning("Unmanaged event received %s - info %s", event, str(info))
 
@@ -3480,14 +3829,17 @@ class mainGui(dnfdragora.basedragora.BaseDragora):
           self._try_finalize_offline_finish_action()
           if self._status == DNFDragoraStatus.STARTUP:
             self._status = DNFDragoraStatus.RUNNING
-            self._start_caching_packages()
+            if self._restoreSnapshot():
+              rebuild_package_list = self._onPackagesCached()
+            else:
+              self._start_caching_packages()
           elif self._status == DNFDragoraStatus.RESET_SESSION:
             # RunTransaction (do_transaction) is fire-and-forget: its D-Bus ack
-            # clears _sent without queuing any event, and it arrives AFTER the
-            # OnTransactionAfterComplete signal. Poll on each timer tick until
-            # _sent is cleared before issuing ResetSession.
-            if not self.backend._sent:
-              logger.debug("RESET_SESSION: _sent cleared, issuing ResetSession")
+            # releases the request without queuing any event, and it arrives AFTER
+            # the OnTransactionAfterComplete signal. Poll on each timer tick until
+            # the backend is idle before issuing ResetSession.
+            if not self.backend.is_busy():
+              logger.debug("RESET_SESSION: backend idle, issuing ResetSession")
               self.backend.ResetSession()
 
 
@@ -845,7 +845,9 @@ class Updater:
                             update_next)
 
             self.__scheduler.run(blocking=False)
-            time.sleep(0.5)
+            # wake up as soon as dnf5daemon replies, scheduled checks are
+            # still run at least every 0.5 s
+            self.__backend.eventQueue.wait(0.5)
 
         logger.info("Update loop end")
 
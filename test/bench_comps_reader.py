@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark of the comps loaders: time and peak memory.
+
+Writes a synthetic Fedora sized comps file (groups with translated names and
+descriptions, as the real ones), compressed with xz as in the repositories,
+and builds the comps index with:
+
+  tree      ElementTree.parse of the whole document, then the index
+  stream    comps_reader.read_comps (iterparse, elements dropped once read)
+  libdnf5   Client._build_comps_base + CompsIndex.from_libdnf5, the system
+            repositories are loaded (only with the real libdnf5 bindings)
+
+Peak memory is the tracemalloc peak for the python loaders, the growth of
+the process max RSS for libdnf5 (its allocations are not traced).
+
+Usage:
+    python test/bench_comps_reader.py [groups [languages]]
+"""
+
+import lzma
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+try:
+    import libdnf5
+    HAVE_LIBDNF5 = hasattr(libdnf5, 'conf')
+except ImportError:
+    HAVE_LIBDNF5 = False
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora import comps_reader
+from dnfdragora.comps_index import CompsIndex
+
+PACKAGES_PER_GROUP = 40
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+
+def make_comps(path, groups, languages):
+    langs = ['l%02d' % i for i in range(languages)]
+    with lzma.open(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<comps>\n')
+        for g in range(groups):
+            f.write('  <group>\n    <id>group-%d</id>\n    <name>Group %d</name>\n' % (g, g))
+            for lang in langs:
+                f.write('    <name xml:lang="%s">Group %d (%s)</name>\n' % (lang, g, lang))
+            f.write('    <description>Packages of the synthetic group %d</description>\n' % g)
+            for lang in langs:
+                f.write('    <description xml:lang="%s">Translated description of group %d</description>\n'
+                        % (lang, g))
+            f.write('    <packagelist>\n')
+            for p in range(PACKAGES_PER_GROUP):
+                f.write('      <packagereq type="default">package-%d</packagereq>\n' % ((g * 7 + p * 13) % 20000))
+            f.write('    </packagelist>\n  </group>\n')
+        f.write('</comps>\n')
+
+
+def tree_index(path, lang):
+    with comps_reader.open_comps(path) as f:
+        root = ET.parse(f).getroot()
+    groups = []
+    for group in root.iterfind('group'):
+        name = group.findtext('name')
+        for child in group.iterfind('name'):
+            if child.get(XML_LANG) == lang:
+                name = child.text
+        groups.append((group.findtext('id'), name,
+                       [req.text for req in group.iterfind('packagelist/packagereq')]))
+    return CompsIndex(groups)
+
+
+def measure(label, load):
+    # timed without tracemalloc, it slows allocations down a lot
+    start = time.perf_counter()
+    index = load()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-8s %4d groups %8.1f ms  peak %7.1f MiB" % (label, len(index), elapsed * 1000, peak / 2.0 ** 20))
+
+
+def measure_libdnf5():
+    from dnfdragora.dnfd_client import Client
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index = CompsIndex.from_libdnf5(Client._build_comps_base(None))
+    elapsed = time.perf_counter() - start
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+    print("%-8s %4d groups %8.1f ms  max RSS +%6.1f MiB (system repositories)" % (
+        'libdnf5', len(index), elapsed * 1000, growth / 1024.0))
+
+
+def run(groups, languages):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'comps.xml.xz')
+        make_comps(path, groups, languages)
+        print("comps.xml.xz: %d groups, %d languages, %d KiB" % (
+            groups, languages, os.path.getsize(path) / 1024))
+        measure('tree', lambda: tree_index(path, 'l07'))
+        measure('stream', lambda: comps_reader.read_comps([path], lang='l07'))
+    if HAVE_LIBDNF5:
+        measure_libdnf5()
+    else:
+        print("libdnf5  not available, skipped")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 600,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 60)
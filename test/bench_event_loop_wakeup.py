@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Simulation of the mainGui event loop: backend event latency and wake ups.
+
+waitForEvent is modelled as a wait on the user input (a click wakes it up,
+a backend event does not, as with AUI) and backend replies are put into a
+dnfd_client.CoalescingEventQueue by a timer thread, like the D-Bus thread
+does. Both loop policies run the same scenarios:
+
+  old   fixed 200 ms timeout (20 ms while caching), one backend event per
+        wake up in RUNNING status
+  new   mainGui._event_loop_timeout and time budget drain: 1 ms if events
+        are left, 20 ms while requests are pending, 1 s when idle
+
+Usage:
+    python test/bench_event_loop_wakeup.py [seconds per scenario]
+"""
+
+import sys
+import threading
+import time
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora.dnfd_client import CoalescingEventQueue, Empty
+
+HANDLE_COST = 0.0005  # seconds spent by the UI on each backend event
+
+
+class Loop:
+    '''A main loop in RUNNING status, policy is 'old' or 'new'.'''
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.queue = CoalescingEventQueue()
+        self.user_input = threading.Event()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.wakeups = 0
+
+    def request(self, reply_after, events=1):
+        ''' user clicks, the backend replies reply_after seconds later '''
+        with self.lock:
+            self.pending += 1
+
+        def _reply():
+            for i in range(events):
+                self.queue.put({'event': 'Search', 'value': {'result': i}})
+            with self.lock:
+                self.pending -= 1
+        threading.Timer(reply_after, _reply).start()
+        self.user_input.set()
+
+    def timeout(self):
+        if self.policy == 'old':
+            return 200
+        if not self.queue.empty():
+            return 1
+        with self.lock:
+            if self.pending:
+                return 20
+        return 1000
+
+    def drain(self):
+        try:
+            if self.policy == 'old':
+                self.queue.get_nowait()
+                time.sleep(HANDLE_COST)
+                return
+            deadline = time.monotonic() + 0.010
+            while time.monotonic() <= deadline:
+                self.queue.get_nowait()
+                time.sleep(HANDLE_COST)
+        except Empty:
+            pass
+
+    def run(self, duration):
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            clicked = self.user_input.wait(self.timeout() / 1000.0)
+            self.wakeups += 1
+            if clicked:
+                self.user_input.clear()
+            else:
+                self.drain()
+        # let late replies arrive and be delivered before reading stats
+        while not self.queue.empty() or self.pending:
+            self.user_input.wait(self.timeout() / 1000.0)
+            self.drain()
+
+
+def idle(loop, duration):
+    pass
+
+
+def interactive(loop, duration):
+    ''' a request every 300 ms, replied in 30 ms '''
+    end = time.monotonic() + duration - 0.3
+    while time.monotonic() < end:
+        loop.request(0.030)
+        time.sleep(0.3)
+
+
+def burst(loop, duration):
+    ''' one request replied with 50 events (e.g. progressive batches) '''
+    loop.request(0.050, events=50)
+
+
+def run(duration):
+    for scenario in (idle, interactive, burst):
+        line = []
+        for policy in ('old', 'new'):
+            loop = Loop(policy)
+            feeder = threading.Thread(target=scenario, args=(loop, duration))
+            feeder.start()
+            loop.run(duration)
+            feeder.join()
+            stats = loop.queue.stats()
+            line.append("%s %5.1f wake ups/s latency avg %7.1f ms max %7.1f ms" % (
+                policy, loop.wakeups / duration, stats['latency_avg_ms'], stats['latency_max_ms']))
+        print("%-11s %s | %s" % (scenario.__name__, line[0], line[1]))
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
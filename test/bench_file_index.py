@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark of the file path index (dnfdragora.file_index).
+
+Writes the segment of N synthetic packages of FILES files each, as
+FileIndex.update does for a repository filelists, then times:
+
+  build     write_segment of the packages (filelists parsing excluded)
+  open      FileSegment of the written file, mmap and header only
+  index     path, path prefix and binary name lookups in the segment
+  scan      the file lists matched one by one, as a search without index
+
+A dnf5daemon Search with with_filenames or with_binaries adds a D-Bus
+round trip and the load of the filelists metadata to the scan, it cannot
+be timed without the daemon.
+
+Usage:
+    python test/bench_file_index.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora.file_index import BINARY_DIRS, FileSegment, write_segment
+
+FILES = 40
+REPEAT = 5
+DIRS = ('/usr/bin', '/usr/lib64/tool-%d', '/usr/share/doc/tool-%d', '/usr/share/man/man1', '/usr/share/locale/it')
+SEARCHES = [
+    # label, lookup, pattern
+    ('exact path', 'path', '/usr/bin/tool-4242'),
+    ('path prefix', 'prefix', '/usr/share/doc/tool-4242'),
+    ('binary name', 'binary', 'tool-4242'),
+    ('binary name prefix', 'binary prefix', 'tool-424'),
+]
+
+
+def packages(n):
+    for i in range(n):
+        files = ['/usr/bin/tool-%d' % i]
+        for j in range(1, FILES):
+            directory = DIRS[j % len(DIRS)]
+            files.append('%s/file-%d' % (directory % i if '%' in directory else directory, i * FILES + j))
+        yield 'tool-%d-0:1.0-1.fc40.x86_64' % i, files
+
+
+def scan(pkgs, lookup, pattern):
+    found = set()
+    for full_nevra, files in pkgs:
+        for path in files:
+            if lookup == 'path':
+                match = path == pattern
+            elif lookup == 'prefix':
+                match = path.startswith(pattern)
+            else:
+                directory, _, name = path.rpartition('/')
+                match = directory in BINARY_DIRS and (name.startswith(pattern) if lookup == 'binary prefix'
+                                                      else name == pattern)
+            if match:
+                found.add(full_nevra)
+    return found
+
+
+def lookup_index(segment, lookup, pattern):
+    if lookup in ('path', 'prefix'):
+        results = segment.paths(pattern, prefix=lookup == 'prefix')
+    else:
+        results = segment.names(pattern, prefix=lookup == 'binary prefix', dirs=BINARY_DIRS)
+    return {segment.package(pkg) for pkg, _ in results}
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return result, (time.perf_counter() - start) / REPEAT
+
+
+def main(n):
+    pkgs = list(packages(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fedora.idx')
+        start = time.perf_counter()
+        files = write_segment(path, pkgs)
+        build = time.perf_counter() - start
+        segment, open_time = timed(lambda: FileSegment(path))
+        print('%d packages, %d files, segment of %.1f MiB built in %.0f ms, opened in %.3f ms' % (
+            n, files, os.path.getsize(path) / 2**20, build * 1000, open_time * 1000))
+        print('%-24s %8s %10s %8s %10s' % ('search', 'index', 'ms', 'scan', 'ms'))
+        for label, lookup, pattern in SEARCHES:
+            found, elapsed = timed(lambda: lookup_index(segment, lookup, pattern))
+            scanned, scan_elapsed = timed(lambda: scan(pkgs, lookup, pattern))
+            assert found == scanned
+            print('%-24s %8d %10.3f %8d %10.1f' % (label, len(found), elapsed * 1000,
+                                                  len(scanned), scan_elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 70000)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark of the list_fd pipe readers.
+
+Feeds a synthetic GetPackages_fd stream (one JSON object per package, read
+back in 64 KiB slices as the client does) through the previous string
+rebuilding reader and through dnfd_client.JsonStreamDecoder.
+
+Usage:
+    python test/bench_list_fd_decoder.py [objects ...]
+"""
+
+import json
+import sys
+import time
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora.dnfd_client import JsonStreamDecoder
+
+CHUNK_SIZE = 65536
+
+
+def make_stream(count):
+    '''Build a list_fd like payload with package dicts.'''
+    parts = []
+    for i in range(count):
+        parts.append(json.dumps({
+            'nevra': 'package-%d-0:1.%d-1.fc40.x86_64' % (i, i % 17),
+            'repo_id': 'updates' if i % 3 else 'fedora',
+            'install_size': 1024 * i,
+            'download_size': 512 * i,
+            'summary': 'Synthetic package number %d – dnfdragora benchmark' % i,
+            'group': 'Applications/System',
+        }, ensure_ascii=False))
+    return '\n'.join(parts).encode('utf-8')
+
+
+def chunks(payload):
+    for i in range(0, len(payload), CHUNK_SIZE):
+        yield payload[i:i + CHUNK_SIZE]
+
+
+def old_reader(payload):
+    '''The reader used before JsonStreamDecoder, kept here for comparison.'''
+    parser = json.JSONDecoder()
+    buf = ""
+    items = []
+    for chunk in chunks(payload):
+        buffer = chunk.decode(errors='ignore')
+        if buffer:
+            buf += buffer
+            while buf:
+                try:
+                    obj, end = parser.raw_decode(buf)
+                    items.append(obj)
+                    buf = buf[end:].lstrip()
+                except json.decoder.JSONDecodeError:
+                    break
+    return items
+
+
+def new_reader(payload):
+    decoder = JsonStreamDecoder()
+    items = []
+    for chunk in chunks(payload):
+        items.extend(decoder.feed(chunk))
+    items.extend(decoder.close())
+    return items
+
+
+def run(count):
+    payload = make_stream(count)
+    results = {}
+    for name, reader in (('old', old_reader), ('new', new_reader)):
+        t_start = time.perf_counter()
+        items = reader(payload)
+        results[name] = (time.perf_counter() - t_start, items)
+    old_time, old_items = results['old']
+    new_time, new_items = results['new']
+    lost = sum(1 for a, b in zip(old_items, new_items) if a != b)
+    print("%7d objects %6.1f MiB: old %7.3f s  new %7.3f s  speedup %5.1fx  "
+          "(old reader mangled %d objects)" % (
+              count, len(payload) / 1048576.0, old_time, new_time,
+              old_time / new_time if new_time else 0.0, lost))
+    assert len(new_items) == count
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark of the PackageCache indexes: population and lookups.
+
+Populates a PackageCacheWithFilters with N synthetic packages (PackageStore
+rows, as DnfRootBackend.make_pkg_object builds them) split in installed,
+updates and available, then times the lookups with the cache indexes
+against the linear scans they replace:
+
+  name      packages of a name in a scope (downgrade pairing of the list)
+  arches    arches of every cached package (search dialog)
+  nevra     package of a NEVRA, tuple key vs full name
+  search    regular expression on package names (backend.search)
+
+Usage:
+    python test/bench_package_cache.py [N]
+"""
+
+import re
+import sys
+import time
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import backend as base_backend
+from dnfdragora import dnf_backend
+from dnfdragora.package_store import PackageStore
+
+REPOS = ('fedora', 'updates', 'updates-testing')
+ARCHES = ('x86_64', 'noarch', 'i686')
+LOOKUPS = 2000
+
+
+class _Backend:
+    attribute_store = None
+
+
+def package_values(n, repo, offset=0):
+    for i in range(offset, offset + n):
+        yield {
+            'name': 'package-%d' % (i // 2),
+            'epoch': '0',
+            'version': '%d.%d' % (i % 5, i % 13),
+            'release': '%d.fc40' % (i % 4 + 1),
+            'arch': ARCHES[i % 3],
+            'repo_id': repo or REPOS[i % 3],
+            'install_size': 1024 * (i % 5000),
+            'summary': 'Synthetic package number %d' % i,
+        }
+
+
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print('  %-40s %10.3f ms' % (label, elapsed * 1000))
+    return result
+
+
+def main(n):
+    backend = _Backend()
+    store = PackageStore()
+
+    def rows(values, action):
+        return [dnf_backend.DnfPackageRow(backend, store, store.add(v, action)) for v in values]
+
+    installed = rows(package_values(n // 4, '@System'), 'r')
+    updates = rows(package_values(n // 20, None, n // 8), 'u')
+    available = rows(package_values(n - n // 4 - n // 20, None, n // 4), 'i')
+
+    print('%d packages' % n)
+    cache = base_backend.PackageCacheWithFilters()
+
+    def populate():
+        cache.reset()
+        cache.populate('installed', installed)
+        cache.populate('updates', updates)
+        cache.populate('available', available)
+    timed('populate', populate)
+
+    names = [po.name for po in available[::max(1, len(available) // LOOKUPS)]][:LOOKUPS]
+    print('%d name lookups in installed' % len(names))
+    def scan_names():
+        installed_pkgs = {po.name: po for po in cache._get_packages('installed')}
+        return [installed_pkgs.get(name) for name in names]
+    timed('scan, {name: po} of installed', scan_names)
+    timed('index, name_packages', lambda: [cache.name_packages('installed', name) for name in names])
+
+    print('arches of every package')
+    timed('scan', lambda: sorted({po.arch for scope in ('installed', 'updates', 'available')
+                                  for po in cache._get_packages(scope)}))
+    timed('index, arches', cache.arches)
+
+    keys = [(po.name, po.epoch, po.ver, po.rel, po.arch) for po in available[:LOOKUPS]]
+    print('%d NEVRA lookups' % len(keys))
+    timed('full name, get_package', lambda: [cache.get_package(
+        '%s-%s-%s.%s' % (n_, v, r, a)) for n_, e, v, r, a in keys])
+    timed('tuple, get_nevra', lambda: [cache.get_nevra(*key) for key in keys])
+
+    print('search names matching ^package-1.*7$')
+    regexp = re.compile('^package-1.*7$')
+    timed('scan', lambda: [po for scope in ('installed', 'updates', 'available')
+                           for po in cache._get_packages(scope) if regexp.search(po.name)])
+    timed('index, match_packages', lambda: cache.match_packages(None, 'name', regexp.search))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark of the package cache memory: DnfPackage objects vs PackageStore rows.
+
+Builds N synthetic packages from GetPackages like values (every string is a
+new object, as decoded from a D-Bus reply) with:
+
+  objects   DnfPackage, one object with its own __dict__ per package
+  store     PackageStore rows read through DnfPackageRow views
+
+and keeps them in a PackageCacheWithFilters as the UI does. Each run is a
+separate process, memory is the growth of its resident set size (RSS)
+while building, the values are generated on the fly so that only the
+packages remain.
+
+Usage:
+    python test/bench_package_store.py [N ...]
+"""
+
+import gc
+import os
+import subprocess
+import sys
+import time
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import backend as base_backend
+from dnfdragora import dnf_backend
+from dnfdragora.package_store import PackageStore
+
+SIZES = (10000, 50000, 100000)
+MODES = ('objects', 'store')
+REPOS = ('fedora', 'updates', 'updates-testing', 'rpmfusion-free')
+ARCHES = ('x86_64', 'noarch', 'i686')
+
+
+class _Backend:
+    attribute_store = None
+
+
+def rss():
+    ''' current resident set size in bytes '''
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def package_values(n):
+    for i in range(n):
+        yield {
+            'name': 'package-%d' % (i // 2),
+            'epoch': '%d' % (i % 7 == 0),
+            'version': '%d.%d.%d' % (i % 5, i % 13, i % 31),
+            'release': '%d.fc40' % (i % 4 + 1),
+            'arch': ARCHES[i % 3][:],
+            'repo_id': '%s' % REPOS[i % 4],
+            'install_size': 1024 * (i % 5000),
+            'download_size': 512 * (i % 5000),
+            'summary': 'Synthetic package number %d of the benchmark, with a summary' % i,
+        }
+
+
+def build(mode, n):
+    backend = _Backend()
+    cache = base_backend.PackageCacheWithFilters()
+    if mode == 'objects':
+        pkgs = [dnf_backend.DnfPackage(backend, dbus_pkg=values, action='i')
+                for values in package_values(n)]
+    else:
+        store = PackageStore()
+        pkgs = [dnf_backend.DnfPackageRow(backend, store, store.add(values, 'i'))
+                for values in package_values(n)]
+    cache.populate('available', pkgs)
+    return cache
+
+
+def child(mode, n):
+    gc.collect()
+    before = rss()
+    start = time.perf_counter()
+    cache = build(mode, n)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    print(rss() - before, elapsed, len(cache.packages('available')))
+
+
+def main(sizes):
+    print('%8s %8s %10s %10s %10s' % ('packages', 'mode', 'RSS MiB', 'B/package', 'build ms'))
+    for n in sizes:
+        for mode in MODES:
+            out = subprocess.check_output([sys.executable, __file__, '--child', mode, str(n)],
+                                          cwd=os.path.dirname(os.path.abspath(__file__)))
+            grown, elapsed, count = out.split()
+            grown = int(grown)
+            assert int(count) == n
+            print('%8d %8s %10.1f %10d %10.0f' % (n, mode, grown / 2**20, grown // n, float(elapsed) * 1000))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or SIZES)
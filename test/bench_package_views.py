@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark of the shared filtered views of PackageCacheWithFilters.
+
+Populates the cache with N synthetic packages and replays the package
+list requests of a UI session: filling the list with the 'all' filter,
+switching filters, the group tree, a regexp search, selecting all the
+updates, then a transaction that changes installed and updates. Each
+request is served by the shared views and, as before them, by copying and
+filtering the scope sets; the copies made and the time are compared.
+
+Usage:
+    python test/bench_package_views.py [N]
+"""
+
+import sys
+import time
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import backend as base_backend
+from dnfdragora import dnf_backend
+from dnfdragora.package_store import PackageStore
+
+ALL = ('updates', 'installed', 'available')
+# (action, scopes requested), as get_packages calls of the UI
+SESSION = [
+    ('fill list, all', [('updates',), ('installed',), ('available',)]),
+    ('group tree', [ALL]),
+    ('fill list, installed', [('installed',)]),
+    ('fill list, all', [('updates',), ('installed',), ('available',)]),
+    ('regexp search', [ALL]),
+    ('select all updates', [('updates',)]),
+    ('fill list, not installed', [('available',)]),
+    ('transaction', None),
+    ('fill list, all', [('updates',), ('installed',), ('available',)]),
+    ('group tree', [ALL]),
+    ('fill list, to update', [('updates',)]),
+]
+
+
+class _Backend:
+    attribute_store = None
+
+
+def make_rows(n):
+    backend = _Backend()
+    store = PackageStore()
+    rows = {}
+    counts = {'installed': n // 4, 'updates': n // 20}
+    counts['available'] = n - counts['installed'] - counts['updates']
+    i = 0
+    for scope, action in (('installed', 'r'), ('updates', 'u'), ('available', 'i')):
+        rows[scope] = []
+        for _ in range(counts[scope]):
+            values = {'name': 'package-%d' % i, 'epoch': '0', 'version': '1.%d' % (i % 7),
+                      'release': '1.fc40', 'arch': ('x86_64', 'noarch', 'i686')[i % 3],
+                      'repo_id': '@System' if scope == 'installed' else 'fedora'}
+            rows[scope].append(dnf_backend.DnfPackageRow(backend, store, store.add(values, action)))
+            i += 1
+    return rows
+
+
+def replay(cache, rows, shared):
+    copies = 0
+    start = time.perf_counter()
+    for action, requests in SESSION:
+        if requests is None:
+            # an update installed: it leaves updates, a new installed package
+            update = cache.packages('updates')[0]
+            values = dict(update.as_dbus_pkg(), repo_id='@System')
+            installed = dnf_backend.DnfPackageRow(update.backend, update._store,
+                                                  update._store.add(values, 'r'))
+            cache.apply_transaction([installed], [])
+            continue
+        for scopes in requests:
+            if shared:
+                cache.view(scopes)
+            else:
+                pkgs = []
+                for scope in scopes:
+                    pkgs += cache.filters.run(list(getattr(cache, scope)))
+                copies += 1
+    elapsed = time.perf_counter() - start
+    if shared:
+        copies = cache.view_stats()['copies']
+    return copies, elapsed
+
+
+def main(n):
+    rows = make_rows(n)
+    requests = sum(len(requests or ()) for _, requests in SESSION)
+    print('%d packages, %d get_packages requests' % (n, requests))
+    for shared in (False, True):
+        cache = base_backend.PackageCacheWithFilters()
+        for scope in ALL:
+            cache.populate(scope, rows[scope])
+        copies, elapsed = replay(cache, rows, shared)
+        label = 'shared views' if shared else 'copy and filter'
+        print('  %-16s %3d copies %10.1f ms' % (label, copies, elapsed * 1000))
+        if shared:
+            print('  %d views shared, %d package references not copied' % (
+                cache.view_stats()['hits'], cache.view_stats()['packages_not_copied']))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 70000)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark of the regular expression search of an attribute column.
+
+Builds the file list column (see DnfRootBackend.attribute_column) of N
+synthetic packages of FILES files each and times a few regular
+expressions matched:
+
+  1 process   in the searching thread, as __search_loop did
+  pool        by ParallelSearch with 2 and 4 processes (spawn start
+              excluded, it is paid once per session), it only pays off
+              with as many CPUs
+
+Per package GetAttribute calls, as the search did before the column is
+listed, add a D-Bus round trip per package and cannot be timed here.
+
+Usage:
+    python test/bench_search_worker.py [N]
+"""
+
+import os
+import sys
+import time
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora.search_worker import ParallelSearch, column_text
+
+FILES = 40
+# the last one is found nowhere, every text is matched to the end
+PATTERNS = [r'/usr/bin/tool-\d+7$', r'^/usr/share/doc/tool-1\d*/README-7$', r'x11|wayland']
+DIRS = ('/usr/bin', '/usr/lib64/tool', '/usr/share/doc/tool', '/usr/share/man/man1', '/usr/share/locale/it')
+
+
+def file_lists(n):
+    for i in range(n):
+        yield column_text(['%s-%d/%s-%d' % (DIRS[j % len(DIRS)], i, 'README' if j % 7 == 0 else 'file', j)
+                           if j else '/usr/bin/tool-%d' % i for j in range(FILES)])
+
+
+def main(n):
+    texts = list(file_lists(n))
+    print('%d packages, %.1f MiB of file lists, %d CPUs' % (
+        n, sum(len(text) for text in texts) / 2**20, os.cpu_count() or 1))
+    searches = [('1 process', ParallelSearch(max_workers=1))]
+    for workers in (2, 4):
+        search = ParallelSearch(max_workers=workers)
+        search.search('warm up', texts[:1000] * 10)
+        searches.append(('pool, %d processes' % workers, search))
+    print('%-36s %-20s %8s %10s' % ('pattern', 'search', 'found', 'ms'))
+    try:
+        for pattern in PATTERNS:
+            for label, search in searches:
+                start = time.perf_counter()
+                found = search.search(pattern, texts)
+                print('%-36s %-20s %8d %10.1f' % (pattern, label, len(found),
+                                                  (time.perf_counter() - start) * 1000))
+    finally:
+        for _, search in searches:
+            search.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 70000)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark of the text index of the cached packages (dnfdragora.text_index).
+
+Populates a PackageCacheWithFilters with N synthetic packages whose names
+and summaries are made of a few dozen words, builds the TextIndex as
+DnfRootBackend.build_text_index does, then times word, prefix, substring
+and misspelled searches on names and summaries:
+
+  index     TextIndex search restricted to the query scope (text_search)
+  scan      the packages of the scope matched one by one, as the name
+            globs of PackageQuery and as dnf5daemon Search does on its side
+
+A dnf5daemon Search adds a D-Bus round trip to the scan, waiting for any
+request in progress, it cannot be timed without the daemon.
+
+Usage:
+    python test/bench_text_index.py [N]
+"""
+
+import re
+import sys
+import time
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from stubs import FakeRootBackend, make_cache
+
+WORDS = ('python', 'perl', 'rust', 'golang', 'lib', 'devel', 'doc', 'tools', 'server', 'client',
+         'gnome', 'kde', 'qt', 'gtk', 'font', 'texlive', 'plugin', 'data', 'utils', 'common',
+         'editor', 'library', 'bindings', 'documentation', 'development', 'files', 'module',
+         'extension', 'network', 'graphics', 'audio', 'video', 'parser', 'compiler', 'terminal')
+ARCHES = ('x86_64', 'noarch', 'i686')
+REPEAT = 5
+SEARCHES = [
+    # label, words, fields, substring
+    ('word in names', ['terminal'], ('name',), False),
+    ('prefix in names and summaries', ['graph'], ('name', 'summary'), False),
+    ('two words in summaries', ['font', 'bindings'], ('summary',), False),
+    ('substring in names', ['ompil'], ('name',), True),
+    ('misspelled word', ['documantation'], ('name', 'summary'), False),
+]
+
+
+def package_rows(n):
+    rows = []
+    for i in range(n):
+        scope, action = ('installed', 'r') if i % 4 == 0 else ('updates', 'u') if i % 20 == 1 else ('available', 'i')
+        words = [WORDS[(i * k) % len(WORDS)] for k in (1, 7, 11)]
+        rows.append((scope, action, {
+            'name': '%s-%s-%d' % (words[0], words[1], i), 'arch': ARCHES[i % 3],
+            'repo_id': '@System' if scope == 'installed' else 'fedora',
+            'summary': 'The %s %s for %s, number %d' % (words[1], words[2], words[0], i)}))
+    return rows
+
+
+def scan(query, words, fields, substring):
+    if substring:
+        regexps = [re.compile(re.escape(word), re.IGNORECASE) for word in words]
+    else:
+        regexps = [re.compile(r'\b' + re.escape(word), re.IGNORECASE) for word in words]
+    values = {'name': lambda po: po.name, 'summary': lambda po: po.known_summary or ''}
+    return [po for po in query
+            if all(any(regexp.search(values[field](po)) for field in fields) for regexp in regexps)]
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return result, (time.perf_counter() - start) / REPEAT
+
+
+def main(n):
+    backend = FakeRootBackend(make_cache(package_rows(n)))
+    start = time.perf_counter()
+    backend.build_text_index()
+    backend._text_index_thread.join()
+    index = backend.text_index()
+    print('%d packages, index built in %.0f ms (%.0f ms waited for), %s' % (
+        n, index.build_time * 1000, (time.perf_counter() - start) * 1000, index.stats()))
+    query = backend.search_query('all')
+    print('%-32s %8s %10s %8s %10s' % ('search', 'index', 'ms', 'scan', 'ms'))
+    for label, words, fields, substring in SEARCHES:
+        found, elapsed = timed(lambda: backend.text_search(query, words, fields, substring))
+        scanned, scan_elapsed = timed(lambda: scan(query, words, fields, substring))
+        print('%-32s %8d %10.2f %8d %10.2f' % (label, len(found), elapsed * 1000,
+                                              len(scanned), scan_elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 70000)
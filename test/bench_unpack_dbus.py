@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Benchmark of dnfd_client.unpack_dbus on typical dnf5daemon reply shapes.
+
+Compares the previous isinstance chain (copied below) with the type
+dispatch implementation on:
+  - a GetPackages(piped=False) listing (array of package dicts)
+  - a Goal.resolve result (array of structs with nested dicts)
+  - a History list (transactions holding arrays of package dicts)
+  - signal arguments (small tuples of scalars)
+
+Values are built with the dbus types installed by test/stubs.py when
+dbus-python is not available, otherwise with the real ones.
+
+Usage:
+    python test/bench_unpack_dbus.py [repeat]
+"""
+
+import sys
+import time
+
+try:
+    import dbus
+except ImportError:
+    from stubs import install_dependency_stubs
+    install_dependency_stubs()
+    import dbus
+
+from stubs import REPO_ROOT  # noqa: F401  (puts the workspace first in sys.path)
+from dnfdragora.dnfd_client import unpack_dbus
+
+
+def old_unpack_dbus(data):
+    ''' the isinstance chain used before the type dispatch table '''
+    if (isinstance(data, dbus.String) or
+        isinstance(data, dbus.ObjectPath) or
+        isinstance(data, dbus.Signature)):
+        data = str(data)
+    elif isinstance(data, dbus.Boolean):
+        data = bool(data)
+    elif (isinstance(data, dbus.Int64) or
+          isinstance(data, dbus.UInt64) or
+          isinstance(data, dbus.Int32) or
+          isinstance(data, dbus.UInt32) or
+          isinstance(data, dbus.Int16) or
+          isinstance(data, dbus.UInt16) or
+          isinstance(data, dbus.Byte)):
+        data = int(data)
+    elif isinstance(data, dbus.Double):
+        data = float(data)
+    elif isinstance(data, dbus.Array):
+        data = [old_unpack_dbus(value) for value in data]
+    elif isinstance(data, dbus.Struct):
+        data = [old_unpack_dbus(value) for value in data]
+    elif isinstance(data, dbus.Dictionary):
+        new_data = dict()
+        for key in data.keys():
+            new_data[old_unpack_dbus(key)] = old_unpack_dbus(data[key])
+        data = new_data
+    return data
+
+
+def S(value):
+    return dbus.String(value)
+
+
+def package(i):
+    return dbus.Dictionary({
+        S('nevra'): S('package%d-0:1.%d-1.fc40.x86_64' % (i, i % 17)),
+        S('repo_id'): S('updates'),
+        S('install_size'): dbus.UInt64(1024 * i),
+        S('download_size'): dbus.UInt64(512 * i),
+        S('summary'): S('Synthetic package %d' % i),
+        S('group'): S('Applications/System'),
+        S('is_installed'): dbus.Boolean(i % 2),
+    })
+
+
+def packages_listing(count=5000):
+    return dbus.Array([package(i) for i in range(count)])
+
+
+def resolve_result(count=500):
+    items = []
+    for i in range(count):
+        items.append(dbus.Struct((
+            S('Package'), S('Upgrade'), S('User'),
+            dbus.Dictionary({S('replaces'): dbus.Array([dbus.Int32(i)])}),
+            package(i),
+        )))
+    return (dbus.Array(items), dbus.UInt32(0))
+
+
+def history_list(count=200, per_transaction=20):
+    transactions = []
+    for t in range(count):
+        transactions.append(dbus.Dictionary({
+            S('id'): dbus.Int64(t),
+            S('dt_begin'): dbus.Int64(1700000000 + t),
+            S('dt_end'): dbus.Int64(1700000100 + t),
+            S('user_id'): dbus.UInt32(0),
+            S('description'): S('dnf upgrade'),
+            S('packages'): dbus.Array([package(t * per_transaction + i)
+                                       for i in range(per_transaction)]),
+        }))
+    return dbus.Array(transactions)
+
+
+def signal_args(count=100000):
+    return [(dbus.ObjectPath('/org/rpm/dnf/v0/s1'), S('repo-%d' % (i % 10)),
+             dbus.Int64(i), dbus.Int64(count)) for i in range(count)]
+
+
+def timeit(func, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        func(payload)
+        elapsed = time.perf_counter() - t_start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(repeat):
+    signals = signal_args()
+    cases = [
+        ('GetPackages listing (5000)', packages_listing(), lambda f, d: f(d)),
+        ('resolve result (500)', resolve_result(),
+         lambda f, d: (f(d[1]), f(d[0]))),
+        ('HistoryList (200x20)', history_list(), lambda f, d: f(d)),
+        ('signal args (100000)', signals,
+         lambda f, d: [[f(arg) for arg in args] for args in d]),
+    ]
+    for title, payload, run in cases:
+        assert run(old_unpack_dbus, payload) == run(unpack_dbus, payload)
+        old = timeit(lambda d: run(old_unpack_dbus, d), payload, repeat)
+        new = timeit(lambda d: run(unpack_dbus, d), payload, repeat)
+        print("%-28s old %8.2f ms  new %8.2f ms  speedup %4.1fx" % (
+            title, old * 1000, new * 1000, old / new if new else 0.0))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
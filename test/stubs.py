@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Minimal stubs for the runtime-only modules dnfdragora imports.
+
+dbus, libdnf5 and gi are only available on a real Fedora/Mageia system;
+unit tests and benchmarks install these stubs before importing dnfdragora.
+
+The package cache fixtures shared by the tests (make_cache, make_row and
+FakeRootBackend) import dnfdragora, they are only usable once the stubs
+are installed.
+"""
+
+import builtins
+import gettext
+import os
+import queue
+import sys
+import types
+
+# Ensure imports come from this workspace copy of dnfdragora, not site-packages.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def install_dependency_stubs():
+    """Install minimal stubs for external modules used at import time."""
+    if not hasattr(builtins, '_'):
+        # bin/dnfdragora installs the translation function
+        gettext.install('dnfdragora')
+    if 'dbus' not in sys.modules:
+        dbus_mod = types.ModuleType('dbus')
+
+        class _DBusString(str):
+            pass
+
+        class _DBusObjectPath(str):
+            pass
+
+        class _DBusSignature(str):
+            pass
+
+        class _DBusBoolean(int):
+            pass
+
+        class _DBusArray(list):
+            pass
+
+        class _DBusStruct(tuple):
+            pass
+
+        class _DBusDictionary(dict):
+            pass
+
+        dbus_mod.String = _DBusString
+        dbus_mod.ObjectPath = _DBusObjectPath
+        dbus_mod.Signature = _DBusSignature
+        dbus_mod.Boolean = _DBusBoolean
+        dbus_mod.Int64 = int
+        dbus_mod.UInt64 = int
+        dbus_mod.Int32 = int
+        dbus_mod.UInt32 = int
+        dbus_mod.Int16 = int
+        dbus_mod.UInt16 = int
+        dbus_mod.Byte = int
+        dbus_mod.Double = float
+        dbus_mod.Array = _DBusArray
+        dbus_mod.Struct = _DBusStruct
+        dbus_mod.Dictionary = _DBusDictionary
+
+        dbus_mod.Interface = lambda obj, dbus_interface=None: obj
+
+        class _SystemBus:
+            def __init__(self, mainloop=None):
+                self.mainloop = mainloop
+
+            def get_object(self, *_args, **_kwargs):
+                return object()
+
+            def remove_signal_receiver(self, *_args, **_kwargs):
+                return None
+
+        dbus_mod.SystemBus = _SystemBus
+
+        dbus_mainloop = types.ModuleType('dbus.mainloop')
+        dbus_mainloop_glib = types.ModuleType('dbus.mainloop.glib')
+        dbus_mainloop_glib.DBusGMainLoop = lambda set_as_default=True: object()
+
+        dbus_mod.mainloop = dbus_mainloop
+        dbus_mainloop.glib = dbus_mainloop_glib
+
+        sys.modules['dbus'] = dbus_mod
+        sys.modules['dbus.mainloop'] = dbus_mainloop
+        sys.modules['dbus.mainloop.glib'] = dbus_mainloop_glib
+
+    if 'libdnf5' not in sys.modules:
+        libdnf5_mod = types.ModuleType('libdnf5')
+        libdnf5_mod.base = types.SimpleNamespace(Base=lambda: object())
+        libdnf5_mod.comps = types.SimpleNamespace(GroupQuery=lambda *_args, **_kwargs: [])
+        sys.modules['libdnf5'] = libdnf5_mod
+
+    if 'gi' not in sys.modules:
+        gi_mod = types.ModuleType('gi')
+        gi_repo = types.ModuleType('gi.repository')
+
+        class _BusType:
+            SYSTEM = 0
+
+        gi_repo.Gio = types.SimpleNamespace(
+            BusType=_BusType,
+            bus_get_sync=lambda *_args, **_kwargs: object(),
+            DBusProxy=types.SimpleNamespace(
+                new_sync=lambda *a, **k: object(),
+                new=lambda *a, **k: None,
+            ),
+        )
+        gi_repo.GLib = types.SimpleNamespace()
+        gi_repo.GObject = types.SimpleNamespace()
+        gi_mod.repository = gi_repo
+        sys.modules['gi'] = gi_mod
+        sys.modules['gi.repository'] = gi_repo
+
+
+def install_const_stub():
+    """Import dnfdragora.const without a build tree or an rpm binary.
+
+    const.py needs the generated dnfdragora.version module and runs
+    ``rpm --eval %_arch`` at import time; both are faked here so the real
+    constant tables are used.
+    """
+    if 'dnfdragora.const' in sys.modules:
+        return
+    if 'dnfdragora.version' not in sys.modules:
+        version_mod = types.ModuleType('dnfdragora.version')
+        version_mod.__version__ = '0.0.0'
+        sys.modules['dnfdragora.version'] = version_mod
+
+    import subprocess
+    check_output = subprocess.check_output
+    subprocess.check_output = lambda *_args, **_kwargs: b'x86_64\n'
+    try:
+        import dnfdragora.const  # noqa: F401
+    finally:
+        subprocess.check_output = check_output
+
+
+# GetPackages values of a package not given by make_cache rows
+PACKAGE_DEFAULTS = {'epoch': '0', 'version': '1.0', 'release': '1.fc40', 'arch': 'x86_64', 'repo_id': 'fedora'}
+SCOPES = ('installed', 'updates', 'available')
+
+
+class RowBackend:
+    """Backend of the package rows, no attribute store."""
+    attribute_store = None
+
+
+def make_row(store, values, action):
+    """DnfPackageRow of values (see PACKAGE_DEFAULTS) added to store."""
+    from dnfdragora import dnf_backend
+    return dnf_backend.DnfPackageRow(RowBackend(), store, store.add(dict(PACKAGE_DEFAULTS, **values), action))
+
+
+def make_cache(rows):
+    """PackageCacheWithFilters of the (scope, action, values) rows, see make_row.
+
+    The rows share one PackageStore, every scope is populated, empty if no
+    row is in it.
+    """
+    from dnfdragora import backend
+    from dnfdragora.package_store import PackageStore
+    store = PackageStore()
+    pkgs = {scope: [] for scope in SCOPES}
+    for scope, action, values in rows:
+        pkgs[scope].append(make_row(store, values, action))
+    cache = backend.PackageCacheWithFilters()
+    for scope in SCOPES:
+        cache.populate(scope, pkgs[scope])
+    return cache
+
+
+def _fake_root_backend():
+    from dnfdragora import backend
+    from dnfdragora import dnf_backend
+    from dnfdragora import file_index
+    from dnfdragora.attribute_store import AttributeStore
+
+    class FakeRootBackend(dnf_backend.DnfRootBackend):
+        """DnfRootBackend without a dnf5daemon session nor rpmdb watcher.
+
+        Its state is set by DnfRootBackend._init_state, with an attribute
+        store in memory unless given and the file index in file_index_dir.
+        Events are put into a queue.Queue, the other keyword arguments set
+        attributes or methods (e.g. GetPackages).
+        """
+
+        def __init__(self, cache=None, attribute_store=None, file_index_dir=None, **attrs):
+            backend.Backend.__init__(self, None, filters=True)
+            self.eventQueue = queue.Queue()
+            self._init_state(attribute_store or AttributeStore(':memory:'), file_index.FileIndex(file_index_dir))
+            if cache is not None:
+                self.cache = cache
+            for name, value in attrs.items():
+                setattr(self, name, value)
+
+        def __del__(self):
+            pass
+
+    return FakeRootBackend
+
+
+def __getattr__(name):
+    """FakeRootBackend is defined at first use, once the stubs are installed."""
+    if name == 'FakeRootBackend':
+        fake = globals()['FakeRootBackend'] = _fake_root_backend()
+        return fake
+    raise AttributeError(name)
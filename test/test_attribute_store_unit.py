@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.attribute_store.AttributeStore."""
+
+import os
+import tempfile
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora.attribute_store import AttributeStore
+
+
+def test_values_persist_and_are_keyed_without_zero_epoch():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dnfdragora', 'attributes.sqlite')
+        store = AttributeStore(path)
+        changelogs = [[1700000000, 'Packager <p@example.org> - 7.2-1', '- Update to 7.2']]
+        store.put_many('nano-0:7.2-1.x86_64', {'changelogs': changelogs, 'files': ['/usr/bin/nano'],
+                                               'description': '', 'is_installed': True})
+        store.close()
+
+        store = AttributeStore(path)
+        assert store.get_many('nano-7.2-1.x86_64', ['changelogs', 'files', 'description']) == {
+            'changelogs': changelogs, 'files': ['/usr/bin/nano']}
+        # mutable attributes are neither stored nor counted
+        assert store.get('nano-7.2-1.x86_64', 'is_installed') is None
+        stats = store.stats()
+        assert (stats['hits'], stats['misses']) == (2, 1)
+        assert abs(stats['hit_ratio'] - 2.0 / 3) < 1e-9
+        store.close()
+
+
+def test_least_recently_used_values_are_evicted_over_the_size_cap():
+    store = AttributeStore(':memory:', max_size=1000)
+    text = 'x' * 200
+    store.put('a-1-1.noarch', 'description', text)
+    store.put('b-1-1.noarch', 'description', text)
+    store.put('c-1-1.noarch', 'description', text)
+    store.put('d-1-1.noarch', 'description', text)
+    # a is used again, b is now the least recently used one
+    assert store.get('a-1-1.noarch', 'description') == text
+    store.put('e-1-1.noarch', 'description', text)
+
+    assert store.get('b-1-1.noarch', 'description') is None
+    for name in 'acde':
+        assert store.get('%s-1-1.noarch' % name, 'description') == text
+    assert store.stats()['size'] <= 1000
+
+
+def test_lookups_record_last_use_in_one_batched_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'attributes.sqlite')
+        store = AttributeStore(path)
+        assert store._db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        for name in 'abc':
+            store.put('%s-1-1.noarch' % name, 'description', name)
+        statements = []
+        store._db.set_trace_callback(statements.append)
+        for name in 'abc':
+            assert store.get('%s-1-1.noarch' % name, 'description') == name
+        assert not [sql for sql in statements if not sql.startswith('SELECT')]
+
+        # written by the next put, in its transaction
+        store.put('d-1-1.noarch', 'description', 'd')
+        assert len([sql for sql in statements if sql.startswith('UPDATE')]) == 3
+        assert len([sql for sql in statements if sql == 'COMMIT']) == 1
+        store._db.set_trace_callback(None)
+
+        # pending ones are written on close
+        store.get('a-1-1.noarch', 'description')
+        store.close()
+        store = AttributeStore(path)
+        assert store._db.execute("SELECT full_nevra FROM attributes ORDER BY last_used DESC").fetchone()[0] == \
+            'a-1-1.noarch'
+        store.close()
+
+
+def test_unusable_database_disables_the_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'not-a-db.sqlite')
+        with open(path, 'wb') as f:
+            f.write(b'garbage' * 100)
+        store = AttributeStore(path)
+        assert not store.enabled
+        store.put('nano-7.2-1.x86_64', 'description', 'editor')
+        assert store.get('nano-7.2-1.x86_64', 'description') is None
+
+
+if __name__ == '__main__':
+    tests = [
+        test_values_persist_and_are_keyed_without_zero_epoch,
+        test_least_recently_used_values_are_evicted_over_the_size_cap,
+        test_lookups_record_last_use_in_one_batched_write,
+        test_unusable_database_disables_the_store,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} AttributeStore unit checks passed')
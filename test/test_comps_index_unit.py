@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.comps_index.CompsIndex."""
+
+import types
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+import libdnf5
+
+from dnfdragora import comps_index
+
+
+def _group(group_id, names, packages):
+    return types.SimpleNamespace(
+        get_groupid=lambda: group_id,
+        get_translated_name=lambda lang: names.get(lang, names['en']),
+        get_packages=lambda: [types.SimpleNamespace(get_name=lambda name=name: name) for name in packages])
+
+
+def test_index_answers_group_and_package_lookups():
+    index = comps_index.CompsIndex([
+        ('editors', 'Editors', ['vim', 'nano']),
+        ('system-tools', 'System Tools', ['nano', 'htop']),
+        # the same group in another repository
+        ('editors', 'Editors', ['emacs']),
+    ])
+    assert len(index) == 2
+    assert index.groups() == [['editors', 'Editors'], ['system-tools', 'System Tools']]
+    assert index.package_names('editors') == {'vim', 'nano', 'emacs'}
+    assert index.package_names('unknown') == frozenset()
+    assert index.groups_of('nano') == {'editors', 'system-tools'}
+    assert index.groups_of('bash') == frozenset()
+    assert index.groups_of_packages(['htop', 'emacs', 'bash']) == ['editors', 'system-tools']
+    assert index.group_name('system-tools') == 'System Tools'
+
+
+def test_index_from_libdnf5_uses_translated_names():
+    groups = [_group('editors', {'en': 'Editors', 'it': 'Editor'}, ['vim']),
+              _group('games', {'en': 'Games'}, ['btanks'])]
+    query = libdnf5.comps.GroupQuery
+    libdnf5.comps.GroupQuery = lambda base: groups
+    try:
+        index = comps_index.CompsIndex.from_libdnf5(object(), lang='it')
+    finally:
+        libdnf5.comps.GroupQuery = query
+    assert index.groups() == [['editors', 'Editor'], ['games', 'Games']]
+    assert index.groups_of('btanks') == {'games'}
+
+
+if __name__ == '__main__':
+    tests = [
+        test_index_answers_group_and_package_lookups,
+        test_index_from_libdnf5_uses_translated_names,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} CompsIndex unit checks passed')
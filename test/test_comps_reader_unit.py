@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.comps_reader on fixture comps files."""
+
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora import comps_reader
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'comps')
+HREFS = {'xz': 'repodata/0002-comps.xml.xz', 'gz': 'repodata/0003-comps.xml.gz'}
+
+
+def _make_repo_cache(cache_dir, repo_id, comps='comps.xml', compressions=('gz',), repomd='repomd.xml'):
+    ''' libdnf5 like cache directory of repo_id with the fixture comps '''
+    repo_dir = os.path.join(cache_dir, repo_id + '-0123456789abcdef')
+    os.makedirs(os.path.join(repo_dir, 'repodata'))
+    shutil.copy(os.path.join(DATA_DIR, repomd), os.path.join(repo_dir, 'repodata', 'repomd.xml'))
+    with open(os.path.join(DATA_DIR, comps), 'rb') as f:
+        data = f.read()
+    for compression in compressions:
+        opener = gzip.open if compression == 'gz' else lzma.open
+        with opener(os.path.join(repo_dir, HREFS[compression]), 'wb') as f:
+            f.write(data)
+    return repo_dir
+
+
+def test_read_comps_parses_groups_translations_and_categories():
+    index = comps_reader.read_comps([os.path.join(DATA_DIR, 'comps.xml')], lang='it')
+    assert index.groups() == [['editors', 'Editor'], ['system-tools', 'System Tools'], ['core', 'Core']]
+    assert index.package_names('editors') == {'vim-enhanced', 'emacs', 'nano'}
+    assert index.package_names('system-tools') == {'htop', 'nano', 'NetworkManager-tui'}
+    assert index.groups_of_packages(['nano']) == ['editors', 'system-tools']
+    assert index.categories() == [['apps', 'Applicazioni']]
+    assert index.category_groups('apps') == ['editors']
+
+    # pt_BR translations are used for pt
+    index = comps_reader.read_comps([os.path.join(DATA_DIR, 'comps.xml')], lang='pt')
+    assert index.group_name('system-tools') == 'Ferramentas do sistema'
+    assert index.group_name('editors') == 'Editors'
+
+
+def test_find_comps_file_in_libdnf5_cache():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fedora = _make_repo_cache(cache_dir, 'fedora', compressions=('xz',))
+        assert comps_reader.find_comps_file('fedora', [cache_dir]) == os.path.join(fedora, HREFS['xz'])
+        # gzip is preferred to xz, faster to decompress
+        updates = _make_repo_cache(cache_dir, 'updates', compressions=('xz', 'gz'))
+        assert comps_reader.find_comps_file('updates', [cache_dir]) == os.path.join(updates, HREFS['gz'])
+        # fedora-cisco-openh264 is not fedora
+        assert comps_reader.find_comps_file('fedora-cisco', [cache_dir]) is None
+
+        # a repository without comps
+        _make_repo_cache(cache_dir, 'copr', compressions=())
+        with open(os.path.join(cache_dir, 'copr-0123456789abcdef', 'repodata', 'repomd.xml'), 'w') as f:
+            f.write('<repomd xmlns="http://linux.duke.edu/metadata/repo"/>')
+        assert comps_reader.find_comps_file('copr', [cache_dir]) == ''
+
+
+def test_load_comps_index_merges_the_enabled_repositories():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _make_repo_cache(cache_dir, 'fedora', compressions=('xz',))
+        _make_repo_cache(cache_dir, 'updates', comps='comps-updates.xml')
+        index = comps_reader.load_comps_index(['fedora', 'updates'], [cache_dir], lang='en')
+        assert [group[0] for group in index.groups()] == ['editors', 'system-tools', 'core', 'games']
+        assert index.package_names('editors') == {'vim-enhanced', 'emacs', 'nano', 'neovim'}
+        assert index.groups_of('btanks') == {'games'}
+
+        # metadata not cached yet, libdnf5 has to load them
+        assert comps_reader.load_comps_index(['fedora', 'rawhide'], [cache_dir]) is None
+
+
+if __name__ == '__main__':
+    tests = [
+        test_read_comps_parses_groups_translations_and_categories,
+        test_find_comps_file_in_libdnf5_cache,
+        test_load_comps_index_merges_the_enabled_repositories,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} comps reader unit checks passed')
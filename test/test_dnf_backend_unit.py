@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.dnf_backend with a fake dnf5daemon client."""
+
+import threading
+import time
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import dnf_backend
+from dnfdragora.attribute_store import AttributeStore
+from stubs import FakeRootBackend
+
+
+def test_fetch_attributes_fills_lazy_fields_with_one_request():
+    calls = []
+
+    def _get_attributes(full_nevras, attrs, sync=False):
+        calls.append((list(full_nevras), list(attrs), sync))
+        return {
+            'nano-7.2-1.x86_64': {'description': 'small editor', 'files': ['/usr/bin/nano'],
+                                  'changelogs': [], 'name': 'nano'},
+            'vim-2:9.1-2.x86_64': {'description': 'vi improved', 'files': ['/usr/bin/vim'],
+                                   'changelogs': [(0, 'me', 'first')]},
+        }
+
+    backend = FakeRootBackend(GetAttributes=_get_attributes)
+    nano = dnf_backend.DnfPackage(backend, pkg_id='nano,0,7.2,1,x86_64,fedora')
+    vim = dnf_backend.DnfPackage(backend, pkg_id='vim,2,9.1,2,x86_64,updates')
+
+    attrs = ['description', 'files', 'changelogs']
+    backend.fetch_attributes([nano, vim], attrs)
+    assert calls == [(['nano-7.2-1.x86_64', 'vim-2:9.1-2.x86_64'], attrs, True)]
+    assert nano.description == 'small editor'
+    assert vim.filelist == ['/usr/bin/vim']
+    # empty values are left to the lazy per-attribute path
+    assert nano.missing_attributes(attrs) == ['changelogs']
+
+    nano.set_attributes({'changelogs': [(0, 'me', 'first')]})
+    backend.fetch_attributes([nano, vim], attrs)
+    assert len(calls) == 1
+
+
+def test_fetch_attributes_uses_the_attribute_store_first():
+    calls = []
+
+    def _get_attributes(full_nevras, attrs, sync=False):
+        calls.append(list(full_nevras))
+        return {nevra: {'description': 'from daemon'} for nevra in full_nevras}
+
+    store = AttributeStore(':memory:')
+    store.put_many('nano-0:7.2-1.x86_64', {'description': 'from store'})
+    backend = FakeRootBackend(attribute_store=store, GetAttributes=_get_attributes)
+    nano = dnf_backend.DnfPackage(backend, pkg_id='nano,0,7.2,1,x86_64,fedora')
+    vim = dnf_backend.DnfPackage(backend, pkg_id='vim,2,9.1,2,x86_64,updates')
+
+    backend.fetch_attributes([nano, vim], ['description'])
+    assert calls == [['vim-2:9.1-2.x86_64']]
+    assert nano.description == 'from store'
+    assert vim.description == 'from daemon'
+
+    # a new package object after a cache reset is served by the store
+    vim = dnf_backend.DnfPackage(backend, pkg_id='vim,2,9.1,2,x86_64,updates')
+    backend.fetch_attributes([vim], ['description'])
+    assert len(calls) == 1
+    assert vim.description == 'from daemon'
+    assert store.stats()['hits'] == 2
+
+
+class _PrefetchBackend:
+    def __init__(self):
+        self.busy = False
+        self.fetched = []
+        self.fetched_event = threading.Event()
+
+    def is_busy(self):
+        return self.busy
+
+    def fetch_attributes(self, pkgs, attrs):
+        self.fetched.append(list(pkgs))
+        self.fetched_event.set()
+
+
+def test_prefetcher_serves_only_the_latest_request_once_idle():
+    backend = _PrefetchBackend()
+    prefetcher = dnf_backend.DetailsPrefetcher(backend)
+    prefetcher.DELAY = 0.02
+    try:
+        backend.busy = True
+        prefetcher.prefetch(['a', 'b'], ['description'])
+        prefetcher.prefetch(['c', 'd'], ['description'])
+        time.sleep(0.1)
+        assert backend.fetched == []
+
+        backend.busy = False
+        assert backend.fetched_event.wait(5)
+        assert backend.fetched == [['c', 'd']]
+
+        # the list has been rebuilt before the request was due
+        prefetcher.DELAY = 0.1
+        prefetcher.prefetch(['e'], ['description'])
+        prefetcher.cancel()
+        time.sleep(0.2)
+        assert backend.fetched == [['c', 'd']]
+    finally:
+        prefetcher.stop()
+    prefetcher._thread.join(5)
+    assert not prefetcher._thread.is_alive()
+
+
+def _resolve_pkg(name, epoch, version, release, repo_id):
+    return {'name': name, 'epoch': epoch, 'version': version, 'release': release,
+            'arch': 'x86_64', 'repo_id': repo_id, 'install_size': 1024, 'download_size': 512}
+
+
+def test_apply_transaction_updates_the_cache_with_the_resolve_list():
+    backend = FakeRootBackend()
+    old_vim = dnf_backend.DnfPackage(backend, dbus_pkg=_resolve_pkg('vim', '2', '9.1', '1', '@System'), action='r')
+    nano = dnf_backend.DnfPackage(backend, dbus_pkg=_resolve_pkg('nano', '0', '7.2', '1', '@System'), action='r')
+    update = dict(_resolve_pkg('vim', '2', '9.1', '2', 'updates'), summary='vi improved', group='Editors')
+    backend.cache.populate('installed', [old_vim, nano])
+    backend.cache.populate('updates', [dnf_backend.DnfPackage(backend, dbus_pkg=update, action='u')])
+    backend.cache.populate('available', [])
+
+    resolve = [
+        ['Package', 'Upgrade', 'User', {'replaces': [1]}, _resolve_pkg('vim', '2', '9.1', '2', 'updates')],
+        ['Package', 'Replaced', 'User', {}, _resolve_pkg('vim', '2', '9.1', '1', '@System')],
+        ['Package', 'Remove', 'User', {}, _resolve_pkg('nano', '0', '7.2', '1', '@System')],
+    ]
+    assert backend.apply_transaction(resolve) == {'vim', 'nano'}
+    installed = backend.cache.packages('installed')
+    assert [str(po) for po in installed] == ['vim-2:9.1-2.x86_64']
+    assert installed[0].repository == '@System'
+    assert installed[0].summary == 'vi improved'
+    assert backend.cache.packages('updates') == []
+
+    # nano is available again, the installed list agrees with the cache
+    assert backend.refresh_packages('installed', {'vim', 'nano'},
+                                    [_resolve_pkg('vim', '2', '9.1', '2', '@System')])
+    backend.refresh_packages('available', {'vim', 'nano'}, [_resolve_pkg('nano', '0', '7.2', '1', 'fedora')])
+    assert [str(po) for po in backend.cache.packages('available')] == ['nano-7.2-1.x86_64']
+    # a package the cache does not know about means a full recache
+    assert not backend.refresh_packages('installed', {'vim', 'nano'},
+                                        [_resolve_pkg('vim', '2', '9.1', '3', '@System')])
+
+    assert backend.apply_transaction([['Package', 'Reason Change', 'User', {}, _resolve_pkg(
+        'vim', '2', '9.1', '2', '@System')]]) is None
+
+
+def test_installed_changes_finds_the_names_changed_by_another_tool():
+    backend = FakeRootBackend()
+    backend.cache.populate('installed', [
+        dnf_backend.DnfPackage(backend, dbus_pkg=_resolve_pkg(name, '0', '1.0', '1', '@System'), action='r')
+        for name in ('bash', 'nano', 'vim')])
+
+    listed = [_resolve_pkg('bash', '0', '1.0', '1', '@System'),
+              _resolve_pkg('vim', '0', '1.1', '1', '@System'),
+              _resolve_pkg('zsh', '0', '5.9', '1', '@System')]
+    assert backend.installed_changes(listed) == ({'nano', 'vim', 'zsh'}, {'nano'})
+    assert backend.installed_changes(listed[:1] + [_resolve_pkg('nano', '0', '1.0', '1', '@System'),
+                                                   _resolve_pkg('vim', '0', '1.0', '1', '@System')]) == (set(), set())
+
+
+def test_search_of_indexed_attributes_uses_the_cache_indexes():
+    backend = FakeRootBackend()
+    backend.cache.populate('installed', backend.make_pkg_object(
+        [_resolve_pkg(name, '0', '1.0', '1', '@System') for name in ('vim', 'vim-minimal', 'nano')], 'installed'))
+    backend.cache.populate('available', backend.make_pkg_object(
+        [_resolve_pkg(name, '0', '1.0', '1', 'fedora') for name in ('vim-X11', 'emacs')], 'available'))
+
+    found = backend.search('all', 'name', '^vim', sync=True)
+    assert sorted(str(po) for po in found) == ['vim-1.0-1.x86_64', 'vim-X11-1.0-1.x86_64',
+                                                'vim-minimal-1.0-1.x86_64']
+    assert sorted(po.name for po in backend.search('available', 'repository', 'fed', sync=True)) == \
+        ['emacs', 'vim-X11']
+    assert backend.search('installed', 'name', 'emacs', sync=True) == []
+
+
+def test_pkg_id_packages_get_the_cached_ones():
+    backend = FakeRootBackend()
+    backend.cache.populate('installed', backend.make_pkg_object(
+        [_resolve_pkg('vim', '2', '9.1', '1', '@System')], 'installed'))
+    backend.cache.populate('available', backend.make_pkg_object(
+        [_resolve_pkg('nano', '0', '7.2', '1', 'fedora')], 'available'))
+    installed = backend.cache.packages('installed')[0]
+    available = backend.cache.packages('available')[0]
+
+    # Search results are pkg_ids only, made into packages without action
+    found = backend.cache.find_packages([dnf_backend.DnfPackage(backend, pkg_id='vim,2,9.1,1,x86_64,@System')])
+    assert found == [installed]
+    assert backend.make_pkg_object_with_attr(['nano,0,7.2,1,x86_64,fedora', 'vim,2,9.1,1,x86_64,@System']) == [
+        available, installed]
+    assert backend.cache.packages('installed') == [installed]
+    assert backend.cache.packages('available') == [available]
+
+
+if __name__ == '__main__':
+    tests = [
+        test_fetch_attributes_fills_lazy_fields_with_one_request,
+        test_fetch_attributes_uses_the_attribute_store_first,
+        test_prefetcher_serves_only_the_latest_request_once_idle,
+        test_apply_transaction_updates_the_cache_with_the_resolve_list,
+        test_installed_changes_finds_the_names_changed_by_another_tool,
+        test_search_of_indexed_attributes_uses_the_cache_indexes,
+        test_pkg_id_packages_get_the_cached_ones,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} dnf_backend unit checks passed')
@@ -3,119 +3,22 @@
 
 These tests are runtime unit tests (not source-string checks):
 - compatibility of API routing/proxy dispatch
-- async single-flight guard behavior
+- async request scheduling (overlapping reads, exclusive writes, queueing)
+- read only session pool
+- progress events coalescing
+- progressive list_fd batch delivery
 - sync wrappers and argument adaptation
 - basic error mapping safety paths
 """
 
+import json
 import os
-import sys
-import types
 import threading
-from queue import SimpleQueue
-
-# Ensure imports come from this workspace copy of dnfdragora, not site-packages.
-REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-if REPO_ROOT not in sys.path:
-    sys.path.insert(0, REPO_ROOT)
+import time
 
+from stubs import install_dependency_stubs
 
-def _install_dependency_stubs():
-    """Install minimal stubs for external modules used at import time."""
-    if 'dbus' not in sys.modules:
-        dbus_mod = types.ModuleType('dbus')
-
-        class _DBusString(str):
-            pass
-
-        class _DBusObjectPath(str):
-            pass
-
-        class _DBusSignature(str):
-            pass
-
-        class _DBusBoolean(int):
-            pass
-
-        class _DBusArray(list):
-            pass
-
-        class _DBusStruct(tuple):
-            pass
-
-        class _DBusDictionary(dict):
-            pass
-
-        dbus_mod.String = _DBusString
-        dbus_mod.ObjectPath = _DBusObjectPath
-        dbus_mod.Signature = _DBusSignature
-        dbus_mod.Boolean = _DBusBoolean
-        dbus_mod.Int64 = int
-        dbus_mod.UInt64 = int
-        dbus_mod.Int32 = int
-        dbus_mod.UInt32 = int
-        dbus_mod.Int16 = int
-        dbus_mod.UInt16 = int
-        dbus_mod.Byte = int
-        dbus_mod.Double = float
-        dbus_mod.Array = _DBusArray
-        dbus_mod.Struct = _DBusStruct
-        dbus_mod.Dictionary = _DBusDictionary
-
-        dbus_mod.Interface = lambda obj, dbus_interface=None: obj
-
-        class _SystemBus:
-            def __init__(self, mainloop=None):
-                self.mainloop = mainloop
-
-            def get_object(self, *_args, **_kwargs):
-                return object()
-
-            def remove_signal_receiver(self, *_args, **_kwargs):
-                return None
-
-        dbus_mod.SystemBus = _SystemBus
-
-        dbus_mainloop = types.ModuleType('dbus.mainloop')
-        dbus_mainloop_glib = types.ModuleType('dbus.mainloop.glib')
-        dbus_mainloop_glib.DBusGMainLoop = lambda set_as_default=True: object()
-
-        dbus_mod.mainloop = dbus_mainloop
-        dbus_mainloop.glib = dbus_mainloop_glib
-
-        sys.modules['dbus'] = dbus_mod
-        sys.modules['dbus.mainloop'] = dbus_mainloop
-        sys.modules['dbus.mainloop.glib'] = dbus_mainloop_glib
-
-    if 'libdnf5' not in sys.modules:
-        libdnf5_mod = types.ModuleType('libdnf5')
-        libdnf5_mod.base = types.SimpleNamespace(Base=lambda: object())
-        libdnf5_mod.comps = types.SimpleNamespace(GroupQuery=lambda *_args, **_kwargs: [])
-        sys.modules['libdnf5'] = libdnf5_mod
-
-    if 'gi' not in sys.modules:
-        gi_mod = types.ModuleType('gi')
-        gi_repo = types.ModuleType('gi.repository')
-
-        class _BusType:
-            SYSTEM = 0
-
-        gi_repo.Gio = types.SimpleNamespace(
-            BusType=_BusType,
-            bus_get_sync=lambda *_args, **_kwargs: object(),
-            DBusProxy=types.SimpleNamespace(
-                new_sync=lambda *a, **k: object(),
-                new=lambda *a, **k: None,
-            ),
-        )
-        gi_repo.GLib = types.SimpleNamespace()
-        gi_repo.GObject = types.SimpleNamespace()
-        gi_mod.repository = gi_repo
-        sys.modules['gi'] = gi_mod
-        sys.modules['gi.repository'] = gi_repo
-
-
-_install_dependency_stubs()
+install_dependency_stubs()
 
 from dnfdragora import dnfd_client
 
@@ -134,10 +37,12 @@ class _FakeProxy:
 def _make_client_stub():
     """Create a Client instance without running its heavy __init__."""
     c = object.__new__(dnfd_client.Client)
-    c._async_lock = threading.Lock()
-    c._sent = False
-    c._data = {'cmd': None}
-    c.eventQueue = SimpleQueue()
+    c._session_pool = dnfd_client.SessionPool(bus=None, size=0)
+    c._scheduler = dnfd_client.RequestScheduler()
+    c._pool_scheduler = dnfd_client.RequestScheduler(max_concurrent=0)
+    c.eventQueue = dnfd_client.CoalescingEventQueue()
+    c._Client__async_threads = {}
+    c._Client__async_threads_lock = threading.Lock()
 
     c.iface_rpm = object()
     c.iface_repo = object()
@@ -148,15 +53,23 @@ def _make_client_stub():
     c.iface_offline = object()
     c.dbus_org = dnfd_client.DNFDAEMON_BUS_NAME
     c.session_path = None
-    c._comps_base = None
+    c._comps_index = None
     c._comps_base_lock = threading.RLock()
+    c._comps_generation = 0
+    c._comps_building = None
+    c.comps_source = None
+    c.comps_build_time = None
+    c.comps_wait_time = 0.0
 
     c.proxyMethod = {
         'GetPackages_fd': 'list_fd',
         'GetPackages': 'list',
+        'GetAttributes': 'list_fd',
         'Search': 'list',
         'RunTransaction': 'do_transaction',
         'Advisories': 'list',
+        'BuildTransaction': 'resolve',
+        'CancelTransaction': 'cancel',
     }
     return c
 
@@ -256,17 +169,88 @@ def test_run_transaction_async_uses_infinite_timeout():
     assert calls['timeout'] == dnfd_client._DBUS_TIMEOUT_INFINITE
 
 
-def test_async_guard_rejects_second_command_and_emits_event():
+class _PendingCalls:
+    """Fake proxy keeping D-Bus calls pending until reply() is invoked."""
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, method_name):
+        def _call(*args, reply_handler=None, error_handler=None, timeout=None):
+            self.calls.append((method_name, args, reply_handler))
+        return _call
+
+    def methods(self):
+        return [call[0] for call in self.calls]
+
+    def reply(self, index, *result):
+        self.calls[index][2](*result)
+
+
+def test_async_requests_are_queued_while_an_exclusive_one_runs():
     c = _make_client_stub()
-    c._sent = True
-    c._data = {'cmd': 'GetPackages'}
+    proxy = _PendingCalls()
+    c.Proxy = lambda cmd: proxy
+
+    build_id = c._run_dbus_async('BuildTransaction', True, {})
+    search_id = c._run_dbus_async('Search', True, {'scope': 'all'})
 
-    c._run_dbus_async('Search', True, {'scope': 'all'})
+    assert build_id != search_id
+    assert proxy.methods() == ['resolve']
+    assert c.eventQueue.empty()
+    assert c.is_busy()
+    assert c.has_pending_requests()
 
+    proxy.reply(0, [], 0)
+    evt = c.eventQueue.get_nowait()
+    assert evt['event'] == 'BuildTransaction'
+    assert evt['request_id'] == build_id
+    # the queued read only request is started once the exclusive one completes
+    assert proxy.methods() == ['resolve', 'list']
+
+    proxy.reply(1, [])
     evt = c.eventQueue.get_nowait()
     assert evt['event'] == 'Search'
-    assert evt['value']['result'] is False
-    assert evt['value']['error'] == 'Command in progress'
+    assert evt['request_id'] == search_id
+    assert evt['value']['error'] is None
+    assert not c.is_busy()
+    assert not c.has_pending_requests()
+
+
+def test_scheduler_overlaps_read_only_requests_up_to_the_limit():
+    scheduler = dnfd_client.RequestScheduler(max_concurrent=2)
+    started = []
+
+    def _start(request):
+        started.append(request['request_id'])
+
+    ids = [scheduler.submit({'cmd': 'GetPackages_fd'}, _start) for _ in range(3)]
+    write_id = scheduler.submit({'cmd': 'Install'}, _start)
+    late_read_id = scheduler.submit({'cmd': 'GetAttribute'}, _start)
+    assert started == ids[:2]
+
+    scheduler.done(ids[0])
+    assert started == ids
+    scheduler.done(ids[1])
+    scheduler.done(ids[2])
+    # the write runs alone, later reads wait for it
+    assert started == ids + [write_id]
+    scheduler.done(write_id)
+    assert started == ids + [write_id, late_read_id]
+    scheduler.done(late_read_id)
+    assert not scheduler.is_busy()
+
+
+def test_scheduler_control_commands_bypass_the_queue():
+    scheduler = dnfd_client.RequestScheduler()
+    started = []
+    run_id = scheduler.submit({'cmd': 'RunTransaction'}, lambda r: started.append(r['cmd']))
+    scheduler.submit({'cmd': 'CancelTransaction'}, lambda r: started.append(r['cmd']))
+    assert started == ['RunTransaction', 'CancelTransaction']
+
+    scheduler.reset("test")
+    assert not scheduler.is_busy()
+    # late reply of a request dropped by reset is ignored
+    scheduler.done(run_id)
 
 
 def test_get_result_getattribute_error_markers_and_success_path():
@@ -315,6 +299,527 @@ def test_handle_dbus_error_maps_known_errors_and_fallback():
         assert 'fallback' in str(err)
 
 
+def test_unpack_dbus_converts_nested_replies_to_native_types():
+    dbus = dnfd_client.dbus
+    resolved = dbus.Array([
+        dbus.Struct((dbus.String('Package'), dbus.String('Upgrade'), dbus.Dictionary({
+            dbus.String('nevra'): dbus.String('nano-0:8.0-1.x86_64'),
+            dbus.String('install_size'): dbus.UInt64(1024),
+            dbus.String('is_installed'): dbus.Boolean(0),
+            dbus.String('files'): dbus.Array([dbus.String('/usr/bin/nano')]),
+        }))),
+    ])
+
+    result = dnfd_client.unpack_dbus(resolved)
+
+    assert result == [['Package', 'Upgrade', {
+        'nevra': 'nano-0:8.0-1.x86_64', 'install_size': 1024,
+        'is_installed': False, 'files': ['/usr/bin/nano'],
+    }]]
+    package = result[0][2]
+    assert type(package) is dict and type(result[0]) is list
+    assert type(package['is_installed']) is bool
+    assert type(package['nevra']) is str and type(package['files'][0]) is str
+    # native values are returned as they are
+    assert dnfd_client.unpack_dbus([dbus.String('x')]) == ['x']
+    assert dnfd_client.unpack_dbus(None) is None
+
+
+def test_unpack_dbus_handles_subclasses_and_mixed_arrays():
+    dbus = dnfd_client.dbus
+
+    class _VariantString(dbus.String):
+        pass
+
+    mixed = dbus.Array([dbus.String('a'), dbus.Int32(1), _VariantString('b'),
+                        dbus.Dictionary({_VariantString('k'): dbus.Double(0.5)})])
+    assert dnfd_client.unpack_dbus(mixed) == ['a', 1, 'b', {'k': 0.5}]
+    assert type(dnfd_client.unpack_dbus(_VariantString('c'))) is str
+
+
+def _progress(download_id, downloaded):
+    return {'event': 'OnDownloadProgress',
+            'value': {'session_object_path': '/s1', 'download_id': download_id,
+                      'total_to_download': 100, 'downloaded': downloaded}}
+
+
+def test_event_queue_merges_progress_until_delivered():
+    queue = dnfd_client.CoalescingEventQueue()
+    for downloaded in range(10):
+        queue.put(_progress('repo-a', downloaded))
+        queue.put(_progress('repo-b', downloaded * 2))
+
+    assert queue.qsize() == 2
+    assert queue.get_nowait()['value']['downloaded'] == 9
+    queue.put(_progress('repo-a', 50))  # a new value after delivery is queued again
+    assert queue.get_nowait()['value']['downloaded'] == 18
+    assert queue.get_nowait()['value']['downloaded'] == 50
+    assert queue.empty()
+    stats = queue.stats()
+    assert (stats['queued'], stats['merged'], stats['delivered']) == (21, 18, 3)
+
+
+def test_event_queue_keeps_ordering_around_other_events():
+    queue = dnfd_client.CoalescingEventQueue()
+    queue.put(_progress('pkg', 10))
+    queue.put({'event': 'OnDownloadEnd', 'value': {'download_id': 'pkg'}})
+    queue.put(_progress('pkg', 20))
+    queue.put(_progress('pkg', 30))
+    queue.put({'event': 'GetPackages_fd', 'value': {'result': [], 'error': None}})
+
+    events = []
+    while not queue.empty():
+        item = queue.get()
+        events.append((item['event'], item['value'].get('downloaded')))
+    assert events == [('OnDownloadProgress', 10), ('OnDownloadEnd', None),
+                      ('OnDownloadProgress', 30), ('GetPackages_fd', None)]
+    try:
+        queue.get(timeout=0.01)
+    except dnfd_client.Empty:
+        pass
+    else:
+        raise AssertionError('Empty expected')
+
+
+def test_event_queue_wait_wakes_up_on_put_and_tracks_latency():
+    queue = dnfd_client.CoalescingEventQueue()
+    assert not queue.wait(0.01)
+
+    timer = threading.Timer(0.05, queue.put, args=({'event': 'Search', 'value': {}},))
+    timer.start()
+    assert queue.wait(5)
+    timer.join()
+    # wait() does not dequeue
+    assert queue.qsize() == 1
+    queue.get_nowait()
+
+    queue.put(_progress('repo-a', 1))
+    queue.put(_progress('repo-a', 2))
+    threading.Event().wait(0.02)
+    queue.get_nowait()
+    stats = queue.stats()
+    # merged progress values are as late as the first one queued
+    assert stats['latency_max_ms'] >= 20.0
+    assert 0.0 < stats['latency_avg_ms'] <= stats['latency_max_ms']
+
+
+def test_json_stream_decoder_handles_objects_split_across_reads():
+    decoder = dnfd_client.JsonStreamDecoder()
+    stream = b'{"name": "nano", "arch": "x86_64"}\n{"name": "vim", "ar'
+    assert decoder.feed(stream) == [{'name': 'nano', 'arch': 'x86_64'}]
+    assert decoder.pending > 0
+    assert decoder.feed(b'ch": "noarch"}{"name": "zsh"}') == [
+        {'name': 'vim', 'arch': 'noarch'},
+        {'name': 'zsh'},
+    ]
+    assert decoder.close() == []
+    assert decoder.pending == 0
+
+
+def test_json_stream_decoder_keeps_utf8_sequences_split_across_reads():
+    payload = json.dumps({'summary': 'Éditeur de texte – ünïcode'}, ensure_ascii=False).encode('utf-8')
+    decoder = dnfd_client.JsonStreamDecoder()
+    items = []
+    # one byte at a time splits every multi-byte sequence
+    for i in range(len(payload)):
+        items.extend(decoder.feed(payload[i:i + 1]))
+    items.extend(decoder.close())
+    assert items == [{'summary': 'Éditeur de texte – ünïcode'}]
+
+
+def test_progressive_list_fd_posts_sequenced_batches_then_complete():
+    c = _make_client_stub()
+    c.list_fd_batch_size = 1
+    c.list_fd_batch_interval = 3600
+    packages = [{'nevra': 'pkg%d-1.0-1.noarch' % i} for i in range(5)]
+
+    def _list_fd(options, pipe_w, reply_handler=None, error_handler=None, timeout=None):
+        # the client closes its write end once the call is queued
+        fd = os.dup(pipe_w)
+
+        def _writer():
+            for pkg in packages:
+                os.write(fd, json.dumps(pkg).encode('utf-8'))
+            os.close(fd)
+            reply_handler()
+
+        threading.Thread(target=_writer, daemon=True).start()
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd)
+    c.GetPackages({'scope': 'installed'}, progressive=True)
+
+    events = []
+    while not events or not events[-1]['value']['complete']:
+        events.append(c.eventQueue.get(timeout=5))
+
+    assert all(evt['event'] == 'GetPackages_fd' for evt in events)
+    assert len(events) > 1
+    assert [evt['value']['batch'] for evt in events] == list(range(len(events)))
+    assert not any(evt['value']['complete'] for evt in events[:-1])
+    assert [p for evt in events for p in evt['value']['result']] == packages
+    assert not c.is_busy()
+
+
+def test_overlapping_list_fd_readers_are_all_tracked_and_waited_for():
+    c = _make_client_stub()
+    c._scheduler = dnfd_client.RequestScheduler(max_concurrent=2)
+    release = threading.Event()
+
+    def _list_fd(options, pipe_w, reply_handler=None, error_handler=None, timeout=None):
+        fd = os.dup(pipe_w)
+
+        def _writer():
+            release.wait(5)
+            os.write(fd, json.dumps({'name': options['scope']}).encode('utf-8'))
+            os.close(fd)
+
+        threading.Thread(target=_writer, daemon=True).start()
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd)
+    first = c.GetPackages({'scope': 'installed'})
+    second = c.GetPackages({'scope': 'available'})
+    assert sorted(c._Client__async_threads) == [first, second]
+
+    release.set()
+    c.waitForLastAsyncRequestTermination()
+    assert c._Client__async_threads == {}
+    events = [c.eventQueue.get(timeout=5) for _ in range(2)]
+    assert sorted(evt['value']['result'][0]['name'] for evt in events) == ['available', 'installed']
+
+
+def test_get_attributes_sync_maps_list_fd_reply_to_requested_nevras():
+    c = _make_client_stub()
+    captured = {}
+    reply = [
+        {'name': 'nano', 'epoch': '0', 'version': '7.2', 'release': '1', 'arch': 'x86_64',
+         'description': 'small editor', 'files': ['/usr/bin/nano']},
+        {'name': 'vim', 'epoch': '2', 'version': '9.1', 'release': '2', 'arch': 'x86_64',
+         'description': 'vi improved', 'files': ['/usr/bin/vim']},
+    ]
+
+    def _list_fd(options, pipe_w, timeout=None):
+        captured['options'] = options
+        for pkg in reply:
+            os.write(pipe_w, json.dumps(pkg).encode('utf-8'))
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd)
+    nevras = ['nano-7.2-1.x86_64', 'vim-2:9.1-2.x86_64', 'missing-1.0-1.noarch']
+    values = c.GetAttributes(nevras, ['description', 'files'], sync=True)
+
+    assert captured['options']['patterns'] == nevras
+    assert {'description', 'files', 'name', 'epoch'}.issubset(captured['options']['package_attrs'])
+    assert sorted(values) == ['nano-7.2-1.x86_64', 'vim-2:9.1-2.x86_64']
+    assert values['vim-2:9.1-2.x86_64']['files'] == ['/usr/bin/vim']
+
+
+def test_list_fd_readers_report_truncated_streams():
+    c = _make_client_stub()
+
+    def _list_fd_sync(options, pipe_w, timeout=None):
+        os.write(pipe_w, b'{"name": "nano"}{"name": "vi')
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd_sync)
+    try:
+        c.GetPackages({'scope': 'installed'}, sync=True)
+    except dnfd_client.DaemonError as e:
+        assert 'truncated' in str(e)
+    else:
+        assert False, "a truncated listing must not be returned"
+
+    def _list_fd(options, pipe_w, reply_handler=None, error_handler=None, timeout=None):
+        _list_fd_sync(options, pipe_w)
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd)
+    c.GetPackages({'scope': 'installed'})
+    event = c.eventQueue.get(timeout=5)
+    assert event['value']['result'] is None
+    assert isinstance(event['value']['error'], ValueError)
+    assert not c.is_busy()
+
+
+def test_waited_requests_are_scheduled():
+    c = _make_client_stub()
+    release = threading.Event()
+
+    def _list_fd(options, pipe_w, reply_handler=None, error_handler=None, timeout=None):
+        fd = os.dup(pipe_w)
+
+        def _writer():
+            release.wait(5)
+            os.write(fd, json.dumps({'name': options['scope']}).encode('utf-8'))
+            os.close(fd)
+
+        threading.Thread(target=_writer, daemon=True).start()
+
+    c.Proxy = lambda cmd: _FakeProxy(list_fd=_list_fd)
+    # an exclusive request of the main session is running
+    transaction = c._scheduler.submit({'cmd': 'RunTransaction'}, lambda request: None)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(c.GetPackages({'scope': 'all'}, wait=True)))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+    assert c._scheduler.running() == ['RunTransaction']
+    c._scheduler.done(transaction)
+    release.set()
+    waiter.join(5)
+    assert result == [[{'name': 'all'}]]
+    # the result is returned, not posted
+    assert c.eventQueue.empty()
+    assert not c.is_busy()
+
+    # a request dropped by a reset fails instead of waiting forever
+    c._scheduler.submit({'cmd': 'RunTransaction'}, lambda request: None)
+    errors = []
+
+    def _waited():
+        try:
+            c.GetPackages({'scope': 'all'}, wait=True)
+        except dnfd_client.DaemonError as e:
+            errors.append(str(e))
+
+    waiter = threading.Thread(target=_waited)
+    waiter.start()
+    waiter.join(0.1)
+    c._reset_async_request_guard("reloadDaemon-start")
+    waiter.join(5)
+    assert errors == ['GetPackages_fd request dropped (reloadDaemon-start)']
+
+
+class _FakeSessionObject:
+    """Fake daemon object: session manager or session interfaces."""
+    def __init__(self, daemon, path):
+        self.daemon = daemon
+        self.path = path
+
+    def open_session(self, options):
+        self.daemon.opened += 1
+        path = '/org/rpm/dnf/v0/s%d' % self.daemon.opened
+        self.daemon.sessions[path] = dict(options)
+        return path
+
+    def close_session(self, path):
+        return self.daemon.sessions.pop(path, None) is not None
+
+    def Introspect(self, timeout=None):
+        if self.path not in self.daemon.sessions:
+            raise RuntimeError('UnknownObject %s' % self.path)
+        return '<node/>'
+
+    def list(self, options, reply_handler=None, error_handler=None, timeout=None):
+        self.daemon.calls.append((self.path, options))
+        result = [{'name': 'nano', 'epoch': '0', 'version': '8.0', 'release': '1',
+                   'arch': 'x86_64', 'repo_id': 'fedora'}]
+        if reply_handler is None:
+            return result
+        reply_handler(result)
+
+
+class _FakeDaemonBus:
+    def __init__(self):
+        self.opened = 0
+        self.sessions = {}
+        self.calls = []
+
+    def get_object(self, bus_name, path):
+        return _FakeSessionObject(self, path)
+
+
+def test_session_pool_opens_lazily_reuses_and_recycles_sessions():
+    bus = _FakeDaemonBus()
+    pool = dnfd_client.SessionPool(bus, size=2)
+    pool.session_options = {'load_available_repos': True}
+    assert bus.opened == 0
+
+    first = pool.acquire()
+    second = pool.acquire()
+    assert pool.acquire() is None  # exhausted
+    assert bus.opened == 2
+    assert bus.sessions[first.path] == {'load_available_repos': True}
+
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+
+    # idle sessions are closed at once, busy ones when released
+    pool.recycle()
+    assert list(bus.sessions) == [second.path]
+    pool.release(second)
+    assert bus.sessions == {}
+    assert pool.acquire().path not in (first.path, second.path)
+
+    pool.close()
+    assert bus.sessions == {}
+
+
+def test_session_pool_replaces_sessions_failing_health_check():
+    bus = _FakeDaemonBus()
+    pool = dnfd_client.SessionPool(bus, size=1)
+    session = pool.acquire()
+    pool.release(session, failed=True)
+    del bus.sessions[session.path]  # e.g. the daemon was restarted
+
+    replacement = pool.acquire()
+    assert replacement is not session
+    assert replacement.path in bus.sessions
+
+
+def test_session_pool_checks_and_opens_sessions_without_the_lock():
+    bus = _FakeDaemonBus()
+    pool = dnfd_client.SessionPool(bus, size=2)
+    locked = []
+    open_session = _FakeSessionObject.open_session
+    introspect = _FakeSessionObject.Introspect
+
+    def _open_session(self, options):
+        locked.append(pool._lock.locked())
+        return open_session(self, options)
+
+    def _introspect(self, timeout=None):
+        locked.append(pool._lock.locked())
+        return introspect(self, timeout)
+
+    _FakeSessionObject.open_session = _open_session
+    _FakeSessionObject.Introspect = _introspect
+    try:
+        session = pool.acquire()
+        pool.release(session, failed=True)
+        assert pool.acquire() is session
+    finally:
+        _FakeSessionObject.open_session = open_session
+        _FakeSessionObject.Introspect = introspect
+    assert locked == [False, False]
+
+
+def test_pooled_query_without_session_waits_for_the_main_session():
+    c = _make_client_stub()
+    c._session_pool = dnfd_client.SessionPool(bus=None, size=1)
+    c._session_pool.acquire = lambda: None  # sessions cannot be opened
+    c._pool_scheduler = dnfd_client.RequestScheduler(max_concurrent=1)
+    main = _PendingCalls()
+    c.Proxy = lambda cmd: main
+
+    c._run_dbus_async('RunTransaction', False, {})
+    request_id = c._run_dbus_async('Search', True, {'patterns': ['nano']})
+    # not run on the main session while the transaction is in progress
+    assert main.methods() == ['do_transaction']
+    assert not c._pool_scheduler.is_busy()
+
+    main.reply(0)
+    assert main.methods() == ['do_transaction', 'list']
+    main.reply(1, [])
+    evt = c.eventQueue.get_nowait()
+    assert evt['event'] == 'Search'
+    assert evt['request_id'] == request_id
+    assert not c.is_busy()
+
+
+def test_read_only_queries_run_on_pooled_session_while_main_session_is_busy():
+    c = _make_client_stub()
+    bus = _FakeDaemonBus()
+    c._session_pool = dnfd_client.SessionPool(bus, size=2)
+    c._pool_scheduler = dnfd_client.RequestScheduler(max_concurrent=2)
+    main = _PendingCalls()
+    c.Proxy = lambda cmd: main
+    c.proxyMethod['GetAttribute'] = 'list'
+
+    c._run_dbus_async('RunTransaction', False, {})
+    assert c.is_busy()
+    request_id = c._run_dbus_async('Search', True, {'patterns': ['nano']})
+
+    evt = c.eventQueue.get_nowait()
+    assert evt['request_id'] == request_id
+    assert evt['value']['error'] is None
+    assert len(evt['value']['result']) == 1
+    assert bus.calls == [('/org/rpm/dnf/v0/s1', {'patterns': ['nano']})]
+    assert main.methods() == ['do_transaction']
+
+    # sync queries use the pool as well
+    assert c._run_dbus_sync('GetAttribute', {'patterns': ['nano']})[0]['name'] == 'nano'
+    assert [call[0] for call in bus.calls] == ['/org/rpm/dnf/v0/s1'] * 2
+
+
+def test_comps_index_is_built_once_in_background_and_waited_for():
+    c = _make_client_stub()
+    release = threading.Event()
+    built = []
+
+    def _build():
+        release.wait(5)
+        built.append(dnfd_client.CompsIndex([]))
+        return built[-1], 'comps.xml'
+
+    c._build_comps_index = _build
+    c.prewarm_comps_base()
+    while c._comps_building is None:
+        time.sleep(0.001)
+    assert not c.comps_base_stats()['ready']
+
+    # a query needing the index waits for the build in progress
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(c._get_comps_index()))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    waiter.join(5)
+    assert results == built and len(built) == 1
+    stats = c.comps_base_stats()
+    assert stats['ready'] and stats['source'] == 'comps.xml'
+    assert stats['build_time'] >= 0.05 and stats['wait_time'] > 0
+    assert c._get_comps_index() is built[0]
+
+
+def test_comps_index_invalidated_while_building_is_not_kept():
+    c = _make_client_stub()
+
+    def _build():
+        # e.g. repositories enabled while the index was being built
+        c._invalidate_comps_base()
+        return dnfd_client.CompsIndex([]), 'libdnf5'
+
+    c._build_comps_index = _build
+    assert c._get_comps_index() is not None
+    assert not c.comps_base_stats()['ready']
+    fresh = dnfd_client.CompsIndex([])
+    c._build_comps_index = lambda: (fresh, 'libdnf5')
+    assert c._get_comps_index() is fresh
+    assert c._get_comps_index() is fresh
+
+
+def test_comps_queries_use_an_index_built_once():
+    c = _make_client_stub()
+    built = []
+
+    def _build():
+        built.append(dnfd_client.CompsIndex([('editors', 'Editors', ['vim', 'nano']),
+                                             ('system-tools', 'System Tools', ['nano'])]))
+        return built[-1], 'comps.xml'
+
+    c._build_comps_index = _build
+    assert c.GetGroups(sync=True) == [['editors', 'Editors'], ['system-tools', 'System Tools']]
+    assert sorted(c.GetGroupPackageNames('editors', sync=True)) == ['nano', 'vim']
+    assert c.GetGroupsFromPackage('nano', sync=True) == ['editors', 'system-tools']
+    assert len(built) == 1
+
+    c._invalidate_comps_base()
+    assert c.GetGroupsFromPackage(['vim'], sync=True) == ['editors']
+    assert len(built) == 2
+
+
+def test_comps_index_falls_back_to_libdnf5_if_comps_are_not_cached():
+    c = _make_client_stub()
+    c.GetRepositories = lambda **_kwargs: [{'id': 'not-cached-repo'}]
+    bases = []
+    c._build_comps_base = lambda: bases.append(object()) or bases[-1]
+    from_libdnf5 = dnfd_client.CompsIndex.__dict__['from_libdnf5']
+    dnfd_client.CompsIndex.from_libdnf5 = staticmethod(lambda base: dnfd_client.CompsIndex([('base', 'Base', [])]))
+    try:
+        index, source = c._build_comps_index()
+    finally:
+        dnfd_client.CompsIndex.from_libdnf5 = from_libdnf5
+    assert source == 'libdnf5' and len(bases) == 1
+    assert index.groups() == [['base', 'Base']]
+
 if __name__ == '__main__':
     tests = [
         test_proxy_routes_commands_to_expected_interfaces,
@@ -324,9 +829,32 @@ if __name__ == '__main__':
         test_search_sync_adds_required_attrs_and_returns_pkg_ids,
         test_advisories_sync_returns_unpacked_result,
         test_run_transaction_async_uses_infinite_timeout,
-        test_async_guard_rejects_second_command_and_emits_event,
+        test_async_requests_are_queued_while_an_exclusive_one_runs,
+        test_scheduler_overlaps_read_only_requests_up_to_the_limit,
+        test_scheduler_control_commands_bypass_the_queue,
+        test_session_pool_opens_lazily_reuses_and_recycles_sessions,
+        test_session_pool_replaces_sessions_failing_health_check,
+        test_session_pool_checks_and_opens_sessions_without_the_lock,
+        test_pooled_query_without_session_waits_for_the_main_session,
+        test_read_only_queries_run_on_pooled_session_while_main_session_is_busy,
         test_get_result_getattribute_error_markers_and_success_path,
         test_handle_dbus_error_maps_known_errors_and_fallback,
+        test_unpack_dbus_converts_nested_replies_to_native_types,
+        test_unpack_dbus_handles_subclasses_and_mixed_arrays,
+        test_event_queue_merges_progress_until_delivered,
+        test_event_queue_keeps_ordering_around_other_events,
+        test_event_queue_wait_wakes_up_on_put_and_tracks_latency,
+        test_json_stream_decoder_handles_objects_split_across_reads,
+        test_json_stream_decoder_keeps_utf8_sequences_split_across_reads,
+        test_progressive_list_fd_posts_sequenced_batches_then_complete,
+        test_overlapping_list_fd_readers_are_all_tracked_and_waited_for,
+        test_list_fd_readers_report_truncated_streams,
+        test_waited_requests_are_scheduled,
+        test_get_attributes_sync_maps_list_fd_reply_to_requested_nevras,
+        test_comps_index_is_built_once_in_background_and_waited_for,
+        test_comps_index_invalidated_while_building_is_not_kept,
+        test_comps_queries_use_an_index_built_once,
+        test_comps_index_falls_back_to_libdnf5_if_comps_are_not_cached,
     ]
 
     passed = 0
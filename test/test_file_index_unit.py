@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.file_index on a libdnf5 like filelists cache."""
+
+import gzip
+import os
+import tempfile
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import comps_reader
+from dnfdragora import dnf_backend
+from dnfdragora import file_index
+from stubs import FakeRootBackend, make_cache
+
+REPOMD = '''<?xml version="1.0" encoding="UTF-8"?>
+<repomd xmlns="http://linux.duke.edu/metadata/repo">
+  <data type="filelists">
+    <checksum type="sha256">%s</checksum>
+    <location href="repodata/%s-filelists.xml.gz"/>
+  </data>
+</repomd>
+'''
+PACKAGE = '''  <package pkgid="0" name="%s" arch="%s">
+    <version epoch="%s" ver="%s" rel="1.fc40"/>
+%s
+  </package>
+'''
+PACKAGES = [
+    ('vim-enhanced', 'x86_64', '2', '9.1', ['/usr/bin/vim', '/usr/bin/rvim', '/usr/share/vim/vimfiles/ftdetect']),
+    ('vim-common', 'x86_64', '2', '9.1', ['/usr/bin/xxd', '/usr/share/vim/vim91/syntax/c.vim',
+                                          '/usr/share/vim/vim91/syntax/python.vim']),
+    ('nano', 'x86_64', '0', '8.0', ['/usr/bin/nano', '/usr/share/doc/nano/README', '/etc/nanorc']),
+    ('NetworkManager', 'x86_64', '1', '1.46', ['/usr/sbin/NetworkManager', '/usr/lib/NetworkManager/README']),
+]
+
+
+def _write_repo(cache_dir, repo_id, checksum, packages=PACKAGES):
+    ''' libdnf5 like cache directory of repo_id with a filelists of packages '''
+    repodata = os.path.join(cache_dir, repo_id + '-0123456789abcdef', 'repodata')
+    os.makedirs(repodata, exist_ok=True)
+    with open(os.path.join(repodata, 'repomd.xml'), 'w') as f:
+        f.write(REPOMD % (checksum, checksum))
+    with gzip.open(os.path.join(repodata, checksum + '-filelists.xml.gz'), 'wt') as f:
+        f.write('<filelists xmlns="http://linux.duke.edu/metadata/filelists" packages="%d">\n' % len(packages))
+        for name, arch, epoch, ver, files in packages:
+            f.write(PACKAGE % (name, arch, epoch, ver,
+                               '\n'.join('    <file>%s</file>' % path for path in files)))
+        f.write('</filelists>\n')
+
+
+class _FakeRootBackend(FakeRootBackend):
+    """FakeRootBackend with fedora as the only repository."""
+
+    def __init__(self, cache, cache_dir, directory):
+        FakeRootBackend.__init__(self, cache, file_index_dir=directory)
+        self.cache_dir = cache_dir
+
+    def file_index_sources(self):
+        return _sources(self.cache_dir, ['fedora'])
+
+
+class _NoFilelistsBackend(_FakeRootBackend):
+    """_FakeRootBackend whose enabled repository has no cached filelists."""
+
+    def __init__(self, cache, directory):
+        _FakeRootBackend.__init__(self, cache, None, directory)
+        self.listed = 0
+
+    file_index_sources = dnf_backend.DnfRootBackend.file_index_sources
+
+    def rpmdb_state(self):
+        return 'rpmdb-state'
+
+    def GetRepositories(self, enable_disable='all', sync=False):
+        self.listed += 1
+        return [{'id': 'dnfdragora-test-not-cached'}]
+
+
+def _sources(cache_dir, repo_ids):
+    sources = []
+    for repo_id in repo_ids:
+        path, checksum = comps_reader.find_repo_file(repo_id, file_index.FILELISTS_TYPES, [cache_dir])
+        sources.append((repo_id, checksum, lambda path=path: file_index.read_filelists(path)))
+    return sources
+
+
+def test_segment_paths_and_names():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fedora.idx')
+        packages = [('%s-%s:%s-1.fc40.%s' % (name, epoch, ver, arch), files)
+                    for name, arch, epoch, ver, files in PACKAGES]
+        assert file_index.write_segment(path, iter(packages)) == 11
+        segment = file_index.FileSegment(path)
+        assert len(segment) == 11
+
+        def found(results):
+            return sorted((segment.package(pkg), path) for pkg, path in results)
+
+        assert found(segment.paths('/usr/bin/vim')) == [('vim-enhanced-2:9.1-1.fc40.x86_64', '/usr/bin/vim')]
+        assert found(segment.paths('/usr/bin/vi')) == []
+        # file name prefix
+        assert sorted(p for _, p in found(segment.paths('/usr/bin/', prefix=True))) == [
+            '/usr/bin/nano', '/usr/bin/rvim', '/usr/bin/vim', '/usr/bin/xxd']
+        # directory prefix, files of the subdirectories too
+        assert sorted(p for _, p in found(segment.paths('/usr/share/vim', prefix=True))) == [
+            '/usr/share/vim/vim91/syntax/c.vim', '/usr/share/vim/vim91/syntax/python.vim',
+            '/usr/share/vim/vimfiles/ftdetect']
+        # case insensitive unless icase is unset
+        assert found(segment.paths('/usr/sbin/networkmanager')) == [
+            ('NetworkManager-1:1.46-1.fc40.x86_64', '/usr/sbin/NetworkManager')]
+        assert found(segment.paths('/usr/sbin/networkmanager', icase=False)) == []
+
+        assert found(segment.names('README')) == [
+            ('NetworkManager-1:1.46-1.fc40.x86_64', '/usr/lib/NetworkManager/README'),
+            ('nano-0:8.0-1.fc40.x86_64', '/usr/share/doc/nano/README')]
+        assert found(segment.names('n', prefix=True, dirs=file_index.BINARY_DIRS)) == [
+            ('NetworkManager-1:1.46-1.fc40.x86_64', '/usr/sbin/NetworkManager'),
+            ('nano-0:8.0-1.fc40.x86_64', '/usr/bin/nano')]
+        assert found(segment.names('nano', dirs=('/usr/sbin',))) == []
+
+
+def test_file_index_search_patterns():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'libdnf5')
+        _write_repo(cache_dir, 'fedora', 'a' * 64)
+        index = file_index.FileIndex(os.path.join(tmp, 'filelists'))
+        # not built yet, dnf5daemon is asked
+        assert index.search(['/usr/bin/vim']) is None
+        assert index.update(_sources(cache_dir, ['fedora'])) == 1
+        assert index.ready
+        assert index.search(['/usr/bin/vim', '/etc/nanorc']) == {
+            'vim-enhanced-2:9.1-1.fc40.x86_64', 'nano-0:8.0-1.fc40.x86_64'}
+        assert index.search(['/usr/share/vim/*']) == {'vim-enhanced-2:9.1-1.fc40.x86_64',
+                                                      'vim-common-2:9.1-1.fc40.x86_64'}
+        # names are binaries, paths are file names
+        assert index.search(['xxd'], filenames=False, binaries=True) == {'vim-common-2:9.1-1.fc40.x86_64'}
+        assert index.search(['README'], filenames=False, binaries=True) == set()
+        assert index.search(['xxd']) == set()
+        # other globs are not answered
+        assert index.search(['*vim*']) is None
+        assert index.search(['/usr/bin/v?m']) is None
+        assert index.stats() == {'segments': 1, 'packages': 4, 'files': 11}
+
+
+def test_file_index_update_builds_changed_segments_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'libdnf5')
+        _write_repo(cache_dir, 'fedora', 'a' * 64)
+        _write_repo(cache_dir, 'updates', 'b' * 64, PACKAGES[:1])
+        directory = os.path.join(tmp, 'filelists')
+        index = file_index.FileIndex(directory)
+        assert index.update(_sources(cache_dir, ['fedora', 'updates'])) == 2
+        assert len(os.listdir(directory)) == 2
+
+        # unchanged checksums, segments are mapped again by a new session
+        index = file_index.FileIndex(directory)
+        assert index.update(_sources(cache_dir, ['fedora', 'updates'])) == 0
+        assert index.search(['/usr/bin/nano']) == {'nano-0:8.0-1.fc40.x86_64'}
+
+        # updates metadata refreshed, fedora is kept
+        _write_repo(cache_dir, 'updates', 'c' * 64, [('nano', 'x86_64', '0', '8.1', ['/usr/bin/nano'])])
+        assert index.update(_sources(cache_dir, ['fedora', 'updates'])) == 1
+        assert index.search(['/usr/bin/nano']) == {'nano-0:8.0-1.fc40.x86_64', 'nano-0:8.1-1.fc40.x86_64'}
+        assert len(os.listdir(directory)) == 2
+
+        # updates disabled, its segment is removed
+        assert index.update(_sources(cache_dir, ['fedora'])) == 0
+        assert os.listdir(directory) == [name for name in os.listdir(directory) if name.startswith('fedora-')]
+        assert index.search(['/usr/bin/nano']) == {'nano-0:8.0-1.fc40.x86_64'}
+
+        # a damaged segment is built again
+        with open(os.path.join(directory, os.listdir(directory)[0]), 'r+b') as f:
+            f.write(b'XXXX')
+        index = file_index.FileIndex(directory)
+        assert index.update(_sources(cache_dir, ['fedora'])) == 1
+
+
+def test_backend_file_search_builds_the_index_on_demand():
+    cache = make_cache([
+        ('installed', 'r', {'name': name, 'epoch': epoch, 'version': ver, 'arch': arch, 'repo_id': '@System'})
+        if name == 'nano' else ('available', 'i', {'name': name, 'epoch': epoch, 'version': ver, 'arch': arch})
+        for name, arch, epoch, ver, _ in PACKAGES])
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'libdnf5')
+        _write_repo(cache_dir, 'fedora', 'a' * 64)
+        backend_ = _FakeRootBackend(cache, cache_dir, os.path.join(tmp, 'filelists'))
+        query = backend_.search_query('all')
+        # the first search is asked to dnf5daemon while the index is built
+        assert backend_.file_search(query, ['/usr/bin/*']) is None
+        backend_._file_index_thread.join()
+        assert [po.name for po in backend_.file_search(query, ['/usr/bin/*'])] == [
+            'nano', 'vim-common', 'vim-enhanced']
+        assert [po.name for po in backend_.file_search(backend_.search_query('installed'), ['/usr/bin/*'])] == [
+            'nano']
+        assert [po.name for po in backend_.file_search(query, ['networkmanager'], filenames=False,
+                                                       binaries=True)] == ['NetworkManager']
+        assert backend_.file_search(query, ['*vim']) is None
+
+
+def test_missing_filelists_are_not_asked_again_until_repositories_change():
+    cache = make_cache([])
+    with tempfile.TemporaryDirectory() as tmp:
+        backend_ = _NoFilelistsBackend(cache, os.path.join(tmp, 'filelists'))
+        query = backend_.search_query('all')
+        rpm = file_index.rpm
+        file_index.rpm = object()
+        try:
+            assert backend_.file_search(query, ['/usr/bin/vim']) is None
+            backend_._file_index_thread.join()
+            assert backend_.listed == 1
+            # no new update, nor repository list, for the next searches
+            thread = backend_._file_index_thread
+            assert backend_.file_search(query, ['/usr/bin/vim']) is None
+            assert backend_._file_index_thread is thread
+            # the enabled repositories are listed once per change
+            backend_.update_file_index()
+            backend_._file_index_thread.join()
+            assert backend_.listed == 1
+
+            backend_.clear_cache(also_groups=True)
+            assert backend_.file_search(query, ['/usr/bin/vim']) is None
+            assert backend_._file_index_thread is not thread
+            backend_._file_index_thread.join()
+            assert backend_.listed == 2
+        finally:
+            file_index.rpm = rpm
+
+
+if __name__ == '__main__':
+    tests = [
+        test_segment_paths_and_names,
+        test_file_index_search_patterns,
+        test_file_index_update_builds_changed_segments_only,
+        test_backend_file_search_builds_the_index_on_demand,
+        test_missing_filelists_are_not_asked_again_until_repositories_change,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} file index unit checks passed')
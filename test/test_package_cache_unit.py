@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.backend.PackageCache with fake packages."""
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import backend
+
+
+class _FakePackage(backend.Package):
+    def __init__(self, name, version, arch, action, grp=None):
+        backend.Package.__init__(self, None)
+        self.name = name
+        self.version = version
+        self.arch = arch
+        self.action = action
+        self.grp = grp
+        self.freed = False
+
+    def free(self):
+        self.freed = True
+
+
+def test_populate_marks_filter_populated_on_last_batch_only():
+    cache = backend.PackageCache()
+    cache.populate('installed', [_FakePackage('bash', '5.2-1', 'x86_64', 'r')], complete=False)
+    assert cache.is_loading('installed')
+    assert not cache.is_populated('installed')
+
+    cache.populate('installed', [_FakePackage('zsh', '5.9-1', 'x86_64', 'r')])
+    assert cache.is_populated('installed')
+    assert not cache.is_loading('installed')
+    assert sorted(p.name for p in cache._get_packages('installed')) == ['bash', 'zsh']
+
+
+def test_updates_win_over_available_whatever_the_populate_order():
+    cache = backend.PackageCache()
+    available = _FakePackage('vim', '9.1-2', 'x86_64', 'i')
+    update = _FakePackage('vim', '9.1-2', 'x86_64', 'u')
+
+    cache.populate('available', [available])
+    assert cache.find_packages([update]) == [update]
+    cache.populate('updates', [update])
+
+    assert cache._get_packages('updates') == [update]
+    assert cache._get_packages('available') == []
+    # a later available copy does not move it back
+    assert cache.find_packages([_FakePackage('vim', '9.1-2', 'x86_64', 'i')]) == [update]
+
+
+def test_rejected_duplicates_are_freed():
+    cache = backend.PackageCache()
+    installed = _FakePackage('bash', '5.2-1', 'x86_64', 'r')
+    duplicate = _FakePackage('bash', '5.2-1', 'x86_64', 'r')
+    cache.populate('installed', [installed])
+    cache.populate('installed', [installed, duplicate])
+    assert cache._get_packages('installed') == [installed]
+    assert duplicate.freed
+    assert not installed.freed
+
+
+def test_reset_scope_keeps_the_other_scopes():
+    cache = backend.PackageCache()
+    installed = _FakePackage('bash', '5.2-1', 'x86_64', 'r')
+    cache.populate('installed', [installed])
+    cache.populate('updates', [_FakePackage('vim', '9.1-2', 'x86_64', 'u')])
+    cache.populate('available', [_FakePackage('nano', '7.2-1', 'x86_64', 'i')])
+
+    cache.reset_scope('updates')
+    cache.reset_scope('available')
+    assert not cache.is_populated('updates')
+    assert cache.is_populated('installed')
+    assert cache.packages('installed') == [installed]
+    # packages of the reset scopes are cached again as new objects
+    vim = _FakePackage('vim', '9.1-2', 'x86_64', 'u')
+    assert cache.find_packages([vim]) == [vim]
+
+
+def test_apply_transaction_moves_packages_between_scopes():
+    cache = backend.PackageCache()
+    old_vim = _FakePackage('vim', '9.1-1', 'x86_64', 'r')
+    nano = _FakePackage('nano', '7.2-1', 'x86_64', 'r')
+    cache.populate('installed', [old_vim, nano])
+    cache.populate('updates', [_FakePackage('vim', '9.1-2', 'x86_64', 'u')])
+    cache.populate('available', [_FakePackage('zsh', '5.9-1', 'x86_64', 'i')])
+
+    vim = _FakePackage('vim', '9.1-2', 'x86_64', 'r')
+    zsh = _FakePackage('zsh', '5.9-1', 'x86_64', 'r')
+    cache.apply_transaction([vim, zsh], [str(old_vim), str(nano)])
+    assert sorted(cache.packages('installed'), key=str) == [vim, zsh]
+    assert cache.packages('updates') == []
+    assert cache.packages('available') == []
+    assert cache.get_package('vim-9.1-2.x86_64') is vim
+    assert cache.get_package(str(nano)) is None
+
+    # the removed package is available again once listed
+    available_nano = _FakePackage('nano', '7.2-1', 'x86_64', 'i')
+    cache.replace_names('available', {'nano', 'zsh'}, [available_nano])
+    assert cache.packages('available') == [available_nano]
+    assert cache.get_package('zsh-5.9-1.x86_64') is zsh
+
+
+def test_group_index_follows_the_cached_packages():
+    cache = backend.PackageCacheWithFilters()
+    vim = _FakePackage('vim', '9.1-1', 'x86_64', 'r', 'Applications/Editors')
+    cache.populate('installed', [vim, _FakePackage('bash', '5.2-1', 'x86_64', 'r', 'System/Base')])
+    cache.populate('available', [_FakePackage('nano', '7.2-1', 'x86_64', 'i', 'Applications/Editors'),
+                                 _FakePackage('btanks', '0.9-1', 'x86_64', 'i')])
+    assert cache.groups('installed') == ['Applications/Editors', 'System/Base']
+    assert cache.groups() == ['Applications/Editors', 'System/Base', 'Uncategorized']
+    assert cache.group_counts('available') == {'Applications/Editors': 1, 'Uncategorized': 1}
+    assert cache.group_packages('installed', 'Applications/Editors') == [vim]
+
+    # an update moves vim-9.1-2 out of available
+    update = _FakePackage('vim', '9.1-2', 'x86_64', 'u', 'Applications/Editors')
+    cache.populate('available', [_FakePackage('vim', '9.1-2', 'x86_64', 'i', 'Applications/Editors')])
+    cache.populate('updates', [update])
+    assert cache.group_counts('available') == {'Applications/Editors': 1, 'Uncategorized': 1}
+    assert cache.group_packages('updates', 'Applications/Editors') == [update]
+
+    cache.apply_transaction([_FakePackage('vim', '9.1-2', 'x86_64', 'r', 'Applications/Editors')], [str(vim)])
+    assert cache.groups('updates') == []
+    assert [str(po) for po in cache.group_packages('installed', 'Applications/Editors')] == ['vim-9.1-2.x86_64']
+
+    cache.reset_scope('available')
+    assert cache.groups('available') == []
+    assert cache.groups() == ['Applications/Editors', 'System/Base']
+
+
+def test_name_arch_repo_and_nevra_indexes():
+    cache = backend.PackageCacheWithFilters()
+    glibc = _FakePackage('glibc', '2.39-1', 'x86_64', 'r')
+    glibc32 = _FakePackage('glibc', '2.39-1', 'i686', 'r')
+    glibc_new = _FakePackage('glibc', '2.39-2', 'x86_64', 'u')
+    nano = _FakePackage('nano', '7.2-1', 'noarch', 'i')
+    for po, repo in ((glibc, '@System'), (glibc32, '@System'), (glibc_new, 'updates'), (nano, 'fedora')):
+        po.repository = repo
+    cache.populate('installed', [glibc, glibc32])
+    cache.populate('updates', [glibc_new])
+    cache.populate('available', [nano])
+
+    assert sorted(cache.name_packages('installed', 'glibc'), key=str) == [glibc32, glibc]
+    assert sorted(cache.name_packages(None, 'glibc'), key=str) == [glibc32, glibc, glibc_new]
+    assert cache.name_packages('available', 'glibc') == []
+    assert cache.names('available') == {'nano'}
+    assert cache.arches() == ['i686', 'noarch', 'x86_64']
+    assert cache.arch_packages('installed', 'i686') == [glibc32]
+    assert cache.repos() == ['@System', 'fedora', 'updates']
+    assert cache.repo_packages(None, 'updates') == [glibc_new]
+    assert cache.get_nevra('glibc', 0, '2.39', '1', 'i686') is glibc32
+    assert cache.get_nevra('glibc', '0', '2.39', '2', 'x86_64') is glibc_new
+    assert cache.get_package('glibc-0:2.39-2.x86_64') is glibc_new
+    assert sorted(cache.match_packages(None, 'name', lambda name: name.startswith('n'))) == [nano]
+
+    # the arch filter applies to the lookups too
+    cache.filters.get('arch').change(['x86_64', 'noarch'])
+    assert cache.name_packages('installed', 'glibc') == [glibc]
+
+    cache.replace_names('installed', {'glibc'}, [_FakePackage('glibc', '2.39-2', 'x86_64', 'r')])
+    assert [str(po) for po in cache.name_packages('installed', 'glibc')] == ['glibc-2.39-2.x86_64']
+    assert cache.arches('installed') == ['x86_64']
+    assert cache.get_nevra('glibc', 0, '2.39', '1', 'i686') is None
+
+
+def test_filtered_views_are_shared_until_packages_or_filters_change():
+    cache = backend.PackageCacheWithFilters()
+    bash = _FakePackage('bash', '5.2-1', 'x86_64', 'r')
+    cache.populate('installed', [bash, _FakePackage('glibc', '2.39-1', 'i686', 'r')])
+    cache.populate('available', [_FakePackage('nano', '7.2-1', 'x86_64', 'i')])
+
+    installed = cache._get_packages('installed')
+    assert cache._get_packages('installed') is installed
+    everything = cache.view(['installed', 'available'])
+    assert cache.view(('installed', 'available')) is everything
+    assert len(everything) == 3
+    assert cache.view_stats() == {'hits': 2, 'copies': 2, 'packages_not_copied': 5}
+
+    # another scope changes, the installed view is kept
+    cache.populate('updates', [_FakePackage('vim', '9.1-2', 'x86_64', 'u')])
+    assert cache._get_packages('installed') is installed
+    cache.populate('available', [_FakePackage('zsh', '5.9-1', 'x86_64', 'i')])
+    assert len(cache.view(['installed', 'available'])) == 4
+
+    cache.filters.get('arch').change(['x86_64'])
+    assert cache._get_packages('installed') == [bash]
+    cache.apply_transaction([], [str(bash)])
+    assert cache._get_packages('installed') == []
+    cache.reset()
+    assert cache._get_packages('installed') == []
+    assert cache.view_stats()['copies'] == 6
+
+
+if __name__ == '__main__':
+    tests = [
+        test_populate_marks_filter_populated_on_last_batch_only,
+        test_updates_win_over_available_whatever_the_populate_order,
+        test_rejected_duplicates_are_freed,
+        test_reset_scope_keeps_the_other_scopes,
+        test_apply_transaction_moves_packages_between_scopes,
+        test_group_index_follows_the_cached_packages,
+        test_name_arch_repo_and_nevra_indexes,
+        test_filtered_views_are_shared_until_packages_or_filters_change,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} PackageCache unit checks passed')
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.package_query.PackageQuery over a PackageCache."""
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from stubs import FakeRootBackend, make_cache
+
+
+def _row(scope, action, name, version, arch, repo, group, size):
+    return scope, action, {'name': name, 'version': version, 'arch': arch, 'repo_id': repo,
+                           'group': group, 'install_size': size}
+
+
+def _cache():
+    return make_cache([
+        _row('installed', 'r', 'vim-enhanced', '9.1', 'x86_64', '@System', 'Applications/Editors', 4000),
+        _row('installed', 'r', 'glibc', '2.39', 'x86_64', '@System', 'System/Libraries', 9000),
+        _row('installed', 'r', 'glibc', '2.39', 'i686', '@System', 'System/Libraries', 8000),
+        _row('updates', 'u', 'vim-enhanced', '9.2', 'x86_64', 'updates', 'Applications/Editors', 4100),
+        _row('available', 'i', 'nano', '7.2', 'x86_64', 'fedora', 'Applications/Editors', 1000),
+        _row('available', 'i', 'emacs', '29.4', 'x86_64', 'fedora', 'Applications/Editors', 90000),
+        _row('available', 'i', 'wine-core', '9.0', 'i686', 'fedora', 'Emulators', 50000),
+    ])
+
+
+def _names(query):
+    return sorted(str(po) for po in query)
+
+
+def test_filters_compose_over_the_scopes():
+    cache = _cache()
+    editors = cache.query().group('Applications/Editors')
+    assert _names(editors) == ['emacs-29.4-1.fc40.x86_64', 'nano-7.2-1.fc40.x86_64',
+                               'vim-enhanced-9.1-1.fc40.x86_64', 'vim-enhanced-9.2-1.fc40.x86_64']
+    # every filter returns a new query
+    assert _names(editors.scope('available').size(max_size=2000)) == ['nano-7.2-1.fc40.x86_64']
+    assert editors.count() == 4
+    assert _names(cache.query('installed').multilib('x86_64')) == [
+        'glibc-2.39-1.fc40.x86_64', 'vim-enhanced-9.1-1.fc40.x86_64']
+    assert _names(cache.query().repo('fedora').arch('i686')) == ['wine-core-9.0-1.fc40.i686']
+    assert _names(cache.query('installed').has_update()) == ['vim-enhanced-9.1-1.fc40.x86_64']
+    assert cache.query('installed').has_update(False).count() == 2
+    assert _names(cache.query().names(['glibc', 'nano']).scope('available')) == ['nano-7.2-1.fc40.x86_64']
+    assert cache.query('updates', 'installed').scope().count() == 0
+
+    vim = cache.name_packages('updates', 'vim-enhanced')[0]
+    actions = {vim.pkg_id: 'u', 'nano,0,7.2,1.fc40,x86_64,fedora': 'i'}
+    assert _names(cache.query().queued(actions)) == ['nano-7.2-1.fc40.x86_64', 'vim-enhanced-9.2-1.fc40.x86_64']
+    assert cache.query().queued(actions, 'u').list() == [vim]
+
+
+def test_name_globs_and_cache_filters():
+    cache = _cache()
+    assert _names(cache.query().name_glob(['VIM*'])) == ['vim-enhanced-9.1-1.fc40.x86_64',
+                                                         'vim-enhanced-9.2-1.fc40.x86_64']
+    assert cache.query().name_glob(['VIM*'], icase=False).count() == 0
+    # NEVRA forms, as dnf5daemon with_nevra
+    assert _names(cache.query().name_glob(['glibc.i686', 'emacs-29*'], nevra=True)) == [
+        'emacs-29.4-1.fc40.x86_64', 'glibc-2.39-1.fc40.i686']
+    assert cache.query().name_glob(['vim-enhanced-0:9.2-1.fc40.x86_64'], nevra=True).count() == 1
+
+    # the arch filter of the cache applies as in get_packages
+    cache.filters.get('arch').change(['x86_64', 'noarch'])
+    assert cache.query().arch('i686').count() == 0
+    assert cache.query('installed').name_glob(['glibc']).count() == 1
+
+
+def test_query_plans_on_the_smallest_index_lookup():
+    cache = _cache()
+    checked = []
+
+    def spy(po):
+        checked.append(po.name)
+        return True
+
+    # the Emulators group has one available package, fedora three
+    query = cache.query('available').repo('fedora').group('Emulators').filter(spy)
+    assert _names(query) == ['wine-core-9.0-1.fc40.i686']
+    assert checked == ['wine-core']
+
+    checked.clear()
+    assert cache.query('available').repo('fedora').names(['nano']).filter(spy).count() == 1
+    assert checked == ['nano']
+
+
+def test_search_query_answers_the_daemon_scopes():
+    cache = _cache()
+    backend_ = FakeRootBackend(cache)
+    assert _names(backend_.search_query('upgradable')) == ['vim-enhanced-9.1-1.fc40.x86_64']
+    assert backend_.search_query('available', repos=['updates']).count() == 1
+    assert backend_.search_query('all', arches=['i686']).count() == 2
+    cache.reset_scope('available')
+    assert backend_.search_query('available', complete=True) is None
+    assert backend_.search_query('available').count() == 1
+
+
+if __name__ == '__main__':
+    tests = [
+        test_filters_compose_over_the_scopes,
+        test_name_globs_and_cache_filters,
+        test_query_plans_on_the_smallest_index_lookup,
+        test_search_query_answers_the_daemon_scopes,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} PackageQuery unit checks passed')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.package_snapshot."""
+
+import os
+import tempfile
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import dnf_backend, package_snapshot
+
+STATE = {
+    'rpmdb': ['/usr/lib/sysimage/rpm/rpmdb.sqlite', 1700000000000000000, 123456],
+    'repos': {'fedora': ['1700000000', 1700000000], 'updates': ['1700100000', 1700100000]},
+}
+
+
+def _package(backend, name, repo_id, action):
+    return dnf_backend.DnfPackage(backend, dbus_pkg={
+        'name': name, 'epoch': '0', 'version': '1.0', 'release': '1.fc40', 'arch': 'x86_64',
+        'repo_id': repo_id, 'install_size': 2048, 'download_size': 1024,
+        'summary': '%s summary' % name, 'group': 'Unspecified'}, action=action)
+
+
+def test_snapshot_round_trip_rebuilds_the_same_packages():
+    backend = object()
+    scopes = {
+        'installed': [_package(backend, 'bash', '@System', 'r').as_dbus_pkg()],
+        'updates': [_package(backend, 'vim', 'updates', 'u').as_dbus_pkg()],
+        'available': [_package(backend, 'nano', 'fedora', 'i').as_dbus_pkg()],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = package_snapshot.PackageSnapshot(os.path.join(tmp, 'dnfdragora', 'packages.json.gz'))
+        assert snapshot.load() is None
+        assert snapshot.save(STATE, scopes)
+
+        state, loaded = snapshot.load()
+        assert state == STATE
+        assert loaded == scopes
+        po = dnf_backend.DnfPackage(backend, dbus_pkg=loaded['updates'][0], action='u')
+        assert po.pkg_id == 'vim,0,1.0,1.fc40,x86_64,updates'
+        assert (po.summary, po.size, po.grp) == ('vim summary', 2048, 'Unspecified')
+
+
+def test_damaged_snapshot_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'packages.json.gz')
+        with open(path, 'wb') as f:
+            f.write(b'not gzip')
+        assert package_snapshot.PackageSnapshot(path).load() is None
+
+
+def test_changed_scopes_follow_rpmdb_and_repository_state():
+    assert package_snapshot.changed_scopes(STATE, dict(STATE)) == []
+
+    repos = dict(STATE['repos'], updates=['1700200000', 1700200000])
+    assert package_snapshot.changed_scopes(STATE, dict(STATE, repos=repos)) == ['updates', 'available']
+
+    rpmdb = [STATE['rpmdb'][0], STATE['rpmdb'][1] + 1, STATE['rpmdb'][2]]
+    assert package_snapshot.changed_scopes(STATE, dict(STATE, rpmdb=rpmdb)) == list(package_snapshot.SCOPES)
+    # current state unknown
+    assert package_snapshot.changed_scopes(STATE, None) == list(package_snapshot.SCOPES)
+
+
+if __name__ == '__main__':
+    tests = [
+        test_snapshot_round_trip_rebuilds_the_same_packages,
+        test_damaged_snapshot_is_ignored,
+        test_changed_scopes_follow_rpmdb_and_repository_state,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} package snapshot unit checks passed')
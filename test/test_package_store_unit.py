@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.package_store and the DnfPackageRow views."""
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import dnf_backend
+from dnfdragora import misc
+from dnfdragora.package_store import PackageStore
+
+
+class _Backend:
+    attribute_store = None
+
+
+def test_parse_nevra():
+    assert misc.parse_nevra('zypper-aptitude-0:1.14.59-1.fc38.noarch') == \
+        ('zypper-aptitude', '0', '1.14.59', '1.fc38', 'noarch')
+    assert misc.parse_nevra('vim-enhanced-2:9.1.16-1.fc40.x86_64') == \
+        ('vim-enhanced', '2', '9.1.16', '1.fc40', 'x86_64')
+    assert misc.parse_nevra('nano-7.2-1.fc40.x86_64') == ('nano', '', '7.2', '1.fc40', 'x86_64')
+
+
+def test_row_exposes_the_dnf_package_api():
+    backend = _Backend()
+    store = PackageStore()
+    values = {'name': 'vim-enhanced', 'epoch': '2', 'version': '9.1', 'release': '1.fc40',
+              'arch': 'x86_64', 'repo_id': 'updates', 'install_size': 4096,
+              'download_size': 1024, 'summary': 'Vi Improved – enhanced', 'group': 'Editors'}
+    row = dnf_backend.DnfPackageRow(backend, store, store.add(values, 'u'))
+    po = dnf_backend.DnfPackage(backend, dbus_pkg=values, action='u')
+    for attr in ('name', 'epoch', 'ver', 'rel', 'arch', 'repository', 'action', 'pkg_id',
+                 'full_nevra', 'fullname', 'fullver', '_summary', 'summary', 'grp', 'group',
+                 'install_size', 'download_size', 'size', 'sizeM', 'is_update', 'installed',
+                 'visible', 'selected', 'downgrade_po', 'url'):
+        assert getattr(row, attr) == getattr(po, attr), attr
+    assert str(row) == str(po) == 'vim-enhanced-2:9.1-1.fc40.x86_64'
+    assert row.as_dbus_pkg() == po.as_dbus_pkg()
+    # rows have no __dict__, view and lazy fields go back to the store
+    assert not hasattr(row, '__dict__')
+    other = dnf_backend.DnfPackageRow(backend, store, store.add(dict(values, name='vim'), 'u'))
+    row.set_select(True)
+    row.set_attributes({'description': 'editor', 'summary': 'Vi', 'group': 'Applications'})
+    assert row.selected and row.description == 'editor'
+    assert store.summary(0) == 'Vi' and store.get('group', 0) == 'Applications'
+    assert not other.selected and other._description == ''
+    # default values set are not kept
+    other.set_visible(True)
+    assert store.field(other._row, 'visible') is None
+
+
+def test_freed_rows_are_reused():
+    backend = _Backend()
+    store = PackageStore()
+    values = {'nevra': 'nano-0:8.0-1.fc40.x86_64', 'repo_id': 'fedora', 'summary': 'editor'}
+    first = dnf_backend.DnfPackageRow(backend, store, store.add(values, 'i'))
+    first.set_select(True)
+    first.free()
+    second = dnf_backend.DnfPackageRow(backend, store, store.add(dict(values, nevra='vim-2:9.1-1.fc40.x86_64'), 'u'))
+    assert len(store) == 1
+    assert (second.fullname, second.action, second.summary, second.selected) == \
+        ('vim-2:9.1-1.fc40.x86_64', 'u', 'editor', False)
+
+
+def test_store_interns_values_of_rows_from_nevra():
+    backend = _Backend()
+    store = PackageStore()
+    rows = [dnf_backend.DnfPackageRow(backend, store, store.add(
+        {'nevra': 'pkg%d-0:1.0-1.fc40.x86_64' % i, 'repo_id': 'fedora', 'install_size': i}, 'i'))
+        for i in range(100)]
+    assert len(store) == 100
+    assert rows[7].fullname == 'pkg7-1.0-1.fc40.x86_64'
+    assert rows[7].pkg_id == 'pkg7,0,1.0,1.fc40,x86_64,fedora'
+    assert rows[7].size == 7 and rows[7]._summary is None
+    # 100 names plus the shared epoch, version, release, arch, repo, group and action
+    assert len(store.values) == 100 + 7
+    assert store.nbytes() < 100 * 64
+
+
+if __name__ == '__main__':
+    tests = [
+        test_parse_nevra,
+        test_row_exposes_the_dnf_package_api,
+        test_freed_rows_are_reused,
+        test_store_interns_values_of_rows_from_nevra,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} PackageStore unit checks passed')
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.rpmdb_watcher on a temporary rpmdb directory."""
+
+import os
+import tempfile
+import threading
+import time
+
+from stubs import install_dependency_stubs
+
+install_dependency_stubs()
+
+from dnfdragora import rpmdb_watcher
+
+
+def _watch(directory, polling):
+    calls = []
+    changed = threading.Event()
+
+    def _callback():
+        calls.append(time.monotonic())
+        changed.set()
+
+    watcher = rpmdb_watcher.RpmdbWatcher(os.path.join(directory, 'rpmdb.sqlite'), _callback,
+                                         debounce=0.3, poll_interval=0.05)
+    if polling:
+        watcher._inotify_fd = lambda: None
+    assert watcher.start()
+    return watcher, calls, changed
+
+
+def _write(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def _check_debounced_changes(polling):
+    with tempfile.TemporaryDirectory() as directory:
+        rpmdb = os.path.join(directory, 'rpmdb.sqlite')
+        _write(rpmdb, b'db')
+        watcher, calls, changed = _watch(directory, polling)
+        try:
+            # files touched by rpmdb readers are ignored
+            _write(rpmdb + '-shm', b'shm')
+            assert not changed.wait(0.6)
+
+            # a transaction writing several times gives a single call
+            for i in range(5):
+                _write(rpmdb + '-wal', b'page %d' % i)
+                time.sleep(0.05)
+            _write(rpmdb, b'checkpoint')
+            assert changed.wait(5)
+            time.sleep(0.6)
+            assert len(calls) == 1
+        finally:
+            watcher.stop()
+        assert watcher._thread is None
+
+
+def test_inotify_watcher_debounces_rpmdb_writes():
+    _check_debounced_changes(polling=False)
+
+
+def test_polling_watcher_debounces_rpmdb_writes():
+    _check_debounced_changes(polling=True)
+
+
+def test_missing_rpmdb_directory_is_not_watched():
+    watcher = rpmdb_watcher.RpmdbWatcher('/nonexistent/rpm/rpmdb.sqlite', lambda: None)
+    assert not watcher.start()
+
+
+if __name__ == '__main__':
+    tests = [
+        test_inotify_watcher_debounces_rpmdb_writes,
+        test_polling_watcher_debounces_rpmdb_writes,
+        test_missing_rpmdb_directory_is_not_watched,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} rpmdb watcher unit checks passed')
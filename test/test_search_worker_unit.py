@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.search_worker and the backend attribute column search."""
+
+import threading
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora import dnfd_client
+from dnfdragora.search_worker import ParallelSearch, column_text
+from stubs import FakeRootBackend, make_cache
+
+FILES = {
+    'vim-enhanced': ['/usr/bin/vim', '/usr/share/man/man1/vim.1.gz'],
+    'nano': ['/usr/bin/nano', '/usr/bin/rnano'],
+    'emacs': ['/usr/bin/emacs', '/usr/libexec/emacs/emacs-29.4'],
+}
+
+
+class _FakeRootBackend(FakeRootBackend):
+    """FakeRootBackend searching in process, GetPackages lists FILES."""
+
+    def __init__(self, cache):
+        FakeRootBackend.__init__(self, cache, parallel_search=ParallelSearch(max_workers=1))
+        self.listed = []
+        # GetPackages calls failing
+        self.failures = 0
+
+    def GetPackages(self, options, sync=False, wait=False):
+        # a scheduled request waited for, not a sync call
+        assert wait and not sync
+        self.listed.append((options['scope'], options['package_attrs'][0]))
+        if self.failures:
+            self.failures -= 1
+            raise dnfd_client.DaemonError("GetPackages_fd: no data for 10 seconds, listing incomplete")
+        return [{'name': po.name, 'epoch': '0', 'version': po.ver, 'release': po.rel, 'arch': po.arch,
+                 'files': FILES[po.name]} for po in self.cache.view(('installed', 'available'))]
+
+
+def _cache():
+    return make_cache([('installed', 'r', {'name': 'vim-enhanced', 'repo_id': '@System'}),
+                       ('available', 'i', {'name': 'nano'}),
+                       ('available', 'i', {'name': 'emacs'})])
+
+
+def test_chunks_matched_by_processes_give_the_in_process_result():
+    texts = ['/usr/bin/tool-%d\n/usr/share/doc/tool-%d/README' % (i, i) for i in range(3000)]
+    expected = ParallelSearch(max_workers=1).search(r'tool-1\d*7$', texts)
+    assert expected[:3] == [17, 107, 117]
+
+    search = ParallelSearch(max_workers=2)
+    search.CHUNK_SIZE = 8000
+    search.MIN_PARALLEL_SIZE = 0
+    partials = []
+    try:
+        assert search.search(r'tool-1\d*7$', texts, partial=partials.append) == expected
+    finally:
+        search.shutdown()
+    assert len(partials) > 1
+    assert sorted(i for indexes in partials for i in indexes) == expected
+
+    cancel = threading.Event()
+    cancel.set()
+    assert ParallelSearch(max_workers=1).search('tool', texts, cancel=cancel) is None
+    assert column_text(['/a', '/b']) == '/a\n/b'
+    assert column_text(None) == ''
+
+
+def test_file_list_search_fetches_the_column_once():
+    cache = _cache()
+    backend_ = _FakeRootBackend(cache)
+    found = backend_.search('all', 'filelist', r'^/usr/bin/r?nano$', sync=True)
+    assert [po.name for po in found] == ['nano']
+    assert [po.name for po in backend_.search('installed', 'filelist', 'man1', sync=True)] == ['vim-enhanced']
+    assert backend_.search('available', 'filelist', 'man1', sync=True) == []
+    # the column of all the packages serves every scope
+    assert backend_.listed == [('all', 'files')]
+
+    # listed again once the cache changes
+    cache.reset_scope('installed')
+    assert backend_.search('available', 'filelist', 'emacs', sync=True)[0].name == 'emacs'
+    assert backend_.listed == [('all', 'files'), ('available', 'files')]
+
+
+def test_a_failed_listing_is_not_kept():
+    backend_ = _FakeRootBackend(_cache())
+    backend_.failures = 1
+    backend_.search('all', 'description', 'editor')
+    backend_._search_thread.join(5)
+    event = backend_.eventQueue.get_nowait()
+    assert event['value']['result'] is None
+    assert 'incomplete' in event['value']['error']
+    assert backend_._attribute_column is None
+    # listed again by the next search
+    assert [po.name for po in backend_.search('all', 'filelist', 'emacs', sync=True)] == ['emacs']
+    assert backend_.listed == [('all', 'description'), ('all', 'files')]
+
+
+def test_a_new_search_cancels_the_running_one():
+    cache = _cache()
+    backend_ = _FakeRootBackend(cache)
+    listing = threading.Event()
+    go_on = threading.Event()
+    get_packages = backend_.GetPackages
+
+    def slow_get_packages(options, sync=False, wait=False):
+        listing.set()
+        go_on.wait(5)
+        return get_packages(options, sync, wait)
+    backend_.GetPackages = slow_get_packages
+
+    backend_.search('all', 'filelist', 'vim')
+    first = backend_._search_thread
+    assert listing.wait(5)
+    backend_.search('all', 'filelist', 'emacs')
+    go_on.set()
+    first.join(5)
+    backend_._search_thread.join(5)
+    event = backend_.eventQueue.get_nowait()
+    assert event['value']['search_id'] == backend_.search_id == 2
+    assert [po.name for po in event['value']['result']] == ['emacs']
+    # nothing is posted by the cancelled search
+    assert backend_.eventQueue.empty()
+
+
+if __name__ == '__main__':
+    tests = [
+        test_chunks_matched_by_processes_give_the_in_process_result,
+        test_file_list_search_fetches_the_column_once,
+        test_a_failed_listing_is_not_kept,
+        test_a_new_search_cancels_the_running_one,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} search worker unit checks passed')
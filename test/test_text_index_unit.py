@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Unit tests for dnfdragora.text_index.TextIndex and the backend text search."""
+
+from stubs import install_const_stub, install_dependency_stubs
+
+install_dependency_stubs()
+install_const_stub()
+
+from dnfdragora.attribute_store import AttributeStore
+from dnfdragora.text_index import TextIndex
+from stubs import FakeRootBackend, make_cache, make_row
+
+PACKAGES = [
+    # scope, action, name, summary, repo
+    ('installed', 'r', 'vim-enhanced', 'A version of the VIM editor which includes recent enhancements', '@System'),
+    ('available', 'i', 'vim', 'The VIM editor', 'fedora'),
+    ('available', 'i', 'nano', 'A small text editor', 'fedora'),
+    ('available', 'i', 'python3-requests', 'HTTP library, written in Python, for human beings', 'fedora'),
+    ('available', 'i', 'libreoffice-writer', 'LibreOffice Word Processor', 'fedora'),
+    ('updates', 'u', 'emacs', 'GNU Emacs text editor', 'updates'),
+]
+NAMED_PACKAGES = PACKAGES + [
+    ('available', 'i', 'libqt5-core', 'Qt5 core library', 'fedora'),
+    ('installed', 'r', 'libstdc++', 'GNU Standard C++ Library', '@System'),
+    ('available', 'i', 'python3-foo', 'Foo for Python 3', 'fedora'),
+]
+
+
+def _cache(packages=PACKAGES):
+    return make_cache([(scope, action, {'name': name, 'summary': summary, 'repo_id': repo})
+                       for scope, action, name, summary, repo in packages])
+
+
+def _packages(cache):
+    return [po for scope in ('updates', 'installed', 'available') for po in cache.packages(scope)]
+
+
+def _names(hits):
+    return [po.name for po, _ in hits]
+
+
+def test_words_prefixes_and_substrings_are_ranked():
+    index = TextIndex(_packages(_cache()))
+    # the package named as the word first, name matches before summary ones
+    assert _names(index.search(['vim'])) == ['vim', 'vim-enhanced']
+    assert _names(index.search(['editor'], fields=('summary',))) == ['vim', 'nano', 'emacs', 'vim-enhanced']
+    assert _names(index.search(['edit'], fields=('summary',)))[0] == 'vim'
+    # every word must be found
+    assert _names(index.search(['text', 'editor'])) == ['nano', 'emacs']
+    assert index.search(['requests', 'editor']) == []
+    # substrings only if asked for
+    assert index.search(['office'], fuzzy=False) == []
+    assert _names(index.search(['office'], substring=True)) == ['libreoffice-writer']
+    # a typo matches similar words if nothing else does
+    assert _names(index.search(['pythn3'])) == ['python3-requests']
+    assert index.search(['pythn3'], fuzzy=False) == []
+    assert _names(index.search(['editr', 'smal'])) == ['nano']
+
+
+def test_descriptions_are_indexed_once_known():
+    pkgs = _packages(_cache())
+    nano = next(po for po in pkgs if po.name == 'nano')
+    index = TextIndex(pkgs, lambda po: 'GNU nano is a pico clone' if po is nano else None)
+    assert _names(index.search(['pico'], fields=('description',))) == ['nano']
+    assert index.search(['pico']) == []
+    emacs = next(po for po in pkgs if po.name == 'emacs')
+    index.add_description(emacs, 'The extensible self-documenting editor')
+    index.add_description(emacs, 'Ignored, emacs description is already indexed')
+    assert _names(index.search(['extensible'], fields=('description',))) == ['emacs']
+    assert index.search(['ignored'], fields=('description',)) == []
+
+
+def test_backend_text_search_follows_the_cache():
+    cache = _cache()
+    store = AttributeStore(':memory:')
+    store.put('vim-1.0-1.fc40.x86_64', 'description', 'Vi IMproved, a programmer text editor')
+    backend_ = FakeRootBackend(cache, store)
+    # not built yet, dnf5daemon is asked
+    assert backend_.text_search(backend_.search_query('all'), ['editor']) is None
+    backend_._text_index_thread.join()
+    assert [po.name for po in backend_.text_search(backend_.search_query('all'), ['programmer'],
+                                                   ('description',))] == ['vim']
+    query = backend_.search_query('available', repos=['fedora'])
+    assert [po.name for po in backend_.text_search(query, ['text', 'editor'])] == ['nano']
+
+    # the index is built again once the cache changes, without waiting for it
+    index = backend_.text_index()
+    assert backend_.text_index() is index
+    # nano installed, it leaves available
+    nano = cache.name_packages('available', 'nano')[0]
+    values = dict(nano.as_dbus_pkg(), repo_id='@System')
+    cache.apply_transaction([make_row(nano._store, values, 'r')], [])
+    assert backend_.text_index() is None
+    backend_._text_index_thread.join()
+    assert backend_.text_index() not in (None, index)
+    assert backend_.text_search(query, ['text', 'editor']) == []
+
+
+def test_backend_fuzzy_name_search():
+    backend_ = FakeRootBackend(_cache(NAMED_PACKAGES))
+    backend_.build_text_index()
+    backend_._text_index_thread.join()
+    query = backend_.search_query('all')
+
+    def search(*words, icase=True):
+        return sorted(po.name for po in backend_.name_search(query, ['*%s*' % w for w in words], icase, fuzzy=True))
+
+    assert search('office') == ['libreoffice-writer']
+    assert search('QT5') == ['libqt5-core']
+    assert search('QT5', icase=False) == []
+    assert search('vim', 'enh') == ['vim-enhanced']
+    # words the index cannot find inside names are globs: too short,
+    # not a token or several tokens
+    assert search('qt') == ['libqt5-core']
+    assert search('c++') == ['libstdc++']
+    assert search('n3-fo') == ['python3-foo']
+    assert search('m-e') == ['vim-enhanced']
+    # without fuzzy search, patterns are NEVRA globs
+    assert [po.name for po in backend_.name_search(query, ['libstdc++'])] == ['libstdc++']
+    assert backend_.name_search(query, ['qt']) == []
+
+
+def test_summary_search_waits_for_the_index_being_built():
+    cache = _cache()
+    backend_ = FakeRootBackend(cache)
+    query = backend_.search_query('all')
+    # the cache cannot answer at once, dnf5daemon Search has no summary field
+    assert backend_.text_search(query, ['editor'], ('summary',)) is None
+    backend_.search_text('available', ['editor'], ('summary',))
+    backend_._search_thread.join(5)
+    event = backend_.eventQueue.get_nowait()
+    assert event['event'] == 'RESearch'
+    assert event['value']['search_id'] == backend_.search_id
+    assert event['value']['error'] is None
+    assert [po.name for po in event['value']['result']] == ['vim', 'nano', 'emacs']
+
+    # words are found as they are unless icase
+    backend_.search_text('all', ['*VIM*'], substring=True, icase=False)
+    backend_._search_thread.join(5)
+    assert [po.name for po in backend_.eventQueue.get_nowait()['value']['result']] == ['vim', 'vim-enhanced']
+    backend_.search_text('all', ['*Vim*'], substring=True, icase=False)
+    backend_._search_thread.join(5)
+    assert backend_.eventQueue.get_nowait()['value']['result'] == []
+
+    # the file index is waited for too, if it cannot answer the search fails
+    backend_.file_search = lambda *args: None
+    backend_.search_text('all', ['editor'], ('summary',), filenames=True)
+    backend_._search_thread.join(5)
+    event = backend_.eventQueue.get_nowait()
+    assert event['value']['result'] is None
+    assert 'file index' in event['value']['error']
+
+
+if __name__ == '__main__':
+    tests = [
+        test_words_prefixes_and_substrings_are_ranked,
+        test_descriptions_are_indexed_once_known,
+        test_backend_text_search_follows_the_cache,
+        test_backend_fuzzy_name_search,
+        test_summary_search_waits_for_the_index_being_built,
+    ]
+
+    passed = 0
+    for test in tests:
+        test()
+        passed += 1
+
+    print(f'OK: {passed}/{len(tests)} TextIndex unit checks passed')